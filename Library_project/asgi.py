@@ -0,0 +1,26 @@
+"""
+ASGI config for Library_project project.
+
+It exposes the ASGI callable as a module-level variable named ``application``
+and serves the async catalog views (``Library_project.asgi_urls``). Run it
+with ``GUNICORN_WORKER_CLASS=uvicorn_worker.UvicornWorker gunicorn
+Library_project.asgi:application``; see ``gunicorn.conf.py``. Database
+connections are not persistent here (``CONN_MAX_AGE=0``).
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Library_project.settings')
+os.environ.setdefault('LIBRARY_ASYNC_VIEWS', '1')
+
+application = get_asgi_application()
+
+# Load the autocomplete index at boot so suggestions never wait on the database.
+from library_web.suggest import suggest_index  # noqa: E402  pylint: disable=wrong-import-position
+
+suggest_index.warm()
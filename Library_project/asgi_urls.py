@@ -0,0 +1,15 @@
+"""
+URL configuration for the ASGI entry point: the read-only catalog pages are
+served by their async versions, every other route as in ``urls.py``.
+"""
+
+from django.urls import path
+
+from Library_project import urls
+from library_web import async_views
+
+urlpatterns = [
+    path('', async_views.home, name='home'),
+    path('viewBook/<int:book_id>', async_views.view_book, name='viewBook'),
+    path('search/', async_views.search_books, name='search_books'),
+] + urls.urlpatterns
@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/2.1/ref/settings/
 from pathlib import Path      # <--- move here
 import os
 import sys
+import django
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -55,6 +57,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'library_web.routers.PrimaryPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -63,7 +66,11 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'Library_project.urls'
+# Library_project/asgi.py sets LIBRARY_ASYNC_VIEWS=1 to serve the async catalog views.
+if os.environ.get("LIBRARY_ASYNC_VIEWS") == "1":
+    ROOT_URLCONF = 'Library_project.asgi_urls'
+else:
+    ROOT_URLCONF = 'Library_project.urls'
 
 TEMPLATES = [
     {
@@ -81,20 +88,124 @@ TEMPLATES = [
     },
 ]
 
+# Opt-in request instrumentation: Server-Timing headers, one JSON log line
+# per request and per-view Prometheus histograms at /metrics. /metrics is
+# served to staff users and to scrapers sending
+# "Authorization: Bearer $LIBRARY_METRICS_TOKEN".
+LIBRARY_METRICS_TOKEN = os.environ.get("LIBRARY_METRICS_TOKEN", "")
+if os.environ.get("LIBRARY_REQUEST_METRICS") == "1":
+    MIDDLEWARE.insert(0, 'library_web.instrumentation.RequestMetricsMiddleware')
+    TEMPLATES[0]['BACKEND'] = 'library_web.instrumentation.TimedDjangoTemplates'
+    LOGGING = {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'handlers': {'console': {'class': 'logging.StreamHandler'}},
+        'loggers': {'library_web.requests': {'handlers': ['console'], 'level': 'INFO'}},
+    }
+
 WSGI_APPLICATION = 'Library_project.wsgi.application'
+ASGI_APPLICATION = 'Library_project.asgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/2.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-        'USER': 'mydbuser',
-        'PASSWORD': 'mypassword',
+# LIBRARY_DB_ENGINE picks the profile: "sqlite" (default) or "postgresql".
+# Connections are kept for LIBRARY_DB_CONN_MAX_AGE seconds and checked
+# before reuse, so a worker opens one connection per thread rather than
+# one per request. SQLite connections are tuned in library_web/db.py.
+
+DB_ENGINE = os.environ.get("LIBRARY_DB_ENGINE", "sqlite")
+DB_CONN_MAX_AGE = int(os.environ.get("LIBRARY_DB_CONN_MAX_AGE", "600"))
+if os.environ.get("LIBRARY_ASYNC_VIEWS") == "1":
+    # Under ASGI each request's queries run on whichever sync_to_async
+    # thread is free, so persistent connections pile up across threads
+    # and are never health-checked; close them at the end of each request.
+    DB_CONN_MAX_AGE = 0
+
+if DB_ENGINE == "postgresql":
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get("LIBRARY_DB_NAME", "library"),
+            'USER': os.environ.get("LIBRARY_DB_USER", ""),
+            'PASSWORD': os.environ.get("LIBRARY_DB_PASSWORD", ""),
+            'HOST': os.environ.get("LIBRARY_DB_HOST", ""),
+            'PORT': os.environ.get("LIBRARY_DB_PORT", ""),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': int(os.environ.get("LIBRARY_DB_CONNECT_TIMEOUT", "5")),
+            },
+        }
+    }
+    if os.environ.get("LIBRARY_DB_POOL") == "1":
+        # psycopg 3 pool, one per worker process. It replaces persistent
+        # connections and needs Django 5.1+.
+        if django.VERSION < (5, 1):
+            raise ImproperlyConfigured(
+                f"LIBRARY_DB_POOL=1 needs Django 5.1 or later, not {django.get_version()}; "
+                "unset it to keep one persistent connection per thread."
+            )
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get("LIBRARY_DB_POOL_MIN", "2")),
+            'max_size': int(os.environ.get("LIBRARY_DB_POOL_MAX", "10")),
+        }
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get("LIBRARY_DB_NAME", os.path.join(BASE_DIR, 'db.sqlite3')),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # Seconds a writer waits for the lock before "database is locked".
+                'timeout': int(os.environ.get("LIBRARY_DB_BUSY_TIMEOUT", "20")),
+            },
+        }
+    }
+
+# Read replicas for catalog reads (library_web/routers.py): SQLite file
+# paths or PostgreSQL hosts, comma-separated. Locally, replicate_sqlite
+# copies the primary into the replica files to simulate replication.
+REPLICA_SOURCES = [
+    source for source in os.environ.get("LIBRARY_DB_REPLICAS", "").split(",") if source
+]
+for number, source in enumerate(REPLICA_SOURCES, start=1):
+    replica = dict(DATABASES['default'], OPTIONS=dict(DATABASES['default']['OPTIONS']))
+    replica['HOST' if DB_ENGINE == "postgresql" else 'NAME'] = source
+    replica['TEST'] = {'MIRROR': 'default'}
+    DATABASES[f'replica_{number}'] = replica
+LIBRARY_REPLICA_DATABASES = [f'replica_{n}' for n in range(1, len(REPLICA_SOURCES) + 1)]
+LIBRARY_PRIMARY_PIN_SECONDS = int(os.environ.get("LIBRARY_PRIMARY_PIN_SECONDS", "5"))
+DATABASE_ROUTERS = ['library_web.routers.ReplicaRouter']
+
+
+# Cache
+# A bounded LRU per process, optionally in front of a tier every worker on
+# the box shares: LIBRARY_CACHE_SHARED=file:/var/tmp/library-cache or
+# sqlite:/var/tmp/library-cache.sqlite3. LIBRARY_CACHE_BACKEND (and
+# LIBRARY_CACHE_LOCATION) replace the whole thing, e.g. with Redis.
+
+if os.environ.get("LIBRARY_CACHE_BACKEND"):
+    CACHES = {
+        'default': {
+            'BACKEND': os.environ["LIBRARY_CACHE_BACKEND"],
+            'LOCATION': os.environ.get("LIBRARY_CACHE_LOCATION", ""),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'library_web.cache.TieredCache',
+            'LOCATION': 'library-web',
+            'OPTIONS': {
+                'MAX_ENTRIES': int(os.environ.get("LIBRARY_CACHE_MAX_ENTRIES", "5000")),
+                'SHARED': os.environ.get("LIBRARY_CACHE_SHARED", ""),
+            },
+        }
     }
-}
 
 
 # Password validation
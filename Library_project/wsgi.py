@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Library_project.settings')
 
 application = get_wsgi_application()
+
+# Load the autocomplete index at boot so suggestions never wait on the database.
+from library_web.suggest import suggest_index  # noqa: E402  pylint: disable=wrong-import-position
+
+suggest_index.warm()
@@ -0,0 +1,53 @@
+"""Gunicorn settings for the web process, read from the Procfile.
+
+Defaults are sized from the CPU count; every value can be overridden from
+the environment (GUNICORN_WORKERS, GUNICORN_THREADS, ...). Threaded
+workers keep serving while a thread waits on S3 or the database. For the
+ASGI entry point and its async catalog views, run
+``Library_project.asgi:application`` with
+GUNICORN_WORKER_CLASS=uvicorn_worker.UvicornWorker (threads are then
+unused, and database connections are closed after each request).
+
+Every worker thread can hold a persistent database connection, so
+workers * threads must stay below the database's connection limit.
+"""
+
+import multiprocessing
+import os
+
+CPUS = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+# One worker per core, plus one so a core stays busy while another worker restarts.
+workers = int(os.environ.get("GUNICORN_WORKERS", CPUS + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", min(2 * CPUS, 8)))
+
+# Import Django, the URLconf and the autocomplete index once in the master
+# and share the pages copy-on-write with the workers.
+preload_app = True
+
+# Recycle workers to cap slow memory growth; the jitter keeps them from
+# all restarting at once.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", "5"))
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-")
+
+
+def pre_fork(_server, _worker):
+    """Close the master's database connections so no worker inherits them."""
+    from django.db import connections  # pylint: disable=import-outside-toplevel
+
+    connections.close_all()
+
+
+def post_fork(_server, _worker):
+    """Start the worker's autocomplete watcher, which also loads a missing index."""
+    # pylint: disable=import-outside-toplevel
+    from library_web.suggest import suggest_index
+
+    suggest_index.watch()
@@ -0,0 +1,225 @@
+"""Read-only JSON API over books and borrow records.
+
+List endpoints accept ``?fields=`` (a comma-separated sparse fieldset),
+``?after=`` and ``?limit=`` for keyset pagination, and per-resource
+filters. Rows are read with ``.values()`` and written out one at a time
+as a streamed JSON document, so no model instances are built and a large
+page is never held in memory as a whole.
+"""
+# pylint: disable=no-member
+
+import json
+from functools import wraps
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_http_methods
+
+from library_web.models import BorrowRecord, EBooksModel
+from library_web.pagination import (
+    InvalidCursor, cursor_for, decode_cursor, ordering_fields, page_limit, page_queryset,
+)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+# Rows fetched from the database cursor per round trip while streaming.
+STREAM_CHUNK_SIZE = 200
+
+BOOK_FIELDS = (
+    "id", "book_id", "title", "subtitle", "author", "publisher", "description", "category",
+    "image", "rating", "borrow_count", "is_borrowed", "copy_count", "available_copies",
+    "updated_at",
+)
+BOOK_ORDERINGS = ("id", "rating", "borrow")
+
+RECORD_FIELDS = (
+    "id", "tracking_code", "book_id", "user_id", "student_id", "borrow_date", "return_date",
+    "actual_return_date", "late_fee",
+)
+RECORD_ORDERINGS = ("recent",)
+
+TRUE_VALUES = ("1", "true", "yes")
+FALSE_VALUES = ("0", "false", "no")
+
+
+class BadRequest(ValueError):
+    """Raised for query parameters the API cannot serve."""
+
+
+def error(message, status=400):
+    """Return a JSON error body."""
+    return JsonResponse({"error": message}, status=status)
+
+
+def selected_fields(request, allowed):
+    """Return the fields named by ``?fields=``, or every field."""
+    raw = request.GET.get("fields", "").strip()
+    if not raw:
+        return list(allowed)
+    fields = [name.strip() for name in raw.split(",") if name.strip()]
+    unknown = sorted(set(fields) - set(allowed))
+    if unknown:
+        raise BadRequest(f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(fields))
+
+
+def flag(request, name):
+    """Parse a boolean query parameter, or return None when absent."""
+    raw = request.GET.get(name)
+    if raw is None or raw == "":
+        return None
+    if raw.lower() in TRUE_VALUES:
+        return True
+    if raw.lower() in FALSE_VALUES:
+        return False
+    raise BadRequest(f"{name} must be true or false")
+
+
+def integer(request, name):
+    """Parse an integer query parameter, or return None when absent."""
+    raw = request.GET.get(name)
+    if raw is None or raw == "":
+        return None
+    try:
+        return int(raw)
+    except ValueError as exc:
+        raise BadRequest(f"{name} must be an integer") from exc
+
+
+def is_library_admin(user):
+    """Return whether ``user`` may read every borrow record."""
+    return user.is_superuser or user.username == "admin"
+
+
+def _shape(row, fields):
+    """Return ``row`` cut to ``fields``, with file paths turned into URLs."""
+    item = {name: row[name] for name in fields}
+    if item.get("image"):
+        item["image"] = default_storage.url(item["image"])
+    return item
+
+
+def _encode(item):
+    return json.dumps(item, cls=DjangoJSONEncoder)
+
+
+def stream_page(queryset, fields, ordering, after, limit):
+    """Stream one keyset page of ``queryset`` as ``{"results": [...], "next": ...}``.
+
+    The ordering columns are always selected so the next-page token can be
+    built from the last row, even when the fieldset leaves them out.
+    """
+    if after:
+        decode_cursor(after, ordering)
+    columns = list(dict.fromkeys(fields + ordering_fields(ordering)))
+    rows = page_queryset(queryset.values(*columns), ordering, after, limit)
+
+    def chunks():
+        yield '{"results": ['
+        previous = next_token = None
+        for count, row in enumerate(rows.iterator(chunk_size=STREAM_CHUNK_SIZE)):
+            if count == limit:
+                next_token = cursor_for(previous, ordering)
+                break
+            yield ("," if count else "") + _encode(_shape(row, fields))
+            previous = row
+        yield f'], "next": {_encode(next_token)}}}'
+
+    # JsonResponse cannot stream.
+    return StreamingHttpResponse(  # pylint: disable=http-response-with-content-type-json
+        chunks(), content_type="application/json"
+    )
+
+
+def _list(request, queryset, allowed_fields, orderings):
+    """Serve a list endpoint for ``queryset`` once it has been filtered."""
+    fields = selected_fields(request, allowed_fields)
+    ordering = request.GET.get("ordering", orderings[0])
+    if ordering not in orderings:
+        raise BadRequest(f"ordering must be one of {', '.join(orderings)}")
+    limit = page_limit(request, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    return stream_page(queryset, fields, ordering, request.GET.get("after"), limit)
+
+
+def _detail(request, queryset, allowed_fields, pk):
+    """Serve one row of ``queryset`` as JSON."""
+    fields = selected_fields(request, allowed_fields)
+    row = queryset.filter(pk=pk).values(*fields).first()
+    if row is None:
+        return error("Not found", status=404)
+    return JsonResponse(_shape(row, fields))
+
+
+def api_view(view_func):
+    """Turn ``BadRequest`` and ``InvalidCursor`` into JSON 400 responses."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view_func(request, *args, **kwargs)
+        except InvalidCursor:
+            return error("Invalid page token")
+        except BadRequest as exc:
+            return error(str(exc))
+    return wrapper
+
+
+def _records_for(user):
+    """Return the borrow records ``user`` may read."""
+    if is_library_admin(user):
+        return BorrowRecord.objects.all()
+    return BorrowRecord.objects.filter(user=user)
+
+
+@require_http_methods(["GET"])
+@api_view
+def book_list(request):
+    """List books; filters are ``category``, ``rating``, ``min_rating`` and ``available``."""
+    books = EBooksModel.objects.all()
+    if request.GET.get("category"):
+        books = books.filter(category=request.GET["category"])
+    rating = integer(request, "rating")
+    if rating is not None:
+        books = books.filter(rating=rating)
+    min_rating = integer(request, "min_rating")
+    if min_rating is not None:
+        books = books.filter(rating__gte=min_rating)
+    available = flag(request, "available")
+    if available is not None:
+        books = books.filter(is_borrowed=not available)
+    return _list(request, books, BOOK_FIELDS, BOOK_ORDERINGS)
+
+
+@require_http_methods(["GET"])
+@api_view
+def book_detail(request, book_id):
+    """Return one book."""
+    return _detail(request, EBooksModel.objects.all(), BOOK_FIELDS, book_id)
+
+
+@require_http_methods(["GET"])
+@api_view
+def record_list(request):
+    """List borrow records: all of them for admins, the caller's own otherwise.
+
+    Filters are ``book`` and ``open``.
+    """
+    if not request.user.is_authenticated:
+        return error("Authentication required", status=401)
+    records = _records_for(request.user)
+    book = integer(request, "book")
+    if book is not None:
+        records = records.filter(book_id=book)
+    is_open = flag(request, "open")
+    if is_open is not None:
+        records = records.filter(actual_return_date__isnull=is_open)
+    return _list(request, records, RECORD_FIELDS, RECORD_ORDERINGS)
+
+
+@require_http_methods(["GET"])
+@api_view
+def record_detail(request, record_id):
+    """Return one borrow record the caller may read."""
+    if not request.user.is_authenticated:
+        return error("Authentication required", status=401)
+    return _detail(request, _records_for(request.user), RECORD_FIELDS, record_id)
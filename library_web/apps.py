@@ -9,3 +9,8 @@ class LibraryWebConfig(AppConfig):
     Configuration class for the library_web Django app.
     """
     name = 'library_web'
+
+    def ready(self):
+        """Connect the model and database connection signal handlers."""
+        # pylint: disable=import-outside-toplevel,unused-import
+        from library_web import db, signals  # noqa: F401
@@ -0,0 +1,73 @@
+"""Async versions of the read-only catalog views, served by the ASGI entry point.
+
+Database reads go through Django's async ORM and the conditional-GET state
+functions run before anything is rendered, so a worker's event loop keeps
+serving other requests while one waits on the database. Work that has no
+async API yet (the raw-SQL search backend, the cached snapshot build,
+template rendering with its lazy session and messages) runs in a thread
+with ``sync_to_async``.
+"""
+# pylint: disable=no-member
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponseBadRequest
+from django.shortcuts import render
+
+from library_web.catalog import get_catalog_snapshot, section_limit
+from library_web.conditional import abook_state, acatalog_state, conditional_page
+from library_web.models import EBooksModel
+from library_web.pagination import InvalidCursor, apaginate, page_limit
+from library_web.search import get_search_backend
+from library_web.views import INVALID_CURSOR_MESSAGE
+from .decorators import async_require_http_methods
+
+
+def _search(query, after, limit):
+    """Run a full-text search; picking the backend may inspect the database."""
+    return get_search_backend().search(query, after, limit)
+
+
+async def _render(request, template_name, context):
+    """Render a template in a thread; context processors may query lazily."""
+    return await sync_to_async(render)(request, template_name, context)
+
+
+@async_require_http_methods(["GET", "POST"])
+@conditional_page(acatalog_state)
+async def home(request):
+    """Display categorized books, top rated, and most borrowed."""
+    return await _render(request, "home.html", await sync_to_async(get_catalog_snapshot)())
+
+
+@async_require_http_methods(["GET", "POST"])
+@conditional_page(abook_state)
+async def view_book(request, book_id):
+    """View details of a single book."""
+    try:
+        book = await EBooksModel.objects.aget(id=book_id)
+    except EBooksModel.DoesNotExist as exc:
+        raise Http404("No book matches the given query.") from exc
+    return await _render(request, "viewBook.html", {"book": book})
+
+
+@async_require_http_methods(["GET", "POST"])
+@conditional_page(acatalog_state)
+async def search_books(request):
+    """Search books with the full-text backend, best matches first."""
+    query = request.GET.get("q", "").strip()
+    after = request.GET.get("after")
+    limit = page_limit(request, section_limit("search"))
+
+    try:
+        if query:
+            books, after = await sync_to_async(_search)(query, after, limit)
+        else:
+            books, after = await apaginate(EBooksModel.objects.all(), "id", after, limit)
+    except InvalidCursor:
+        return HttpResponseBadRequest(INVALID_CURSOR_MESSAGE)
+
+    return await _render(
+        request,
+        "search_books.html",
+        {"books": books, "query": query, "after": after},
+    )
@@ -0,0 +1,102 @@
+"""Allocation and encoding of public book ids.
+
+Ids are drawn from a monotonic counter stored in the database and written
+in Crockford base32 with a check symbol, e.g. ``BOOK-00000011``. Reserving
+a block of ``n`` ids is a single ``UPDATE ... SET next_value = next_value + n``,
+so concurrent workers are serialized by the row lock and never receive the
+same value. ``LIBRARY_BOOK_ID_ALLOCATOR`` can name another allocator class.
+"""
+# pylint: disable=no-member
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils.module_loading import import_string
+
+PREFIX = "BOOK-"
+SEQUENCE_NAME = "book_id"
+# Seven digits cover 32**7 (about 34 billion) ids, and the 8-character body
+# can never equal one of the legacy 6-character random ids.
+WIDTH = 7
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+CHECK_ALPHABET = ALPHABET + "*~$=U"
+# Crockford decoding folds the letters most often misread.
+_ALIASES = {"O": "0", "I": "1", "L": "1"}
+
+
+class InvalidBookId(ValueError):
+    """Raised when a book id is malformed or fails its checksum."""
+
+
+def encode_book_id(value):
+    """Return the public id for sequence number ``value``."""
+    digits = ""
+    rest = value
+    while rest:
+        rest, digit = divmod(rest, 32)
+        digits = ALPHABET[digit] + digits
+    return PREFIX + digits.rjust(WIDTH, "0") + CHECK_ALPHABET[value % 37]
+
+
+def decode_book_id(book_id):
+    """Return the sequence number encoded in ``book_id``."""
+    text = book_id.strip().upper()
+    if not text.startswith(PREFIX) or len(text) < len(PREFIX) + WIDTH + 1:
+        raise InvalidBookId(book_id)
+    body, check = text[len(PREFIX):-1], text[-1]
+    value = 0
+    for char in body:
+        char = _ALIASES.get(char, char)
+        if char not in ALPHABET:
+            raise InvalidBookId(book_id)
+        value = value * 32 + ALPHABET.index(char)
+    if CHECK_ALPHABET[value % 37] != check:
+        raise InvalidBookId(book_id)
+    return value
+
+
+class BookIdAllocator:
+    """Base class for book id allocators."""
+
+    def allocate(self, count=1):
+        """Return ``count`` new, never used book ids."""
+        raise NotImplementedError
+
+
+class SequenceBookIdAllocator(BookIdAllocator):
+    """Hands out contiguous blocks from the ``IdSequence`` table."""
+
+    def reserve(self, count):
+        """Reserve ``count`` sequence numbers and return the first one."""
+        sequence = apps.get_model("library_web", "IdSequence")
+        with transaction.atomic():
+            rows = sequence.objects.filter(name=SEQUENCE_NAME)
+            if not rows.update(next_value=F("next_value") + count):
+                sequence.objects.get_or_create(name=SEQUENCE_NAME)
+                rows.update(next_value=F("next_value") + count)
+            # The update holds the row lock until commit, so no other worker
+            # can move the counter between it and this read.
+            return rows.values_list("next_value", flat=True).get() - count
+
+    def allocate(self, count=1):
+        first = self.reserve(count)
+        return [encode_book_id(value) for value in range(first, first + count)]
+
+
+_allocator = {"default": None}
+
+
+def get_book_id_allocator():
+    """Return the configured allocator."""
+    path = getattr(settings, "LIBRARY_BOOK_ID_ALLOCATOR", None)
+    if path:
+        return import_string(path)()
+    if _allocator["default"] is None:
+        _allocator["default"] = SequenceBookIdAllocator()
+    return _allocator["default"]
+
+
+def allocate_book_ids(count):
+    """Return ``count`` new book ids from the configured allocator."""
+    return get_book_id_allocator().allocate(count)
@@ -0,0 +1,316 @@
+"""Cache backends: a bounded LRU tier per process in front of a shared tier.
+
+``TieredCache`` keeps recently used keys in a size-bounded local-memory LRU
+and, when ``OPTIONS["SHARED"]`` names one, reads through to a second tier
+that every worker on the box shares:
+
+* ``file:/path/to/dir`` - Django's file-based cache;
+* ``sqlite:/path/to/file.sqlite3`` - ``SqliteCache`` below.
+
+Writes go to both tiers. Values copied from the shared tier are kept
+locally for at most ``LOCAL_TIMEOUT`` seconds, which bounds how long one
+worker can miss another worker's write. Hit, miss and eviction counts are
+kept per cache location and reported by ``cache_stats``.
+"""
+
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+
+DEFAULT_LOCAL_TIMEOUT = 5
+
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+def _count(location, event):
+    with _stats_lock:
+        _stats.setdefault(location, Counter())[event] += 1
+
+
+def cache_stats():
+    """Return ``{location: {event: count}}`` for every tiered cache in this process."""
+    with _stats_lock:
+        return {location: dict(counts) for location, counts in _stats.items()}
+
+
+def reset_cache_stats():
+    """Forget every counter."""
+    with _stats_lock:
+        _stats.clear()
+
+
+def render_cache_stats():
+    """Return the cache counters in the Prometheus text exposition format."""
+    lines = [
+        "# HELP library_cache_events_total Cache lookups by outcome, and LRU evictions.",
+        "# TYPE library_cache_events_total counter",
+    ]
+    for location, counts in sorted(cache_stats().items()):
+        for event, count in sorted(counts.items()):
+            lines.append(f'library_cache_events_total{{cache="{location}",event="{event}"}} {count}')
+    return "\n".join(lines) + "\n"
+
+
+class _LocalTier(LocMemCache):
+    """LocMemCache (already LRU) that counts the entries it culls."""
+
+    def __init__(self, name, params, location):
+        super().__init__(name, params)
+        self._location = location
+
+    def _cull(self):
+        before = len(self._cache)
+        super()._cull()
+        evicted = before - len(self._cache)
+        with _stats_lock:
+            _stats.setdefault(self._location, Counter())["evictions"] += evicted
+
+
+class _FileTier(FileBasedCache):
+    """FileBasedCache whose ``incr`` keeps the key's expiry.
+
+    Django's version re-sets the key with the default timeout, so a counter
+    stored with ``timeout=None`` would start expiring after one increment.
+    """
+
+    def incr(self, key, delta=1, version=None):
+        fname = self._key_to_file(key, version)
+        try:
+            with open(fname, "rb") as f:
+                expiry = pickle.load(f)
+                value = pickle.loads(zlib.decompress(f.read()))
+        except (FileNotFoundError, EOFError):
+            expiry, value = 0, None
+        now = time.time()
+        if expiry is not None and expiry <= now:
+            raise ValueError(f"Key '{key}' not found")
+        value += delta
+        self.set(key, value, None if expiry is None else expiry - now, version)
+        return value
+
+
+def is_shared(backend):
+    """Return whether values stored in ``backend`` reach other processes."""
+    if isinstance(backend, TieredCache):
+        return backend.shared is not None
+    return not isinstance(backend, (LocMemCache, DummyCache))
+
+
+class SqliteCache(BaseCache):
+    """Cache stored in one SQLite file, shared by every process that opens it."""
+
+    # Expired and surplus rows are purged once every this many writes.
+    CULL_EVERY = 100
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+        self._writes = 0
+
+    @property
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self._path, timeout=5, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)"
+            )
+            self._local.db = db
+        return db
+
+    def _expiry(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        return None if timeout is None else time.time() + timeout
+
+    def _live(self, key):
+        row = self._db.execute(
+            "SELECT value FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return row
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._live(key)
+        return default if row is None else pickle.loads(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._db.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._expiry(timeout)),
+        )
+        self._maybe_cull()
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("DELETE FROM cache WHERE key = ? AND expires <= ?", (key, time.time()))
+            added = db.execute(
+                "INSERT OR IGNORE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._expiry(timeout)),
+            ).rowcount == 1
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._db.execute(
+            "UPDATE cache SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (self._expiry(timeout), key, time.time()),
+        ).rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        db = self._db
+        # BEGIN IMMEDIATE takes the write lock up front, so concurrent
+        # increments from other processes queue instead of losing updates.
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._live(key)
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            db.execute(
+                "UPDATE cache SET value = ? WHERE key = ?",
+                (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), key),
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return value
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._db.execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount == 1
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._live(key) is not None
+
+    def clear(self):
+        self._db.execute("DELETE FROM cache")
+
+    def _maybe_cull(self):
+        self._writes += 1
+        if self._writes % self.CULL_EVERY:
+            return
+        db = self._db
+        db.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),))
+        surplus = db.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self._max_entries
+        if surplus > 0:
+            # Drop the entries closest to expiring; keys without a timeout go last.
+            db.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache "
+                "ORDER BY expires IS NULL, expires LIMIT ?)",
+                (surplus,),
+            )
+
+
+def _shared_tier(spec, params):
+    """Build the shared tier named by an ``OPTIONS["SHARED"]`` spec."""
+    if not spec:
+        return None
+    kind, _, location = spec.partition(":")
+    if kind == "file":
+        return _FileTier(location, params)
+    if kind == "sqlite":
+        return SqliteCache(location, params)
+    raise ValueError(f"Unknown shared cache tier {spec!r}; use file:<dir> or sqlite:<path>")
+
+
+class TieredCache(BaseCache):
+    """Bounded local LRU in front of an optional shared file or SQLite tier."""
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._location = location or "library-web"
+        tier_params = {key: value for key, value in params.items() if key != "OPTIONS"}
+        tier_params["OPTIONS"] = {"MAX_ENTRIES": self._max_entries}
+        self.local = _LocalTier(self._location, tier_params, self._location)
+        self.shared = _shared_tier(options.get("SHARED", ""), tier_params)
+        self.local_timeout = options.get("LOCAL_TIMEOUT", DEFAULT_LOCAL_TIMEOUT)
+
+    def _local_timeout(self, timeout):
+        """Return how long a value may live in the local tier."""
+        if self.shared is None:
+            return timeout
+        timeout = self.get_backend_timeout(timeout)
+        return self.local_timeout if timeout is None else min(timeout, self.local_timeout)
+
+    def get(self, key, default=None, version=None):
+        missing = object()
+        value = self.local.get(key, missing, version)
+        if value is not missing:
+            _count(self._location, "local_hits")
+            return value
+        if self.shared is not None:
+            value = self.shared.get(key, missing, version)
+            if value is not missing:
+                _count(self._location, "shared_hits")
+                self.local.set(key, value, self.local_timeout, version)
+                return value
+        _count(self._location, "misses")
+        return default
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if self.shared is not None:
+            self.shared.set(key, value, timeout, version)
+        self.local.set(key, value, self._local_timeout(timeout), version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if self.shared is None:
+            return self.local.add(key, value, timeout, version)
+        added = self.shared.add(key, value, timeout, version)
+        if added:
+            self.local.set(key, value, self._local_timeout(timeout), version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        touched = self.local.touch(key, self._local_timeout(timeout), version)
+        if self.shared is not None:
+            touched = self.shared.touch(key, timeout, version)
+        return touched
+
+    def incr(self, key, delta=1, version=None):
+        if self.shared is None:
+            return self.local.incr(key, delta, version)
+        value = self.shared.incr(key, delta, version)
+        self.local.set(key, value, self.local_timeout, version)
+        return value
+
+    def delete(self, key, version=None):
+        deleted = self.local.delete(key, version)
+        if self.shared is not None:
+            deleted = self.shared.delete(key, version) or deleted
+        return deleted
+
+    def has_key(self, key, version=None):
+        if self.local.has_key(key, version):
+            return True
+        return self.shared is not None and self.shared.has_key(key, version)
+
+    def clear(self):
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.clear()
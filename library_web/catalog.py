@@ -0,0 +1,181 @@
+"""Catalog snapshot shared by the listing views."""
+# pylint: disable=no-member
+
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Max, Sum
+from django.utils import timezone
+
+from library_web.models import CatalogState, EBooksModel
+from library_web.pagination import paginate
+
+CATALOG_STATE = "catalog"
+# Shared counters are summed over this many CatalogState rows, one picked
+# per change, so concurrent writers do not all queue on a single row lock.
+STATE_SLOTS = 16
+CATALOG_SNAPSHOT_KEY = "library_web:catalog:snapshot:{}"
+# Snapshots are keyed by generation, so old ones only need to age out.
+CATALOG_SNAPSHOT_TIMEOUT = 3600
+
+# Listing sections. ``context`` is the template variable the first page is
+# exposed as; the next-page token is exposed as ``<context>_after``.
+SECTIONS = {
+    "all": {"context": "all_books", "ordering": "id"},
+    "rating": {"context": "book_rating", "ordering": "rating"},
+    "borrow": {"context": "book_borrow", "ordering": "borrow"},
+    "education": {"context": "edu_books", "ordering": "id", "category": "Education"},
+    "fiction": {"context": "fiction_books", "ordering": "id", "category": "Fiction"},
+    "science": {"context": "science_books", "ordering": "id", "category": "Science"},
+    "non-fiction": {"context": "non_fiction_books", "ordering": "id", "category": "NonFriction"},
+}
+
+DEFAULT_PAGE_SIZE = 12
+
+# Process-local copy of the last snapshot as a (generation, data) pair.
+_snapshot = {"current": (None, None)}
+
+
+def section_limit(section):
+    """Return the page size for a section, honouring LIBRARY_SECTION_LIMITS."""
+    limits = getattr(settings, "LIBRARY_SECTION_LIMITS", {})
+    return limits.get(section, getattr(settings, "LIBRARY_PAGE_SIZE", DEFAULT_PAGE_SIZE))
+
+
+def _slot_names(name):
+    return [f"{name}:{slot}" for slot in range(STATE_SLOTS)]
+
+
+def _create_slots(name):
+    """Add any missing slot rows of the counter ``name``.
+
+    New rows are seeded from the clock so a recreated counter never reuses
+    the generation of a snapshot still sitting in some cache.
+    """
+    seed = time.time_ns() // STATE_SLOTS
+    CatalogState.objects.using("default").bulk_create(
+        [
+            CatalogState(name=slot, generation=seed, changed_at=timezone.now())
+            for slot in _slot_names(name)
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def read_state(name):
+    """Return ``(generation, changed_at)`` of the shared counter ``name``.
+
+    The counter lives in the database rather than the cache, so every
+    worker and management command sees the same value. It is read from the
+    primary, summed over its slot rows in one query.
+    """
+    # Slot names sort between "<name>:" and "<name>;", a primary-key range.
+    slots = CatalogState.objects.using("default").filter(
+        name__gte=f"{name}:", name__lt=f"{name};"
+    )
+    state = slots.aggregate(
+        generation=Sum("generation"), changed_at=Max("changed_at"), slots=Count("pk")
+    )
+    if state["slots"] < STATE_SLOTS:
+        _create_slots(name)
+        return read_state(name)
+    return state["generation"], state["changed_at"]
+
+
+def bump_state(name, key=None):
+    """Move the shared counter ``name`` on, through the slot picked by ``key``.
+
+    Call it inside the transaction that makes the change: the bump then
+    commits with it, so no reader can see the new generation before the
+    new rows, and a failed write leaves the counter alone. Only the slot
+    row is locked until commit, so writers keyed by different books rarely
+    wait on each other.
+    """
+    slot = random.randrange(STATE_SLOTS) if key is None else key % STATE_SLOTS
+    bump = CatalogState.objects.using("default").filter(name=f"{name}:{slot}")
+    if not bump.update(generation=F("generation") + 1, changed_at=timezone.now()):
+        _create_slots(name)
+        bump.update(generation=F("generation") + 1, changed_at=timezone.now())
+
+
+def catalog_version():
+    """Return the catalog's ``(generation, changed_at)``."""
+    return read_state(CATALOG_STATE)
+
+
+def catalog_generation():
+    """Return the current catalog generation."""
+    return catalog_version()[0]
+
+
+def invalidate_catalog(book_id=None):
+    """Bump the catalog generation so every process rebuilds its snapshot.
+
+    Pass the changed book's id when there is one; see ``bump_state``.
+    """
+    bump_state(CATALOG_STATE, book_id)
+
+
+def catalog_changed_at():
+    """Return when the catalog last changed."""
+    return catalog_version()[1]
+
+
+def build_catalog_snapshot():
+    """Cut the first page of each section with one ``LIMIT`` query apiece.
+
+    Each query walks the index of its section's ordering and stops after
+    one row past the page, so the cost follows the page sizes, not the
+    size of the catalog.
+    """
+    # From the primary: a lagging replica would store old rows under the
+    # new generation until the next change.
+    books = EBooksModel.objects.using("default")
+    data = {}
+    for name, section in SECTIONS.items():
+        queryset = books
+        if "category" in section:
+            queryset = queryset.filter(category=section["category"])
+        items, after = paginate(queryset, section["ordering"], limit=section_limit(name))
+        data[section["context"]] = items
+        data[section["context"] + "_after"] = after
+    return data
+
+
+def get_catalog_snapshot():
+    """Return the snapshot for the current generation, rebuilding when stale.
+
+    A process first looks for a snapshot another worker (or ``warm_cache``)
+    already stored in the cache for this generation, and only queries the
+    database when there is none.
+    """
+    generation = catalog_generation()
+    seen, data = _snapshot["current"]
+    if data is None or seen != generation:
+        key = CATALOG_SNAPSHOT_KEY.format(generation)
+        data = cache.get(key)
+        if data is None:
+            data = build_catalog_snapshot()
+            cache.set(key, data, CATALOG_SNAPSHOT_TIMEOUT)
+        _snapshot["current"] = (generation, data)
+    return data
+
+
+def section_page(section, after=None, limit=None):
+    """Return ``(books, next_token)`` for one page of a listing section.
+
+    First pages at the default size come from the snapshot; later pages
+    are read with a keyset query.
+    """
+    spec = SECTIONS[section]
+    default_limit = section_limit(section)
+    if not after and limit in (None, default_limit):
+        snapshot = get_catalog_snapshot()
+        return snapshot[spec["context"]], snapshot[spec["context"] + "_after"]
+
+    queryset = EBooksModel.objects.all()
+    if "category" in spec:
+        queryset = queryset.filter(category=spec["category"])
+    return paginate(queryset, spec["ordering"], after, limit or default_limit)
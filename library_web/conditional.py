@@ -0,0 +1,155 @@
+"""Conditional GETs for catalog pages: ETag, Last-Modified and Cache-Control.
+
+``conditional_page`` asks a cheap state function for a page's validators
+before the view runs, and answers a matching ``If-None-Match`` or
+``If-Modified-Since`` with a 304 without rendering anything. Pages built
+from the whole catalog take their state from the shared catalog
+generation, and single-book pages from the book's ``version`` and
+``updated_at``; all of them move on every write to a book.
+
+Pages differ per viewer (navigation, admin buttons), so the ETag includes
+the user, ``Last-Modified`` is only sent to anonymous visitors, and shared
+caches may only keep anonymous responses.
+"""
+# pylint: disable=no-member
+
+import asyncio
+import hashlib
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from library_web.catalog import catalog_version
+from library_web.models import EBooksModel
+
+DEFAULT_ANONYMOUS_MAX_AGE = 60
+
+
+def catalog_state(_request, *_args, **_kwargs):
+    """Return ``(seed, last_modified)`` for pages built from the whole catalog.
+
+    Every change to a book, deletes included, bumps the catalog generation,
+    so the validators are one primary-key lookup on the shared state row
+    and agree across workers.
+    """
+    generation, changed_at = catalog_version()
+    return str(generation), changed_at
+
+
+async def acatalog_state(request, *args, **kwargs):
+    """``catalog_state`` for async views."""
+    return await sync_to_async(catalog_state)(request, *args, **kwargs)
+
+
+def book_state(_request, book_id):
+    """Return ``(seed, last_modified)`` for one book, or None if it is missing."""
+    row = EBooksModel.objects.filter(pk=book_id).values_list("version", "updated_at").first()
+    if row is None:
+        return None
+    return str(row[0]), row[1]
+
+
+async def abook_state(_request, book_id):
+    """``book_state`` for async views."""
+    row = await EBooksModel.objects.filter(pk=book_id).values_list("version", "updated_at").afirst()
+    if row is None:
+        return None
+    return str(row[0]), row[1]
+
+
+def page_etag(request, seed, last_modified):
+    """Return the weak ETag of the page ``request`` asks for."""
+    parts = [seed, last_modified.isoformat() if last_modified else "", str(request.user.pk or 0),
+             request.get_full_path()]
+    digest = hashlib.md5("|".join(parts).encode(), usedforsecurity=False).hexdigest()
+    return "W/" + quote_etag(digest)
+
+
+def set_cache_policy(request, response):
+    """Let shared caches keep anonymous pages; keep the rest private."""
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        max_age = getattr(settings, "LIBRARY_ANONYMOUS_MAX_AGE", DEFAULT_ANONYMOUS_MAX_AGE)
+        patch_cache_control(response, public=True, max_age=max_age)
+    patch_vary_headers(response, ("Cookie",))
+
+
+def resolve_validators(request, state):
+    """Return ``(etag, last_modified timestamp or None)`` for a page state."""
+    seed, last_modified = state
+    etag = page_etag(request, seed, last_modified)
+    timestamp = None
+    if last_modified is not None and not request.user.is_authenticated:
+        timestamp = int(last_modified.timestamp())
+    return etag, timestamp
+
+
+def finish_response(request, response, etag, timestamp):
+    """Add the validators and cache policy to a 200 or 304 response."""
+    response.headers.setdefault("ETag", etag)
+    if timestamp is not None:
+        response.headers.setdefault("Last-Modified", http_date(timestamp))
+    set_cache_policy(request, response)
+    return response
+
+
+async def aload_user(request):
+    """Load the lazy ``request.user`` in a thread, as async code may not query.
+
+    Later ``request.user`` lookups in the request reuse the loaded user.
+    """
+    await sync_to_async(getattr)(request.user, "pk")
+
+
+def conditional_page(state_func):
+    """Answer conditional GETs for a view from ``state_func(request, *args)``.
+
+    Async views need an async ``state_func`` such as ``acatalog_state``.
+    """
+    def decorator(view_func):
+        if asyncio.iscoroutinefunction(view_func):
+            return _async_conditional(view_func, state_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view_func(request, *args, **kwargs)
+            state = state_func(request, *args, **kwargs)
+            if state is None:
+                # Let the view produce its own 404.
+                return view_func(request, *args, **kwargs)
+
+            etag, timestamp = resolve_validators(request, state)
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            return finish_response(request, response, etag, timestamp)
+        return wrapper
+    return decorator
+
+
+def _async_conditional(view_func, state_func):
+    """``conditional_page`` for an async view."""
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return await view_func(request, *args, **kwargs)
+        await aload_user(request)
+        state = await state_func(request, *args, **kwargs)
+        if state is None:
+            return await view_func(request, *args, **kwargs)
+
+        etag, timestamp = resolve_validators(request, state)
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = await view_func(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        return finish_response(request, response, etag, timestamp)
+    return wrapper
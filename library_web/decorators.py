@@ -1,6 +1,8 @@
 """Custom decorators for access control in the library_web app"""
 
-from django.http import HttpResponse
+from functools import wraps
+
+from django.http import HttpResponse, HttpResponseNotAllowed
 from django.shortcuts import redirect
 
 def unauthenticated_user(view_func):
@@ -25,3 +27,14 @@ def allowed_users(allowed_roles=None):
             return HttpResponse("You are not authorised to view this page")
         return wrapper_func
     return decorator
+
+def async_require_http_methods(allowed_methods):
+    """``require_http_methods`` for async views, which Django 4.2's cannot wrap."""
+    def decorator(view_func):
+        @wraps(view_func)
+        async def wrapper_func(request, *args, **kwargs):
+            if request.method not in allowed_methods:
+                return HttpResponseNotAllowed(allowed_methods)
+            return await view_func(request, *args, **kwargs)
+        return wrapper_func
+    return decorator
@@ -0,0 +1,103 @@
+"""Streaming CSV and JSONL exports of the catalog and loan history.
+
+Rows are read with ``.values_list().iterator(chunk_size=...)`` and encoded
+one at a time, optionally through an incremental gzip compressor, so an
+export holds at most one database chunk and one output buffer in memory
+whatever the size of the table. The same generators back the ``export``
+view and the ``export`` management command.
+"""
+# pylint: disable=no-member
+
+import csv
+import zlib
+from datetime import date
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from library_web.api import BOOK_FIELDS, RECORD_FIELDS
+from library_web.models import BorrowRecord, EBooksModel
+
+# Rows fetched from the database per round trip.
+EXPORT_CHUNK_SIZE = 2000
+# Compressed output is flushed in blocks of about this many bytes.
+GZIP_BLOCK_SIZE = 64 * 1024
+
+DATASETS = {
+    "books": (EBooksModel, BOOK_FIELDS, "updated_at__date"),
+    "loans": (BorrowRecord, RECORD_FIELDS, "borrow_date"),
+}
+FORMATS = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+}
+
+
+class _Line:
+    """File-like object whose ``write`` returns what it was given."""
+
+    def write(self, value):
+        """Return ``value`` so csv.writer rows can be yielded directly."""
+        return value
+
+
+def export_queryset(dataset, since=None, until=None):
+    """Return the export rows of ``dataset``, optionally bounded by date."""
+    model, fields, date_field = DATASETS[dataset]
+    queryset = model.objects.order_by("id")
+    if since:
+        queryset = queryset.filter(**{f"{date_field}__gte": since})
+    if until:
+        queryset = queryset.filter(**{f"{date_field}__lt": until})
+    return queryset.values_list(*fields)
+
+
+def csv_lines(fields, rows):
+    """Yield a header line, then one CSV line per row."""
+    writer = csv.writer(_Line())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def jsonl_lines(fields, rows):
+    """Yield one JSON object per row, newline-terminated."""
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(dict(zip(fields, row))) + "\n"
+
+
+def gzip_blocks(chunks):
+    """Gzip a stream of byte strings incrementally, in GZIP_BLOCK_SIZE blocks."""
+    compressor = zlib.compressobj(wbits=31)  # 31: gzip header and trailer
+    pending = []
+    size = 0
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            pending.append(compressed)
+            size += len(compressed)
+        if size >= GZIP_BLOCK_SIZE:
+            yield b"".join(pending)
+            pending, size = [], 0
+    pending.append(compressor.flush())
+    yield b"".join(pending)
+
+
+def export_stream(dataset, fmt="csv", compress=False, since=None, until=None):
+    """Return an iterator of encoded bytes for the whole export."""
+    fields = DATASETS[dataset][1]
+    rows = export_queryset(dataset, since, until).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    lines = csv_lines(fields, rows) if fmt == "csv" else jsonl_lines(fields, rows)
+    encoded = (line.encode() for line in lines)
+    return gzip_blocks(encoded) if compress else encoded
+
+
+def export_filename(dataset, fmt, compress):
+    """Return the download name, e.g. ``loans-20260101.csv.gz``."""
+    name = f"{dataset}-{date.today():%Y%m%d}.{fmt}"
+    return name + ".gz" if compress else name
+
+
+def parse_date(value):
+    """Parse an optional ISO date, raising ValueError on bad input."""
+    return date.fromisoformat(value) if value else None
@@ -71,6 +71,19 @@ class EBooksForm(forms.ModelForm):
         ),
     )
 
+    extra_copies = forms.IntegerField(
+        min_value=0,
+        max_value=100,
+        required=False,
+        label="Additional copies",
+        widget=forms.NumberInput(
+            attrs={
+                "class": "form-control",
+                "placeholder": "Copies to add (0–100)"
+            }
+        ),
+    )
+
     class Meta:
         """Metadata for EBooksForm."""
         model = EBooksModel
@@ -111,7 +124,16 @@ class EBooksForm(forms.ModelForm):
 
         # Required fields logic
         for name, field in self.fields.items():
-            field.required = name not in ["publisher"]
+            field.required = name not in ["publisher", "extra_copies"]
+
+
+class EBooksImportForm(EBooksForm):
+    """Validate one imported catalog row with the EBooksForm rules.
+
+    The cover is given as a storage path instead of an upload, and the file
+    is not opened during the import.
+    """
+    image = forms.CharField(max_length=100)
 
 
 class BorrowForm(forms.ModelForm):
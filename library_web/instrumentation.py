@@ -0,0 +1,217 @@
+"""Opt-in per-request timing: Server-Timing headers, log lines and /metrics.
+
+``RequestMetricsMiddleware`` times the whole request, wraps every
+database connection (the primary and any replicas) to count queries and
+their time, and reads the template render time collected by
+``TimedDjangoTemplates``. Each request gets a ``Server-Timing`` header and
+one JSON line on the ``library_web.requests`` logger, and is added to
+in-process histograms per URL name that the ``metrics`` view serves in the
+Prometheus text format to staff users and to scrapers presenting
+``LIBRARY_METRICS_TOKEN``.
+"""
+
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+from django.utils.crypto import constant_time_compare
+
+logger = logging.getLogger("library_web.requests")
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current = ContextVar("library_web_request_metrics", default=None)
+
+
+class RequestMetrics:
+    """Timings collected while serving one request."""
+
+    __slots__ = ("queries", "db_time", "template_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+
+
+class MetricsRegistry:
+    """Cumulative Prometheus-style histograms keyed by URL name.
+
+    Counters only ever grow, as Prometheus expects; windows such as "the
+    last five minutes" come from ``rate()`` on the scraping side.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def observe(self, view, duration, metrics):
+        """Record one request to ``view`` that took ``duration`` seconds."""
+        with self._lock:
+            stats = self._views.get(view)
+            if stats is None:
+                stats = self._views[view] = {
+                    "buckets": [0] * (len(BUCKETS) + 1),
+                    "count": 0, "sum": 0.0, "queries": 0, "db": 0.0, "template": 0.0,
+                }
+            stats["buckets"][bisect_left(BUCKETS, duration)] += 1
+            stats["count"] += 1
+            stats["sum"] += duration
+            stats["queries"] += metrics.queries
+            stats["db"] += metrics.db_time
+            stats["template"] += metrics.template_time
+
+    def reset(self):
+        """Forget every observation."""
+        with self._lock:
+            self._views.clear()
+
+    def render(self):
+        """Return all histograms in the Prometheus text exposition format."""
+        with self._lock:
+            views = {view: dict(stats, buckets=list(stats["buckets"]))
+                     for view, stats in self._views.items()}
+
+        lines = [
+            "# HELP library_request_duration_seconds Request latency by URL name.",
+            "# TYPE library_request_duration_seconds histogram",
+        ]
+        for view, stats in sorted(views.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), stats["buckets"]):
+                cumulative += count
+                lines.append(
+                    f'library_request_duration_seconds_bucket{{view="{view}",le="{bound}"}} {cumulative}'
+                )
+            lines.append(f'library_request_duration_seconds_sum{{view="{view}"}} {stats["sum"]:.6f}')
+            lines.append(f'library_request_duration_seconds_count{{view="{view}"}} {stats["count"]}')
+
+        for name, key, kind, help_text in (
+            ("library_request_db_queries_total", "queries", "counter", "Database queries run."),
+            ("library_request_db_seconds_total", "db", "counter", "Time spent in database queries."),
+            ("library_request_template_seconds_total", "template", "counter",
+             "Time spent rendering templates."),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for view, stats in sorted(views.items()):
+                value = stats[key] if key == "queries" else f"{stats[key]:.6f}"
+                lines.append(f'{name}{{view="{view}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def metrics_allowed(request):
+    """Return whether ``request`` may read the metrics.
+
+    Scrapers send ``Authorization: Bearer <LIBRARY_METRICS_TOKEN>``; staff
+    users may also read them from a logged-in session.
+    """
+    token = getattr(settings, "LIBRARY_METRICS_TOKEN", "")
+    header = request.headers.get("Authorization", "")
+    if token and constant_time_compare(header, f"Bearer {token}"):
+        return True
+    return request.user.is_authenticated and request.user.is_staff
+
+
+def _view_name(request):
+    """Return the URL name the request resolved to, or a placeholder."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    return match.view_name or match.func.__name__
+
+
+class RequestMetricsMiddleware:
+    """Time requests, their queries and their templates."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as wrappers:
+                for conn in connections.all():
+                    wrappers.enter_context(conn.execute_wrapper(self._time_query))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - start
+
+        view = _view_name(request)
+        registry.observe(view, total, metrics)
+        response["Server-Timing"] = (
+            f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries", '
+            f"tpl;dur={metrics.template_time * 1000:.1f}, "
+            f"total;dur={total * 1000:.1f}"
+        )
+        logger.info(json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "view": view,
+            "status": response.status_code,
+            "queries": metrics.queries,
+            "db_ms": round(metrics.db_time * 1000, 2),
+            "template_ms": round(metrics.template_time * 1000, 2),
+            "total_ms": round(total * 1000, 2),
+        }))
+        return response
+
+    @staticmethod
+    def _time_query(execute, sql, params, many, context):
+        metrics = _current.get()
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if metrics is not None:
+                metrics.queries += 1
+                metrics.db_time += time.perf_counter() - start
+
+
+class TimedTemplate:
+    """Template wrapper adding its render time to the current request."""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        """Render the wrapped template, timing it if a request is measured."""
+        metrics = _current.get()
+        if metrics is None:
+            return self.template.render(context, request)
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, with render times reported to the middleware.
+
+    Only top-level templates are wrapped, so ``{% include %}`` time is
+    counted once as part of its parent.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
@@ -0,0 +1,164 @@
+"""Durable background jobs stored in the ``Job`` table.
+
+Views enqueue slow work, such as rendering thumbnails or deleting files from
+storage, and return as soon as the row is committed. ``manage.py run_worker``
+claims due jobs with a conditional ``UPDATE``, so several worker processes
+never run the same job, and retries failures with exponential backoff.
+Enqueueing is idempotent: a job whose key already exists is not added again.
+Tasks registered with ``release_key=True`` give their key up once they
+succeed, for work that may legitimately repeat with the same key.
+"""
+# pylint: disable=no-member
+
+import hashlib
+import logging
+import traceback
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.db.models import F, Q
+from django.utils import timezone
+
+from library_web.models import EBooksModel, Job
+from library_web.thumbnails import generate_thumbnails
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+# Tasks whose idempotency key is released when a job succeeds.
+RELEASED_KEYS = set()
+# A running job whose worker died is handed out again after this long.
+LEASE = timedelta(minutes=10)
+BACKOFF_SECONDS = 30
+CLAIM_BATCH = 10
+
+
+def task(name, release_key=False):
+    """Register the decorated function as the handler for jobs named ``name``.
+
+    With ``release_key`` a finished job keeps its row but frees its key, so
+    the same key can be queued again.
+    """
+    def register(func):
+        TASKS[name] = func
+        if release_key:
+            RELEASED_KEYS.add(name)
+        return func
+    return register
+
+
+def enqueue(name, key, **payload):
+    """Queue ``name(**payload)`` unless a job with ``key`` already exists."""
+    Job.objects.bulk_create(
+        [Job(task=name, idempotency_key=key, payload=payload)], ignore_conflicts=True
+    )
+
+
+def _claimable(now):
+    return Q(status=Job.PENDING, run_after__lte=now) | Q(
+        status=Job.RUNNING, locked_at__lt=now - LEASE, attempts__lt=F("max_attempts")
+    )
+
+
+def _fail_abandoned(now):
+    """Give up on running jobs whose worker died during their last attempt.
+
+    A job that kills its worker, e.g. by running out of memory, would
+    otherwise be handed out again every ``LEASE`` forever.
+    """
+    Job.objects.filter(
+        status=Job.RUNNING, locked_at__lt=now - LEASE, attempts__gte=F("max_attempts")
+    ).update(status=Job.FAILED, locked_at=None, last_error="Worker lost on the last attempt")
+
+
+def claim_next():
+    """Mark the next due job as running and return it, or ``None``."""
+    now = timezone.now()
+    _fail_abandoned(now)
+    due = Job.objects.filter(_claimable(now)).order_by("run_after", "id")
+    for job_id in due.values_list("id", flat=True)[:CLAIM_BATCH]:
+        # Another worker may have claimed it since the SELECT; only one
+        # conditional update can succeed.
+        claimed = Job.objects.filter(_claimable(now), pk=job_id).update(
+            status=Job.RUNNING, locked_at=now, attempts=F("attempts") + 1
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def run_job(job):
+    """Run one claimed job and record the outcome. Returns True on success."""
+    try:
+        handler = TASKS.get(job.task)
+        if handler is None:
+            raise LookupError(f"Unknown task {job.task!r}")
+        handler(**job.payload)
+    except Exception:  # pylint: disable=broad-exception-caught
+        logger.exception("Job %s (%s) failed", job.pk, job.task)
+        retry_at = timezone.now() + timedelta(seconds=BACKOFF_SECONDS * 2 ** (job.attempts - 1))
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.FAILED if job.attempts >= job.max_attempts else Job.PENDING,
+            run_after=retry_at,
+            locked_at=None,
+            last_error=traceback.format_exc(),
+        )
+        return False
+
+    done = {"status": Job.DONE, "locked_at": None, "last_error": ""}
+    if job.task in RELEASED_KEYS:
+        done["idempotency_key"] = f"{job.idempotency_key}#done:{job.pk}"
+    Job.objects.filter(pk=job.pk).update(**done)
+    return True
+
+
+def run_pending():
+    """Run due jobs until none are left. Returns the number run."""
+    count = 0
+    job = claim_next()
+    while job is not None:
+        run_job(job)
+        count += 1
+        job = claim_next()
+    return count
+
+
+@task("thumbnails")
+def render_thumbnails(book_id, image):
+    """Render cover renditions for one upload."""
+    book = EBooksModel.objects.filter(pk=book_id).first()
+    if book is None or book.image.name != image:
+        # Deleted, or superseded by a newer upload with its own job.
+        return
+    generate_thumbnails(book)
+
+
+@task("delete_files", release_key=True)
+def delete_files(names):
+    """Delete files from storage; missing files are ignored.
+
+    Storage hands freed names out again, so a later upload may need the
+    same set of names deleted; the key is released once this job is done.
+    """
+    for name in names:
+        default_storage.delete(name)
+
+
+def enqueue_thumbnails(book):
+    """Queue rendering of ``book``'s current cover.
+
+    The key carries the book's version: an upload can reuse the name of a
+    deleted earlier cover, and must still get its own job.
+    """
+    enqueue(
+        "thumbnails", f"thumbnails:{book.pk}:{book.version}:{book.image.name}",
+        book_id=book.pk, image=book.image.name,
+    )
+
+
+def enqueue_file_cleanup(names):
+    """Queue deletion of the storage files in ``names``."""
+    names = sorted(name for name in names if name)
+    if names:
+        digest = hashlib.sha256("\n".join(names).encode()).hexdigest()
+        enqueue("delete_files", f"delete_files:{digest}", names=names)
@@ -0,0 +1,380 @@
+"""Borrow and return operations that are safe under concurrent workers."""
+# pylint: disable=no-member
+
+from datetime import date, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    Case, Count, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce, Least
+from django.db.models.lookups import Exact
+from django.utils import timezone
+
+from library_web.catalog import invalidate_catalog
+from library_web.models import BookCopy, BorrowRecord, EBooksModel, Hold, LoanSummary, SweepState
+from library_web.pagination import keyset_filter
+
+LATE_FEE_PER_DAY = 8
+# Largest fee BorrowRecord.late_fee (max_digits=6, decimal_places=2) can hold.
+MAX_LATE_FEE = 9999
+SWEEP_CHUNK_SIZE = 1000
+DRIFT_CHUNK_SIZE = 1000
+
+
+class LoanError(Exception):
+    """Base class for borrow and return failures."""
+
+
+class BookUnavailable(LoanError):
+    """Raised when a book is already out on loan."""
+
+
+class NoActiveLoan(LoanError):
+    """Raised when a book has no open borrow record to close."""
+
+
+def late_fee(return_date, returned_on):
+    """Return the fee owed for returning a book on ``returned_on``."""
+    if return_date is None or returned_on <= return_date:
+        return 0
+    return min((returned_on - return_date).days * LATE_FEE_PER_DAY, MAX_LATE_FEE)
+
+
+def _update_summary(user_id, **deltas):
+    """Add ``deltas`` to the user's LoanSummary row, creating it if needed."""
+    if user_id is None:
+        return
+    changes = {field: F(field) + delta for field, delta in deltas.items()}
+    summary = LoanSummary.objects.filter(user_id=user_id)
+    if not summary.update(**changes):
+        LoanSummary.objects.get_or_create(user_id=user_id)
+        summary.update(**changes)
+
+
+def loan_summary(user):
+    """Return the user's LoanSummary, or an empty one if they never borrowed."""
+    return LoanSummary.objects.filter(user=user).first() or LoanSummary(user=user)
+
+
+def _claim_copy(book):
+    """Take one copy of ``book`` off the shelf inside the caller's transaction.
+
+    The counter is claimed with a conditional ``UPDATE ... WHERE
+    available_copies > 0``, which also locks the book row until commit, so
+    no concurrent borrower can pick the same free copy afterwards. Returns
+    the id of the claimed copy.
+    """
+    claimed = EBooksModel.objects.filter(pk=book.pk, available_copies__gt=0).update(
+        available_copies=F("available_copies") - 1,
+        # Right-hand sides see the row before the update.
+        is_borrowed=Case(When(available_copies__lte=1, then=Value(True)), default=Value(False)),
+        borrow_count=F("borrow_count") + 1,
+        version=F("version") + 1,
+        updated_at=timezone.now(),
+    )
+    # Any free copy will do; unordered, it is the first entry of copy_free_idx.
+    free = BookCopy.objects.filter(book=book, active_loan__isnull=True).values_list("pk", flat=True)
+    copy_ids = list(free[:1]) if claimed else []
+    if not copy_ids:
+        raise BookUnavailable(book.pk)
+    return copy_ids[0]
+
+
+def _lend(copy_id, record):
+    """Save the unsaved ``record`` as the open loan of the copy ``copy_id``."""
+    record.copy_id = copy_id
+    record.save()
+    BookCopy.objects.filter(pk=copy_id).update(active_loan=record)
+
+
+def _holds_waiting(book):
+    """Return whether anyone is queued for ``book``."""
+    return Hold.objects.filter(book=book, fulfilled_at__isnull=True).exists()
+
+
+def borrow(book, record):
+    """Lend a free copy of ``book`` through the unsaved ``record``.
+
+    Raises BookUnavailable when every copy is out, or when older holds are
+    still waiting for one; the partial unique constraint on open records
+    per copy backs the claim up at the database level.
+    """
+    try:
+        with transaction.atomic():
+            copy_id = _claim_copy(book)
+            # Checked under the claim's row lock, so no return can hand a
+            # copy to the queue in between; the claim rolls back on raise.
+            if _holds_waiting(book):
+                raise BookUnavailable(book.pk)
+            record.book = book
+            _lend(copy_id, record)
+            _update_summary(record.user_id, open_loans=1, total_loans=1)
+            invalidate_catalog(book.pk)
+    except IntegrityError as exc:
+        raise BookUnavailable(book.pk) from exc
+
+    book.available_copies -= 1
+    book.is_borrowed = book.available_copies == 0
+    book.borrow_count += 1
+    book.version += 1
+    return record
+
+
+def borrow_or_hold(book, record):
+    """Borrow ``book`` for the unsaved ``record``, or join its hold queue.
+
+    Returns the saved BorrowRecord, or the user's waiting Hold when every
+    copy is out or others are already queued; the hold turns into a loan of the next returned copy.
+    """
+    with transaction.atomic():
+        # Locked so a return cannot free a copy between the check and the hold.
+        available = EBooksModel.objects.select_for_update().filter(pk=book.pk).values_list(
+            "available_copies", flat=True
+        ).get()
+        if available and not _holds_waiting(book):
+            return borrow(book, record)
+
+        # unique_waiting_hold allows one waiting hold per user and book.
+        hold, _ = Hold.objects.get_or_create(
+            book=book, user=record.user, fulfilled_at=None,
+            defaults={
+                "student_id": record.student_id,
+                "loan_days": max(1, (record.return_date - record.borrow_date).days),
+            },
+        )
+    return hold
+
+
+def hold_position(hold):
+    """Return ``hold``'s 1-based place in its book's queue."""
+    return Hold.objects.filter(book_id=hold.book_id, fulfilled_at__isnull=True, id__lte=hold.pk).count()
+
+
+def _fulfil_hold(book, copy_id, hold, today):
+    """Lend the copy ``copy_id`` to the holder of ``hold``; returns the new loan."""
+    loan = BorrowRecord(
+        book=book, user_id=hold.user_id, student_id=hold.student_id,
+        borrow_date=today, return_date=today + timedelta(days=hold.loan_days),
+    )
+    _lend(copy_id, loan)
+    Hold.objects.filter(pk=hold.pk).update(loan=loan, fulfilled_at=timezone.now())
+    EBooksModel.objects.filter(pk=book.pk).update(
+        borrow_count=F("borrow_count") + 1, version=F("version") + 1, updated_at=timezone.now()
+    )
+    _update_summary(hold.user_id, open_loans=1, total_loans=1)
+    return loan
+
+
+def return_book(book, returned_on=None, user=None):
+    """Close an open borrow record for ``book`` and pass the copy on.
+
+    ``user``'s own loan is closed if they have one, otherwise the oldest.
+    The copy goes to the head of the hold queue if anyone is waiting, and
+    back on the shelf otherwise; either way the work is a fixed number of
+    indexed statements, however long the queue.
+    """
+    returned_on = returned_on or date.today()
+
+    with transaction.atomic():
+        # Locked before the loans and the queue are read, so a concurrent
+        # borrow or hold waits until this copy has been passed on.
+        EBooksModel.objects.select_for_update().get(pk=book.pk)
+        # At most copy_count rows, so they are picked from in Python; the
+        # conditional UPDATE below settles races with concurrent returns.
+        open_loans = sorted(
+            BorrowRecord.objects.filter(book=book, actual_return_date__isnull=True).order_by(),
+            key=lambda loan: (user is None or loan.user_id != user.pk, loan.pk),
+        )
+        if not open_loans:
+            raise NoActiveLoan(book.pk)
+        record = open_loans[0]
+
+        fee = late_fee(record.return_date, returned_on)
+        closed = BorrowRecord.objects.filter(
+            pk=record.pk, actual_return_date__isnull=True
+        ).update(actual_return_date=returned_on, late_fee=fee)
+        if not closed:
+            raise NoActiveLoan(book.pk)
+        _update_summary(record.user_id, open_loans=-1, fees_charged=fee)
+
+        hold = None
+        if record.copy_id is not None:
+            hold = Hold.objects.select_for_update().filter(
+                book=book, fulfilled_at__isnull=True
+            ).order_by("id").first()
+        if hold is not None:
+            _fulfil_hold(book, record.copy_id, hold, returned_on)
+        else:
+            BookCopy.objects.filter(pk=record.copy_id).update(active_loan=None)
+            EBooksModel.objects.filter(pk=book.pk).update(
+                # Loans without a copy predate copies; never exceed the shelf.
+                available_copies=Least(F("available_copies") + 1, F("copy_count")),
+                is_borrowed=False, version=F("version") + 1, updated_at=timezone.now(),
+            )
+        invalidate_catalog(book.pk)
+
+    record.actual_return_date = returned_on
+    record.late_fee = fee
+    if hold is not None:
+        book.borrow_count += 1
+    else:
+        book.available_copies = min(book.available_copies + 1, book.copy_count)
+        book.is_borrowed = False
+    book.version += 1
+    return record
+
+
+def add_copies(book, count):
+    """Add ``count`` copies of ``book``, serving waiting holds first."""
+    with transaction.atomic():
+        number = EBooksModel.objects.select_for_update().filter(pk=book.pk).values_list(
+            "copy_count", flat=True
+        ).get()
+        copies = BookCopy.objects.bulk_create(
+            BookCopy(book=book, number=number + n) for n in range(1, count + 1)
+        )
+        holds = list(
+            Hold.objects.select_for_update().filter(book=book, fulfilled_at__isnull=True)
+            .order_by("id")[:count]
+        )
+        today = date.today()
+        for copy, hold in zip(copies, holds):
+            _fulfil_hold(book, copy.pk, hold, today)
+        shelved = count - len(holds)
+        changes = {"copy_count": F("copy_count") + count}
+        if shelved:
+            changes.update(available_copies=F("available_copies") + shelved, is_borrowed=False)
+        EBooksModel.objects.filter(pk=book.pk).update(
+            version=F("version") + 1, updated_at=timezone.now(), **changes
+        )
+        invalidate_catalog(book.pk)
+    book.refresh_from_db(fields=["copy_count", "available_copies", "is_borrowed", "version"])
+
+
+def _mismatch(pointer, expected):
+    """Return a Q for rows where two nullable id columns differ."""
+    return (
+        Q(**{f"{pointer}__isnull": True}, **{f"{expected}__isnull": False})
+        | Q(**{f"{pointer}__isnull": False}, **{f"{expected}__isnull": True})
+        | Q(**{f"{pointer}__lt": F(expected)})
+        | Q(**{f"{pointer}__gt": F(expected)})
+    )
+
+
+def drifted_copies():
+    """Return copies whose ``active_loan`` is not their open borrow record."""
+    open_loan = BorrowRecord.objects.filter(copy=OuterRef("pk"), actual_return_date__isnull=True)
+    return BookCopy.objects.annotate(open_loan=Subquery(open_loan.values("pk")[:1])).filter(
+        _mismatch("active_loan", "open_loan")
+    )
+
+
+def _copy_count(free=False):
+    """Return a subquery counting the outer book's copies, or only its free ones.
+
+    The free copies are counted with a filtered aggregate over the book's
+    copies: a lookup on ``active_loan IS NULL`` would walk every free copy
+    in the library through the one-to-one index.
+    """
+    copies = BookCopy.objects.filter(book=OuterRef("pk")).order_by().values("book")
+    count = Count("pk", filter=Q(active_loan__isnull=True)) if free else Count("pk")
+    return Coalesce(Subquery(copies.annotate(n=count).values("n")), 0)
+
+
+def drifted_books():
+    """Return books whose counters or ``is_borrowed`` disagree with their copies."""
+    books = EBooksModel.objects.annotate(
+        total=_copy_count(), free=_copy_count(free=True)
+    )
+    return books.filter(
+        Q(copy_count__lt=F("total")) | Q(copy_count__gt=F("total"))
+        | Q(available_copies__lt=F("free")) | Q(available_copies__gt=F("free"))
+        | Q(is_borrowed=True, free__gt=0) | Q(is_borrowed=False, free=0)
+    )
+
+
+def _repair_chunks(queryset, chunk_size, **changes):
+    """Apply ``changes`` to ``queryset``'s rows in primary-key chunks; return the count."""
+    repaired, last_pk = 0, 0
+    while True:
+        ids = list(
+            queryset.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True)[:chunk_size]
+        )
+        if not ids:
+            return repaired
+        with transaction.atomic():
+            repaired += queryset.model.objects.filter(pk__in=ids).update(**changes)
+        last_pk = ids[-1]
+
+
+def repair_drift(chunk_size=DRIFT_CHUNK_SIZE):
+    """Recompute copy pointers, then book counters, wherever they drifted.
+
+    Open borrow records are the source of truth for copies, and copies for
+    books. Each chunk of drifted rows is fixed by one ``UPDATE``. Returns
+    ``(copies repaired, books repaired)``.
+    """
+    open_loan = BorrowRecord.objects.filter(copy=OuterRef("pk"), actual_return_date__isnull=True)
+    copies = _repair_chunks(
+        drifted_copies(), chunk_size, active_loan=Subquery(open_loan.values("pk")[:1])
+    )
+    free = _copy_count(free=True)
+    books = _repair_chunks(
+        drifted_books(), chunk_size,
+        copy_count=_copy_count(), available_copies=free, is_borrowed=Exact(free, 0),
+        version=F("version") + 1, updated_at=timezone.now(),
+    )
+    if books:
+        invalidate_catalog()
+    return copies, books
+
+
+def sweep_overdue(today=None, chunk_size=SWEEP_CHUNK_SIZE):
+    """Materialize the fees accrued so far on open, overdue loans.
+
+    Open records are walked in (return_date, id) order on the partial
+    ``borrow_open_due_idx`` index, and each chunk is priced by one
+    ``UPDATE ... SET late_fee = CASE return_date ...``. The position is
+    saved with every chunk, so an interrupted sweep resumes where it
+    stopped and a repeated run on the same day does nothing.
+    Returns the number of records updated.
+    """
+    today = today or date.today()
+    state, _ = SweepState.objects.get_or_create(name="overdue")
+    if state.as_of != today:
+        state.as_of, state.last_due, state.last_id, state.completed = today, None, None, False
+        state.save()
+
+    overdue = BorrowRecord.objects.filter(
+        actual_return_date__isnull=True, return_date__lt=today
+    ).order_by("return_date", "id")
+    updated = 0
+    while not state.completed:
+        chunk = overdue
+        if state.last_id is not None:
+            chunk = chunk.filter(keyset_filter("due", (state.last_due, state.last_id), BorrowRecord))
+        rows = list(chunk.values_list("id", "return_date")[:chunk_size])
+
+        with transaction.atomic():
+            if rows:
+                fees = {due: late_fee(due, today) for due in {row[1] for row in rows}}
+                updated += BorrowRecord.objects.filter(
+                    pk__in=[row[0] for row in rows], actual_return_date__isnull=True
+                ).update(late_fee=Case(
+                    *(When(return_date=due, then=Value(fee)) for due, fee in fees.items()),
+                    default=F("late_fee"),
+                    output_field=DecimalField(max_digits=6, decimal_places=2),
+                ))
+                state.last_id, state.last_due = rows[-1]
+            state.completed = len(rows) < chunk_size
+            state.save()
+    return updated
+
+
+def outstanding_fees():
+    """Return the total fee accrued on open loans as of the last sweep."""
+    total = BorrowRecord.objects.filter(actual_return_date__isnull=True).aggregate(
+        total=Sum("late_fee")
+    )["total"]
+    return total or 0
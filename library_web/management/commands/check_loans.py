@@ -0,0 +1,38 @@
+"""Find and repair drift between copies, books and their open borrow records."""
+
+from django.core.management.base import BaseCommand
+
+from library_web.loans import DRIFT_CHUNK_SIZE, drifted_books, drifted_copies, repair_drift
+
+SAMPLE_SIZE = 20
+
+
+class Command(BaseCommand):
+    help = (
+        "Report copies whose active_loan disagrees with their open borrow record "
+        "and books whose copy counters disagree with their copies, and fix them "
+        "with --repair."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repair", action="store_true", help="fix the drifted rows")
+        parser.add_argument("--chunk-size", type=int, default=DRIFT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options["repair"]:
+            copies, books = repair_drift(chunk_size=max(1, options["chunk_size"]))
+            self.stdout.write(self.style.SUCCESS(f"Repaired {copies} copies and {books} books"))
+            return
+
+        found = False
+        for label, queryset in (("copies", drifted_copies()), ("books", drifted_books())):
+            sample = list(queryset.order_by("pk").values_list("pk", flat=True)[:SAMPLE_SIZE])
+            if sample:
+                found = True
+                self.stdout.write(self.style.WARNING(
+                    f"{queryset.count()} drifted {label}, e.g. ids {', '.join(map(str, sample))}"
+                ))
+        if found:
+            self.stdout.write(self.style.WARNING("Run with --repair to fix them"))
+        else:
+            self.stdout.write(self.style.SUCCESS("No drift found"))
@@ -0,0 +1,35 @@
+"""Backfill responsive cover renditions."""
+# pylint: disable=no-member
+
+from django.core.management.base import BaseCommand
+
+from library_web.models import EBooksModel
+from library_web.thumbnails import generate_thumbnails
+
+
+class Command(BaseCommand):
+    help = "Render cover thumbnails for books that do not have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all", action="store_true",
+            help="re-render every book, e.g. after changing LIBRARY_THUMBNAIL_WIDTHS",
+        )
+
+    def handle(self, *args, **options):
+        books = EBooksModel.objects.only("id", "image", "thumbnails", "version").order_by("id")
+        if not options["all"]:
+            books = books.filter(thumbnails=[])
+
+        done = failed = 0
+        for book in books.iterator(chunk_size=200):
+            try:
+                generate_thumbnails(book)
+            except (OSError, ValueError) as exc:
+                # Missing or unreadable originals are reported, not fatal.
+                failed += 1
+                self.stderr.write(f"book {book.pk} ({book.image.name}): {exc}")
+                continue
+            done += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered thumbnails for {done} books, {failed} failed"))
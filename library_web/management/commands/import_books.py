@@ -0,0 +1,136 @@
+"""Bulk-import books from a CSV or JSONL file."""
+# pylint: disable=no-member
+
+import csv
+import json
+import os
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from library_web.catalog import bump_state, invalidate_catalog
+from library_web.forms import EBooksImportForm
+from library_web.book_ids import allocate_book_ids
+from library_web.models import EBooksModel, ImportState, create_copies
+from library_web.search import get_search_backend
+from library_web.suggest import SUGGEST_STATE
+
+
+def read_records(path, fmt):
+    """Yield ``(line_number, row)`` pairs from the file one at a time."""
+    with open(path, newline="", encoding="utf-8") as handle:
+        if fmt == "csv":
+            reader = csv.DictReader(handle)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(handle, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except json.JSONDecodeError:
+                    yield line_number, None
+
+
+def load_checkpoint(name, source):
+    """Return the saved progress called ``name`` for ``source``, or a fresh state.
+
+    Without a name the progress is kept in memory only.
+    """
+    state = ImportState(name=name or "", source=source)
+    if name:
+        state = ImportState.objects.filter(name=name).first() or state
+    if state.source != source:
+        raise CommandError(f"Checkpoint {name} belongs to {state.source}")
+    return state
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream books from a CSV or JSONL file into the catalog in batches. "
+        "The checkpoint is saved in each batch's transaction, so a crash "
+        "never imports a committed batch twice."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV (with a header row) or JSONL file")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="defaults to the file extension")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--checkpoint",
+            help="name of the progress record kept in the database; an existing one resumes the import",
+        )
+        parser.add_argument(
+            "--image-prefix", default="",
+            help="prefix added to each row's image path, e.g. books/",
+        )
+
+    def handle(self, *args, **options):
+        path = os.path.abspath(options["path"])
+        fmt = options["format"] or ("jsonl" if path.endswith((".jsonl", ".json")) else "csv")
+        batch_size = max(1, options["batch_size"])
+        checkpoint = options["checkpoint"]
+
+        state = load_checkpoint(checkpoint, path)
+        if state.records:
+            self.stdout.write(f"Resuming after {state.records} records")
+
+        records = islice(read_records(path, fmt), state.records, None)
+        while True:
+            chunk = list(islice(records, batch_size))
+            if not chunk:
+                break
+
+            books = []
+            for line_number, row in chunk:
+                book = self.build_book(row, options["image_prefix"])
+                if isinstance(book, EBooksModel):
+                    books.append(book)
+                else:
+                    state.rejected += 1
+                    self.stderr.write(f"line {line_number}: {book}")
+
+            state.records += len(chunk)
+            state.imported += len(books)
+            self.insert(books, state if checkpoint else None)
+
+        invalidate_catalog()
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {state.imported} books, rejected {state.rejected} rows"
+        ))
+
+    @staticmethod
+    def build_book(row, image_prefix):
+        """Return an unsaved book for a valid row, or the form errors."""
+        if not isinstance(row, dict):
+            return "not a JSON object"
+        data = dict(row)
+        if data.get("image"):
+            data["image"] = image_prefix + data["image"]
+        form = EBooksImportForm(data=data)
+        if not form.is_valid():
+            return form.errors.as_json()
+        return form.save(commit=False)
+
+    @staticmethod
+    def insert(books, state=None):
+        """Insert one batch, index it and save ``state``, in a single transaction."""
+        if books:
+            # Reserved outside the transaction, so the sequence row is not
+            # locked while the batch is written.
+            for book, book_id in zip(books, allocate_book_ids(len(books))):
+                book.book_id = book_id
+        with transaction.atomic():
+            if books:
+                created = EBooksModel.objects.bulk_create(books)
+                # Backends that cannot return ids from bulk inserts leave pk unset;
+                # those rows are picked up by rebuild_search_index.
+                saved = [book for book in created if book.pk]
+                create_copies(saved)
+                get_search_backend().index_many(saved)
+                # Bulk inserts send no signals; every autocomplete index reloads.
+                bump_state(SUGGEST_STATE)
+            if state is not None:
+                state.save()
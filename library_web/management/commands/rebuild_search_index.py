@@ -0,0 +1,14 @@
+"""Rebuild the catalog full-text search index."""
+
+from django.core.management.base import BaseCommand
+
+from library_web.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index from the books table."
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt search index with {type(backend).__name__}"))
@@ -0,0 +1,35 @@
+"""Copy the SQLite primary into its replica files, simulating replication."""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from library_web.db import replicate_sqlite
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the default SQLite database into every LIBRARY_DB_REPLICAS file, "
+        "once or every --interval seconds. The interval is the simulated "
+        "replication lag."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, help="repeat every this many seconds")
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES["default"]
+        if primary["ENGINE"] != "django.db.backends.sqlite3":
+            raise CommandError("replicate_sqlite only copies SQLite databases")
+        targets = [settings.DATABASES[alias]["NAME"] for alias in settings.LIBRARY_REPLICA_DATABASES]
+        if not targets:
+            raise CommandError("No replicas configured; set LIBRARY_DB_REPLICAS")
+
+        while True:
+            for target in targets:
+                replicate_sqlite(primary["NAME"], target)
+            self.stdout.write(f"Replicated to {len(targets)} replica(s)")
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
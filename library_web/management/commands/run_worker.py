@@ -0,0 +1,53 @@
+"""Drain the background job queue."""
+
+import multiprocessing
+import time
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from library_web.jobs import run_pending
+
+
+def work(poll, burst):
+    """Run jobs in this process until the queue is empty (burst) or forever."""
+    # Under the spawn start method the child starts without Django set up.
+    django.setup()
+    while True:
+        close_old_connections()
+        ran = run_pending()
+        if burst:
+            return
+        if not ran:
+            time.sleep(poll)
+
+
+class Command(BaseCommand):
+    help = "Run background jobs (thumbnails, file cleanup) from the job table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=1, help="worker processes to run")
+        parser.add_argument("--poll", type=float, default=2.0, help="seconds to sleep when idle")
+        parser.add_argument("--burst", action="store_true", help="exit once the queue is empty")
+
+    def handle(self, *args, **options):
+        processes = max(1, options["processes"])
+        if processes == 1:
+            work(options["poll"], options["burst"])
+            return
+
+        # Children must not share the parent's database connection.
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(target=work, args=(options["poll"], options["burst"]))
+            for _ in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
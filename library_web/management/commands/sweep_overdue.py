@@ -0,0 +1,18 @@
+"""Accrue late fees on overdue loans."""
+
+from django.core.management.base import BaseCommand
+
+from library_web.loans import SWEEP_CHUNK_SIZE, outstanding_fees, sweep_overdue
+
+
+class Command(BaseCommand):
+    help = "Materialize late fees accrued on open, overdue loans (run nightly)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=SWEEP_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        updated = sweep_overdue(chunk_size=max(1, options["chunk_size"]))
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated {updated} overdue loans; outstanding fees {outstanding_fees()}"
+        ))
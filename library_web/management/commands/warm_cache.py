@@ -0,0 +1,44 @@
+"""Pre-populate the catalog cache keys before a worker takes traffic."""
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+
+from library_web.cache import cache_stats, is_shared
+from library_web.catalog import SECTIONS, catalog_generation, get_catalog_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed the catalog generation, build and store the catalog snapshot, "
+        "and render the cached card fragment of every book on a first page. "
+        "Run at boot, after migrate; needs a cache shared with the workers, "
+        "such as LIBRARY_CACHE_SHARED."
+    )
+
+    def handle(self, *args, **options):
+        if not is_shared(caches[DEFAULT_CACHE_ALIAS]):
+            raise CommandError(
+                "The default cache is local to this process, so warming it would not "
+                "reach the workers. Set LIBRARY_CACHE_SHARED or LIBRARY_CACHE_BACKEND."
+            )
+        generation = catalog_generation()
+        snapshot = get_catalog_snapshot()
+
+        books = {}
+        for section in SECTIONS.values():
+            for book in snapshot[section["context"]]:
+                books[book.pk] = book
+
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        for book in books.values():
+            render_to_string("book_card.html", {"book": book}, request=request)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Warmed catalog generation {generation} and {len(books)} book cards"
+        ))
+        for location, counts in sorted(cache_stats().items()):
+            self.stdout.write(f"{location}: {counts}")
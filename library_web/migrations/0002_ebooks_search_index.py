@@ -0,0 +1,53 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+FTS_TABLE = 'library_web_ebooks_fts'
+SEARCH_FIELDS = 'title, subtitle, author, publisher, description'
+PG_INDEX = 'library_web_ebooks_search_gin'
+PG_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(author, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(subtitle, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(publisher, '')), 'C') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'D')"
+)
+
+
+def create_search_index(_apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        try:
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                f"{SEARCH_FIELDS}, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+        except OperationalError:
+            # SQLite built without FTS5; search falls back to LIKE.
+            return
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, {SEARCH_FIELDS}) "
+            f"SELECT id, {SEARCH_FIELDS} FROM library_web_ebooksmodel"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE INDEX {PG_INDEX} ON library_web_ebooksmodel USING gin (({PG_VECTOR_SQL}))"
+        )
+
+
+def drop_search_index(_apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == 'postgresql':
+        schema_editor.execute(f"DROP INDEX IF EXISTS {PG_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library_web', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.27 on 2026-10-17 04:32
+
+import datetime
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def close_duplicate_open_loans(apps, schema_editor):
+    """Close all but the oldest open record of each book.
+
+    Concurrent borrows could leave a book with several open records, which
+    the constraint below rejects. The extra records are closed as returned
+    today, without a fee.
+    """
+    # pylint: disable=invalid-name,unused-argument
+    BorrowRecord = apps.get_model("library_web", "BorrowRecord")
+
+    open_loans = BorrowRecord.objects.filter(actual_return_date__isnull=True)
+    oldest = open_loans.values("book").annotate(first=Min("pk")).values("first")
+    open_loans.exclude(pk__in=oldest).update(actual_return_date=datetime.date.today())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library_web', '0002_ebooks_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(close_duplicate_open_loans, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='borrowrecord',
+            constraint=models.UniqueConstraint(condition=models.Q(('actual_return_date__isnull', True)), fields=('book',), name='unique_open_borrow_per_book'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.27 on 2026-10-17 04:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library_web', '0003_borrowrecord_open_loan_constraint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ebooksmodel',
+            index=models.Index(fields=['category', 'id'], name='ebook_category_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ebooksmodel',
+            index=models.Index(fields=['-rating', '-id'], name='ebook_rating_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ebooksmodel',
+            index=models.Index(fields=['-borrow_count', '-id'], name='ebook_borrow_id_idx'),
+        ),
+    ]
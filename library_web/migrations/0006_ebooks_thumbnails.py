@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-17 04:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library_web', '0005_id_sequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ebooksmodel',
+            name='thumbnails',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+    ]
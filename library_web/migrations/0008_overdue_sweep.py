@@ -0,0 +1,27 @@
+# Generated by Django 4.2.27 on 2026-10-17 04:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library_web', '0007_job_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SweepState',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('as_of', models.DateField(blank=True, null=True)),
+                ('last_due', models.DateField(blank=True, null=True)),
+                ('last_id', models.IntegerField(blank=True, null=True)),
+                ('completed', models.BooleanField(default=False)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='borrowrecord',
+            index=models.Index(condition=models.Q(('actual_return_date__isnull', True)), fields=['return_date', 'id'], name='borrow_open_due_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.27 on 2026-10-17 04:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library_web', '0008_overdue_sweep'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoanSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='loan_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('open_loans', models.PositiveIntegerField(default=0)),
+                ('total_loans', models.PositiveIntegerField(default=0)),
+                ('fees_charged', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='borrowrecord',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='loans', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='borrowrecord',
+            index=models.Index(fields=['user', '-id'], name='borrow_user_id_idx'),
+        ),
+    ]
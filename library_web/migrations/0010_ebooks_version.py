@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-17 04:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library_web', '0009_loan_dashboard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ebooksmodel',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.27 on 2026-10-17 09:12
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library_web', '0010_ebooks_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ebooksmodel',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
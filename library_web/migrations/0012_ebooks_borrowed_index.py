@@ -0,0 +1,17 @@
+# Generated by Django 4.2.27 on 2026-10-17 05:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library_web', '0011_ebooks_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ebooksmodel',
+            index=models.Index(fields=['is_borrowed', '-id'], name='ebook_borrowed_id_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.27 on 2026-10-17 05:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library_web', '0012_ebooks_borrowed_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ebooksmodel',
+            name='active_loan',
+            field=models.OneToOneField(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='library_web.borrowrecord'),
+        ),
+    ]
@@ -0,0 +1,139 @@
+# Generated by Django 4.2.27 on 2026-10-17 05:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Exists, OuterRef, Subquery
+
+BATCH_SIZE = 2000
+
+
+def create_copies(apps, schema_editor):
+    """Give every existing book one copy and move its open loan onto it."""
+    # pylint: disable=invalid-name,unused-argument
+    EBooksModel = apps.get_model("library_web", "EBooksModel")
+    BookCopy = apps.get_model("library_web", "BookCopy")
+    BorrowRecord = apps.get_model("library_web", "BorrowRecord")
+
+    batch = []
+    for book_id in EBooksModel.objects.values_list("pk", flat=True).iterator(BATCH_SIZE):
+        batch.append(BookCopy(book_id=book_id, number=1))
+        if len(batch) == BATCH_SIZE:
+            BookCopy.objects.bulk_create(batch)
+            batch = []
+    BookCopy.objects.bulk_create(batch)
+
+    open_loans = BorrowRecord.objects.filter(actual_return_date__isnull=True)
+    open_loans.update(
+        copy=Subquery(BookCopy.objects.filter(book=OuterRef("book")).values("pk")[:1])
+    )
+    BookCopy.objects.update(
+        active_loan=Subquery(open_loans.filter(copy=OuterRef("pk")).values("pk")[:1])
+    )
+    out = Exists(open_loans.filter(book=OuterRef("pk")))
+    EBooksModel.objects.filter(out).update(is_borrowed=True, available_copies=0)
+    EBooksModel.objects.filter(~out).update(is_borrowed=False, available_copies=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library_web', '0013_ebooks_active_loan'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookCopy',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Hold',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('student_id', models.CharField(max_length=50)),
+                ('loan_days', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('fulfilled_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RemoveConstraint(
+            model_name='borrowrecord',
+            name='unique_open_borrow_per_book',
+        ),
+        migrations.RemoveField(
+            model_name='ebooksmodel',
+            name='active_loan',
+        ),
+        migrations.AddField(
+            model_name='ebooksmodel',
+            name='available_copies',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ebooksmodel',
+            name='copy_count',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='borrowrecord',
+            index=models.Index(condition=models.Q(('actual_return_date__isnull', True)), fields=['book', 'id'], name='borrow_open_book_idx'),
+        ),
+        migrations.AddField(
+            model_name='hold',
+            name='book',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='library_web.ebooksmodel'),
+        ),
+        migrations.AddField(
+            model_name='hold',
+            name='loan',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='hold', to='library_web.borrowrecord'),
+        ),
+        migrations.AddField(
+            model_name='hold',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holds', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='bookcopy',
+            name='active_loan',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='library_web.borrowrecord'),
+        ),
+        migrations.AddField(
+            model_name='bookcopy',
+            name='book',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, db_index=False, related_name='copies', to='library_web.ebooksmodel'),
+        ),
+        migrations.AddField(
+            model_name='borrowrecord',
+            name='copy',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='loans', to='library_web.bookcopy'),
+        ),
+        migrations.AddIndex(
+            model_name='hold',
+            index=models.Index(condition=models.Q(('fulfilled_at__isnull', True)), fields=['book', 'id'], name='hold_queue_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='hold',
+            constraint=models.UniqueConstraint(condition=models.Q(('fulfilled_at__isnull', True)), fields=('book', 'user'), name='unique_waiting_hold'),
+        ),
+        migrations.AddIndex(
+            model_name='bookcopy',
+            index=models.Index(condition=models.Q(('active_loan__isnull', True)), fields=['book', 'number'], name='copy_free_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='bookcopy',
+            constraint=models.UniqueConstraint(fields=('book', 'number'), name='unique_copy_number'),
+        ),
+        migrations.AddConstraint(
+            model_name='bookcopy',
+            constraint=models.UniqueConstraint(condition=models.Q(('active_loan__isnull', False)), fields=('active_loan',), name='unique_copy_loan'),
+        ),
+        migrations.AddConstraint(
+            model_name='borrowrecord',
+            constraint=models.UniqueConstraint(condition=models.Q(('actual_return_date__isnull', True)), fields=('copy',), name='unique_open_borrow_per_copy'),
+        ),
+        migrations.RunPython(create_copies, migrations.RunPython.noop),
+    ]
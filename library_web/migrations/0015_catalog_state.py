@@ -0,0 +1,21 @@
+# Generated by Django 4.2.27 on 2026-10-17 06:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library_web', '0014_book_copies_and_holds'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogState',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('generation', models.BigIntegerField()),
+                ('changed_at', models.DateTimeField()),
+            ],
+        ),
+    ]
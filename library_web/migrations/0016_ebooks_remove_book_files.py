@@ -0,0 +1,21 @@
+# Generated by Django 4.2.27 on 2026-10-17 07:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library_web', '0015_catalog_state'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='ebooksmodel',
+            name='book_audio',
+        ),
+        migrations.RemoveField(
+            model_name='ebooksmodel',
+            name='book_pdf',
+        ),
+    ]
@@ -3,8 +3,11 @@ Models for the Library Web application.
 """
 
 import uuid
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import F
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
+from library_web.book_ids import allocate_book_ids
 
 class UserManager(BaseUserManager):
     """Create a user manager"""
@@ -44,6 +47,15 @@ class User(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return self.username
 
+class IdSequence(models.Model):
+    """Named counter used to hand out blocks of ids"""
+    name = models.CharField(max_length=50, primary_key=True)
+    next_value = models.BigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+
+
 class EBooksModel(models.Model):
     """Creating a eBook details"""
     book_id = models.CharField(max_length=20, unique=True, blank=True)
@@ -54,30 +66,269 @@ class EBooksModel(models.Model):
     description = models.TextField()
     category = models.CharField(max_length=50)
     image = models.ImageField(upload_to="books/")
+    thumbnails = models.JSONField(default=list, blank=True, editable=False)
     rating = models.IntegerField(default=0)
     borrow_count = models.PositiveIntegerField(default=0)
+    # True while no copy is on the shelf. Both counters are kept in step with
+    # BookCopy.active_loan by library_web.loans; check_loans repairs drift.
     is_borrowed = models.BooleanField(default=False)
+    copy_count = models.PositiveIntegerField(default=1, editable=False)
+    available_copies = models.PositiveIntegerField(default=1, editable=False)
+    # Bumped on every change to the row; cache keys for the book include it.
+    version = models.PositiveIntegerField(default=1, editable=False)
+    # Last change to the row; conditional GETs answer Last-Modified from it.
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        """Indexes matching the keyset orderings used by the listings."""
+        indexes = [
+            models.Index(fields=["category", "id"], name="ebook_category_id_idx"),
+            models.Index(fields=["-rating", "-id"], name="ebook_rating_id_idx"),
+            models.Index(fields=["-borrow_count", "-id"], name="ebook_borrow_id_idx"),
+            # The admin's borrowed-state filter, newest first.
+            models.Index(fields=["is_borrowed", "-id"], name="ebook_borrowed_id_idx"),
+        ]
+
+    # The columns a save of an existing row writes. Loans and jobs change
+    # the counters, renditions and version with F() updates, which an edit
+    # made from an instance loaded earlier must not write back over.
+    EDITABLE_FIELDS = (
+        "book_id", "title", "subtitle", "author", "publisher", "description", "category",
+        "image", "rating",
+    )
 
     def save(self, *args, **kwargs):
-        """Saving the ebook data"""
+        """Saving the ebook data
+
+        An existing row only gets its ``EDITABLE_FIELDS`` (or the given
+        ``update_fields``) written, and its version is bumped in the
+        database so two overlapping saves never share one.
+        """
         if not self.book_id:
-            self.book_id = "BOOK-" + uuid.uuid4().hex[:6].upper()
-        super().save(*args, **kwargs)
+            self.book_id = allocate_book_ids(1)[0]
+        if self._state.adding:
+            self.available_copies = 0 if self.is_borrowed else self.copy_count
+            super().save(*args, **kwargs)
+            create_copies([self])
+            return
+        fields = kwargs.pop("update_fields", None)
+        if fields is None:
+            fields = set(self.EDITABLE_FIELDS) - self.get_deferred_fields()
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            type(self).objects.using(using).filter(pk=self.pk).update(version=F("version") + 1)
+            self.refresh_from_db(using=using, fields=["version"])
+            super().save(*args, update_fields=[*fields, "updated_at"], **kwargs)
 
     def __str__(self):
         """returning the ebook data"""
         return str(self.title)
 
+class BookCopy(models.Model):
+    """One lendable copy of a book"""
+    # Indexed by unique_copy_number, which leads with the book.
+    book = models.ForeignKey(
+        "EBooksModel", on_delete=models.CASCADE, related_name="copies", db_index=False
+    )
+    number = models.PositiveIntegerField()
+    # The open BorrowRecord while this copy is out. Unique only where set: a
+    # full unique index would also answer "active_loan IS NULL" lookups by
+    # walking every free copy in the library instead of copy_free_idx.
+    active_loan = models.ForeignKey(
+        "BorrowRecord", on_delete=models.SET_NULL, null=True, blank=True, related_name="+",
+        db_index=False,
+    )
+
+    class Meta:
+        """Copies are numbered per book; free copies are found by index."""
+        constraints = [
+            models.UniqueConstraint(fields=["book", "number"], name="unique_copy_number"),
+            models.UniqueConstraint(
+                fields=["active_loan"],
+                condition=models.Q(active_loan__isnull=False),
+                name="unique_copy_loan",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["book", "number"],
+                condition=models.Q(active_loan__isnull=True),
+                name="copy_free_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Copy {self.number} of book #{self.book_id}"
+
+
+def create_copies(books):
+    """Create copies 1..copy_count of newly inserted ``books``."""
+    BookCopy.objects.bulk_create(
+        BookCopy(book=book, number=number)
+        for book in books for number in range(1, book.copy_count + 1)
+    )
+
+
 class BorrowRecord(models.Model):
     """Creating a eBook borrow details"""
     student_id = models.CharField(max_length=50)
+    user = models.ForeignKey(
+        "User", on_delete=models.SET_NULL, null=True, blank=True, related_name="loans"
+    )
     book = models.ForeignKey("EBooksModel", on_delete=models.CASCADE)
+    copy = models.ForeignKey(
+        "BookCopy", on_delete=models.SET_NULL, null=True, blank=True, related_name="loans"
+    )
     tracking_code = models.CharField(max_length=100, unique=True, default=uuid.uuid4)
     borrow_date = models.DateField(null=True, blank=True)
     return_date = models.DateField(null=True, blank=True)
     late_fee = models.DecimalField(max_digits=6, decimal_places=2, default=0)
     actual_return_date = models.DateField(null=True, blank=True)
 
+    class Meta:
+        """A copy can only have one open borrow record at a time.
+
+        Open records are indexed by due date for the overdue sweep, by book
+        for returns, and each user's records newest first for the loan
+        dashboard.
+        """
+        indexes = [
+            models.Index(fields=["user", "-id"], name="borrow_user_id_idx"),
+            models.Index(
+                fields=["return_date", "id"],
+                condition=models.Q(actual_return_date__isnull=True),
+                name="borrow_open_due_idx",
+            ),
+            models.Index(
+                fields=["book", "id"],
+                condition=models.Q(actual_return_date__isnull=True),
+                name="borrow_open_book_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["copy"],
+                condition=models.Q(actual_return_date__isnull=True),
+                name="unique_open_borrow_per_copy",
+            ),
+        ]
+
     def __str__(self):
         """Returing a eBook borrow details """
-        return f"{self.student_id} borrowed {self.book.title}"
+        # Only name the book if it was loaded already, so listing records
+        # without select_related("book") does not query once per row.
+        if self._meta.get_field("book").is_cached(self):
+            return f"{self.student_id} borrowed {self.book.title}"
+        return f"{self.student_id} borrowed book #{self.book_id}"
+
+
+class Hold(models.Model):
+    """A place in a book's first-come, first-served hold queue"""
+    book = models.ForeignKey("EBooksModel", on_delete=models.CASCADE, related_name="holds")
+    user = models.ForeignKey("User", on_delete=models.CASCADE, related_name="holds")
+    student_id = models.CharField(max_length=50)
+    # Length of the loan the hold turns into, taken from the borrow form.
+    loan_days = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when a returned copy is lent to the holder.
+    loan = models.OneToOneField(
+        "BorrowRecord", on_delete=models.SET_NULL, null=True, blank=True, related_name="hold"
+    )
+    fulfilled_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        """Waiting holds are read head-first per book, one per user."""
+        indexes = [
+            models.Index(
+                fields=["book", "id"],
+                condition=models.Q(fulfilled_at__isnull=True),
+                name="hold_queue_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["book", "user"],
+                condition=models.Q(fulfilled_at__isnull=True),
+                name="unique_waiting_hold",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} waiting for book #{self.book_id}"
+
+
+class LoanSummary(models.Model):
+    """Per-user loan totals, kept current by the loans module"""
+    user = models.OneToOneField(
+        "User", on_delete=models.CASCADE, primary_key=True, related_name="loan_summary"
+    )
+    open_loans = models.PositiveIntegerField(default=0)
+    total_loans = models.PositiveIntegerField(default=0)
+    fees_charged = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.open_loans} open"
+
+
+class CatalogState(models.Model):
+    """One slot row of a change counter shared by every process"""
+    name = models.CharField(max_length=50, primary_key=True)
+    generation = models.BigIntegerField()
+    # Deletes leave no row behind to date them, so the change time is kept here.
+    changed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} generation {self.generation}"
+
+
+class SweepState(models.Model):
+    """Progress of a batch sweep, so an interrupted run can resume"""
+    name = models.CharField(max_length=50, primary_key=True)
+    as_of = models.DateField(null=True, blank=True)
+    last_due = models.DateField(null=True, blank=True)
+    last_id = models.IntegerField(null=True, blank=True)
+    completed = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.name} as of {self.as_of}"
+
+
+class ImportState(models.Model):
+    """Progress of a resumable import, saved in each batch's transaction"""
+    name = models.CharField(max_length=255, primary_key=True)
+    source = models.CharField(max_length=1024)
+    records = models.PositiveIntegerField(default=0)
+    imported = models.PositiveIntegerField(default=0)
+    rejected = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.records} records of {self.source}"
+
+
+class Job(models.Model):
+    """Background job drained by the run_worker command"""
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [(s, s) for s in (PENDING, RUNNING, DONE, FAILED)]
+
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    idempotency_key = models.CharField(max_length=255, unique=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        """Workers look jobs up by status and due time."""
+        indexes = [
+            models.Index(fields=["status", "run_after"], name="job_status_run_after_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.task} [{self.status}]"
@@ -0,0 +1,102 @@
+"""Send catalog reads to read replicas, keeping everything else on the primary.
+
+``ReplicaRouter`` routes reads of the models in ``REPLICA_MODELS`` to one
+of ``LIBRARY_REPLICA_DATABASES``, picked at random once per request so a
+page is read from a single snapshot, but only while
+``PrimaryPinMiddleware`` has marked the current request as safe to serve
+from a replica. Every other read, every write and all work outside a
+request (commands, the job worker) uses ``default``. So do the reads that
+fill something kept per catalog generation (the catalog snapshot, the
+autocomplete index, the catalog validators): the generation is read from
+the primary, and a lagging replica would pair it with older rows.
+
+Read-your-writes: a request that writes, or uses an unsafe method, sets a
+short-lived cookie that pins the client to the primary for
+``LIBRARY_PRIMARY_PIN_SECONDS``, which should exceed the replication lag.
+"""
+
+import random  # nosec - load spreading, not security
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PIN_COOKIE = "library_primary"
+DEFAULT_PIN_SECONDS = 5
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+REPLICA_MODELS = {"library_web.ebooksmodel"}
+
+# Per-request routing state: {"replica_ok": bool, "wrote": bool} plus the
+# chosen "alias" once a catalog read happened; None outside a request.
+_request_state = ContextVar("library_web_replica_state", default=None)
+
+
+def replica_aliases():
+    """Return the configured replica database aliases."""
+    return list(getattr(settings, "LIBRARY_REPLICA_DATABASES", []))
+
+
+def pin_seconds():
+    """Return how long a client stays on the primary after writing."""
+    return getattr(settings, "LIBRARY_PRIMARY_PIN_SECONDS", DEFAULT_PIN_SECONDS)
+
+
+class ReplicaRouter:
+    """Database router for catalog reads; see the module docstring."""
+
+    def db_for_read(self, model, **_hints):
+        """Pick a replica for catalog reads in an unpinned request."""
+        state = _request_state.get()
+        if state is None or not state["replica_ok"] or state["wrote"]:
+            return None
+        if model._meta.label_lower not in REPLICA_MODELS:
+            return None
+        if "alias" not in state:
+            aliases = replica_aliases()
+            state["alias"] = random.choice(aliases) if aliases else None
+        return state["alias"]
+
+    def db_for_write(self, _model, **_hints):
+        """Write to the primary, and keep the rest of the request there."""
+        state = _request_state.get()
+        if state is not None:
+            state["wrote"] = True
+        return "default"
+
+    def allow_relation(self, _obj1, _obj2, **_hints):
+        """Replicas hold the same rows as the primary."""
+        return True
+
+    def allow_migrate(self, db, _app_label, **_hints):
+        """Replicas get their schema by replication, not by migrate."""
+        if db in replica_aliases():
+            return False
+        return None
+
+
+class PrimaryPinMiddleware:
+    """Decide per request whether catalog reads may go to a replica."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replica_aliases():
+            return self.get_response(request)
+
+        pinned_until = request.COOKIES.get(PIN_COOKIE, "")
+        pinned = pinned_until.isdigit() and int(pinned_until) > time.time()
+        state = {"replica_ok": request.method in SAFE_METHODS and not pinned, "wrote": False}
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+
+        if state["wrote"] or request.method not in SAFE_METHODS:
+            seconds = pin_seconds()
+            response.set_cookie(
+                PIN_COOKIE, str(int(time.time() + seconds) + 1), max_age=seconds + 1,
+                httponly=True, samesite="Lax",
+            )
+        return response
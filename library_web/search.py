@@ -0,0 +1,306 @@
+"""Pluggable full-text search over EBooksModel.
+
+The backend is picked from the configured database: an FTS5 virtual table
+on SQLite, a GIN-indexed ``tsvector`` expression on PostgreSQL, and a
+``LIKE`` scan everywhere else. ``LIBRARY_SEARCH_BACKEND`` can name a
+backend class explicitly.
+"""
+# pylint: disable=no-member
+
+import re
+
+from django.conf import settings
+from django.db import connection, connections, router
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+from django.utils.safestring import mark_safe
+
+from library_web.models import EBooksModel
+from library_web.pagination import decode_cursor, encode_cursor, paginate
+
+FTS_TABLE = "library_web_ebooks_fts"
+BOOKS_TABLE = EBooksModel._meta.db_table
+SEARCH_FIELDS = ("title", "subtitle", "author", "publisher", "description")
+# bm25 column weights, in SEARCH_FIELDS order.
+FIELD_WEIGHTS = (10.0, 4.0, 6.0, 2.0, 1.0)
+
+# Weighted document used by the PostgreSQL backend. The GIN index created
+# in migration 0002 is built on exactly this expression.
+PG_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(author, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(subtitle, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(publisher, '')), 'C') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'D')"
+)
+
+MAX_TERMS = 8
+SNIPPET_LENGTH = 160
+_MARK_START = "\x02"
+_MARK_END = "\x03"
+
+_detected = {"backend": None}
+
+
+def query_terms(query):
+    """Split a search query into lowercase word terms."""
+    return re.findall(r"\w+", query.lower())[:MAX_TERMS]
+
+
+def render_highlight(text):
+    """Escape ``text`` and turn highlight markers into ``<mark>`` tags."""
+    html = escape(text).replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>")
+    return mark_safe(html)  # nosec - input is escaped above
+
+
+def _mark_terms(text, terms):
+    """Wrap every word starting with one of ``terms`` in highlight markers."""
+    pattern = r"\b(?:" + "|".join(re.escape(t) for t in terms) + r")\w*"
+    return re.sub(pattern, lambda m: _MARK_START + m.group(0) + _MARK_END, text, flags=re.IGNORECASE)
+
+
+def _ranked_page(cursor, query, after, limit):
+    """Run ``query`` as one keyset page on (score, id).
+
+    ``query`` is ``(sql, params, key)``: ``sql`` selects ``id, score`` and
+    ends in its ``WHERE`` clause, and ``key`` is the SQL row value
+    ``(score, id)`` is computed from. The cursor is compared with ``key``
+    inside the ranking query, and the ``LIMIT`` lets the database keep
+    only the best page of matches while it sorts them.
+
+    Lower scores rank first. Returns the page ids and the next-page token.
+    """
+    sql, params, key = query
+    params = list(params)
+    if after:
+        score, last_id = decode_cursor(after, "rank")
+        sql += f" AND {key} > (%s, %s)"
+        params += [score, last_id]
+    sql += " ORDER BY score, id LIMIT %s"
+    params.append(limit + 1)
+
+    cursor.execute(sql, params)
+    ranked = cursor.fetchall()
+    page = ranked[:limit]
+    next_token = None
+    if len(ranked) > limit:
+        last_id, last_score = page[-1]
+        next_token = encode_cursor((last_score, last_id))
+    return [row[0] for row in page], next_token
+
+
+def _read_connection():
+    """Return the connection catalog reads are routed to (maybe a replica)."""
+    return connections[router.db_for_read(EBooksModel)]
+
+
+def _attach(ids, rows):
+    """Load books for ``(id, title_hl, snippet_hl)`` rows in ``ids`` order."""
+    marked = {row[0]: row[1:] for row in rows}
+    books = EBooksModel.objects.in_bulk(ids)
+    hits = []
+    for book_id in ids:
+        if book_id not in books or book_id not in marked:
+            continue
+        book = books[book_id]
+        title_hl, snippet_hl = marked[book_id]
+        book.title_highlight = render_highlight(title_hl)
+        book.snippet = render_highlight(snippet_hl or "")
+        hits.append(book)
+    return hits
+
+
+class SearchBackend:
+    """Base class for catalog search backends."""
+
+    def index(self, book):
+        """Add or refresh one book in the index."""
+
+    def index_many(self, books):
+        """Add or refresh several books in the index."""
+        for book in books:
+            self.index(book)
+
+    def remove(self, book_id):
+        """Drop one book from the index."""
+
+    def rebuild(self):
+        """Rebuild the whole index from the books table."""
+
+    def search(self, query, after=None, limit=20):
+        """Return ``(books, next_token)`` for one page of ranked results."""
+        raise NotImplementedError
+
+    def matching_ids(self, query, limit=1000):
+        """Return the ids of the best ``limit`` matches, best first."""
+        books, _ = self.search(query, limit=limit)
+        return [book.pk for book in books]
+
+
+class LikeSearchBackend(SearchBackend):
+    """Fallback backend using ``icontains`` filters, ordered by id."""
+
+    def search(self, query, after=None, limit=20):
+        terms = query_terms(query)
+        if not terms:
+            return [], None
+
+        books = EBooksModel.objects.all()
+        for term in terms:
+            match = Q()
+            for field in SEARCH_FIELDS:
+                match |= Q(**{f"{field}__icontains": term})
+            books = books.filter(match)
+
+        books, next_token = paginate(books, "id", after, limit)
+        for book in books:
+            book.title_highlight = render_highlight(_mark_terms(book.title, terms))
+            book.snippet = render_highlight(_mark_terms(book.description[:SNIPPET_LENGTH], terms))
+        return books, next_token
+
+
+class SqliteFtsBackend(SearchBackend):
+    """SQLite FTS5 backend ranked with bm25()."""
+
+    def index(self, book):
+        self.index_many([book])
+
+    def index_many(self, books):
+        rows = [[book.pk] + [getattr(book, field) or "" for field in SEARCH_FIELDS] for book in books]
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [row[:1] for row in rows])
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(SEARCH_FIELDS)}) "
+                f"VALUES (%s, {', '.join(['%s'] * len(SEARCH_FIELDS))})",
+                rows,
+            )
+
+    def remove(self, book_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [book_id])
+
+    def rebuild(self):
+        columns = ", ".join(SEARCH_FIELDS)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, {columns}) "
+                f"SELECT id, {columns} FROM {BOOKS_TABLE}"
+            )
+
+    @staticmethod
+    def _ranked_ids(cursor, match, after, limit):
+        score = f"bm25({FTS_TABLE}, {', '.join(str(w) for w in FIELD_WEIGHTS)})"
+        return _ranked_page(
+            cursor,
+            (
+                f"SELECT rowid AS id, {score} AS score FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+                [match], f"({score}, rowid)",
+            ),
+            after, limit,
+        )
+
+    @staticmethod
+    def _match(terms):
+        # Every term is matched as a prefix and all terms must be present.
+        return " ".join(f'"{term}"*' for term in terms)
+
+    def matching_ids(self, query, limit=1000):
+        terms = query_terms(query)
+        if not terms:
+            return []
+        with _read_connection().cursor() as cursor:
+            return self._ranked_ids(cursor, self._match(terms), None, limit)[0]
+
+    def search(self, query, after=None, limit=20):
+        terms = query_terms(query)
+        if not terms:
+            return [], None
+
+        match = self._match(terms)
+        with _read_connection().cursor() as cursor:
+            ids, next_token = self._ranked_ids(cursor, match, after, limit)
+            if not ids:
+                return [], None
+
+            cursor.execute(
+                f"SELECT rowid, highlight({FTS_TABLE}, 0, char(2), char(3)), "
+                f"snippet({FTS_TABLE}, 4, char(2), char(3), '…', 24) "
+                f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                f"AND rowid IN ({', '.join(['%s'] * len(ids))})",
+                [match] + ids,
+            )
+            rows = cursor.fetchall()
+        return _attach(ids, rows), next_token
+
+
+class PostgresSearchBackend(SearchBackend):
+    """PostgreSQL backend ranked with ts_rank_cd() over a GIN-indexed vector.
+
+    The vector is an expression over the book columns, so there is nothing
+    to maintain on save or delete.
+    """
+
+    @staticmethod
+    def _tsquery(terms):
+        return " & ".join(f"{term}:*" for term in terms)
+
+    @staticmethod
+    def _ranked_ids(cursor, tsquery, after, limit):
+        score = f"(-ts_rank_cd({PG_VECTOR_SQL}, q))::float8"
+        return _ranked_page(
+            cursor,
+            (
+                f"SELECT id, {score} AS score "
+                f"FROM {BOOKS_TABLE}, to_tsquery('simple', %s) q "
+                f"WHERE ({PG_VECTOR_SQL}) @@ q",
+                [tsquery], f"({score}, id)",
+            ),
+            after, limit,
+        )
+
+    def matching_ids(self, query, limit=1000):
+        terms = query_terms(query)
+        if not terms:
+            return []
+        with connection.cursor() as cursor:
+            return self._ranked_ids(cursor, self._tsquery(terms), None, limit)[0]
+
+    def search(self, query, after=None, limit=20):
+        terms = query_terms(query)
+        if not terms:
+            return [], None
+
+        tsquery = self._tsquery(terms)
+        options = f'StartSel="{_MARK_START}", StopSel="{_MARK_END}"'
+        with connection.cursor() as cursor:
+            ids, next_token = self._ranked_ids(cursor, tsquery, after, limit)
+            if not ids:
+                return [], None
+
+            cursor.execute(
+                f"SELECT id, ts_headline('simple', title, q, %s), "
+                f"ts_headline('simple', description, q, %s) "
+                f"FROM {BOOKS_TABLE}, to_tsquery('simple', %s) q WHERE id = ANY(%s)",
+                [options + ", HighlightAll=true", options, tsquery, ids],
+            )
+            rows = cursor.fetchall()
+        return _attach(ids, rows), next_token
+
+
+def get_search_backend():
+    """Return the configured backend, or detect one from the database."""
+    path = getattr(settings, "LIBRARY_SEARCH_BACKEND", None)
+    if path:
+        return import_string(path)()
+
+    if _detected["backend"] is None:
+        if connection.vendor == "postgresql":
+            backend = PostgresSearchBackend()
+        elif connection.vendor == "sqlite" and FTS_TABLE in connection.introspection.table_names():
+            backend = SqliteFtsBackend()
+        else:
+            backend = LikeSearchBackend()
+        _detected["backend"] = backend
+    return _detected["backend"]
@@ -0,0 +1,46 @@
+"""Signal handlers that keep derived catalog state in sync with the models."""
+
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from library_web.catalog import bump_state, invalidate_catalog
+from library_web.models import EBooksModel
+from library_web.search import get_search_backend
+from library_web.suggest import SUGGEST_STATE, suggest_index
+
+
+@receiver(post_save, sender=EBooksModel, dispatch_uid="library_web_catalog_save")
+@receiver(post_delete, sender=EBooksModel, dispatch_uid="library_web_catalog_delete")
+def invalidate_catalog_snapshot(instance, **_kwargs):
+    """Drop the cached catalog snapshot whenever a book changes."""
+    invalidate_catalog(instance.pk)
+
+
+@receiver(post_save, sender=EBooksModel, dispatch_uid="library_web_search_save")
+def index_book(instance, **_kwargs):
+    """Keep the search and autocomplete indexes up to date for a saved book."""
+    get_search_backend().index(instance)
+    suggest_index.add(instance)
+    bump_state(SUGGEST_STATE, instance.pk)
+
+
+@receiver(post_delete, sender=EBooksModel, dispatch_uid="library_web_search_delete")
+def unindex_book(instance, **_kwargs):
+    """Remove a deleted book from the search and autocomplete indexes."""
+    get_search_backend().remove(instance.pk)
+    suggest_index.remove(instance.pk)
+    bump_state(SUGGEST_STATE, instance.pk)
+
+
+@receiver(post_save, sender=EBooksModel, dispatch_uid="library_web_card_save")
+@receiver(post_delete, sender=EBooksModel, dispatch_uid="library_web_card_delete")
+def drop_book_card(instance, **_kwargs):
+    """Evict the cached card fragment of the book's previous version.
+
+    Fragment keys include the version, so a stale card is never served;
+    this only frees the space it used.
+    """
+    versions = [instance.version - 1, instance.version]
+    cache.delete_many([make_template_fragment_key("book_card", [instance.pk, v]) for v in versions])
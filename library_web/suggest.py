@@ -0,0 +1,180 @@
+"""In-memory prefix index for search autocomplete.
+
+Titles and authors are kept in a sorted array of normalized keys and
+answered with ``bisect``. The index is loaded when the WSGI or ASGI
+application is imported, before gunicorn forks its workers. Model signals
+patch the index in place and bump its own change counter, which only moves
+when a book is saved, deleted or imported, not on borrows or returns. Each
+process runs a watcher thread that checks the counter every
+``REFRESH_SECONDS`` and rebuilds the index when another process changed a
+book, so answering a keystroke never touches the database; until the first
+load finishes, requests get no suggestions.
+"""
+# pylint: disable=no-member
+
+import bisect
+import logging
+import os
+import re
+import threading
+import time
+
+from django.db import DatabaseError, connection
+
+from library_web.catalog import read_state
+from library_web.models import EBooksModel
+
+logger = logging.getLogger(__name__)
+
+MIN_PREFIX = 2
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+# Upper bound on entries scanned per returned suggestion, so a prefix shared
+# by thousands of books by one author stays cheap.
+SCAN_FACTOR = 50
+# Shared counter of changes to indexed titles and authors.
+SUGGEST_STATE = "suggest"
+# How often each process's watcher thread checks that counter.
+REFRESH_SECONDS = 1.0
+
+
+def normalize(text):
+    """Lowercase ``text`` and collapse whitespace for prefix matching."""
+    return " ".join(re.findall(r"\w+", (text or "").lower()))
+
+
+def _book_entries(book_id, title, author):
+    """Return the ``(key, kind, text, book_id)`` entries for one book.
+
+    Titles are indexed from every word so "python" finds "Advanced Python".
+    """
+    entries = []
+    words = normalize(title).split()
+    for i in range(len(words)):
+        entries.append((" ".join(words[i:]), "title", title, book_id))
+    if normalize(author):
+        entries.append((normalize(author), "author", author, book_id))
+    return entries
+
+
+class SuggestIndex:
+    """Sorted-array prefix index over book titles and authors."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = []
+        self._keys = []
+        self._by_book = {}
+        self.generation = None
+        self._watcher_pid = None
+
+    def load(self):
+        """Build the whole index from the books table."""
+        generation = read_state(SUGGEST_STATE)[0]
+        # From the primary, which the counter read above also came from.
+        rows = EBooksModel.objects.using("default").values_list("id", "title", "author").iterator(chunk_size=2000)
+        by_book = {}
+        entries = []
+        for book_id, title, author in rows:
+            by_book[book_id] = _book_entries(book_id, title, author)
+            entries.extend(by_book[book_id])
+        entries.sort()
+
+        with self._lock:
+            self._entries = entries
+            self._keys = [entry[0] for entry in entries]
+            self._by_book = by_book
+            self.generation = generation
+
+    @property
+    def loaded(self):
+        """Whether the index has been built at least once."""
+        return self.generation is not None
+
+    def warm(self):
+        """Load at process start, leaving the index lazy if the DB is not ready."""
+        try:
+            self.load()
+        except DatabaseError:
+            logger.warning("Autocomplete index not loaded at startup", exc_info=True)
+
+    def _remove_locked(self, book_id):
+        for entry in self._by_book.pop(book_id, []):
+            i = bisect.bisect_left(self._entries, entry)
+            if i < len(self._entries) and self._entries[i] == entry:
+                del self._entries[i]
+                del self._keys[i]
+
+    def add(self, book):
+        """Insert or refresh one book."""
+        with self._lock:
+            self._remove_locked(book.pk)
+            entries = _book_entries(book.pk, book.title, book.author)
+            for entry in entries:
+                i = bisect.bisect_left(self._entries, entry)
+                self._entries.insert(i, entry)
+                self._keys.insert(i, entry[0])
+            self._by_book[book.pk] = entries
+
+    def remove(self, book_id):
+        """Drop one book."""
+        with self._lock:
+            self._remove_locked(book_id)
+
+    def refresh(self):
+        """Rebuild the index if the shared change counter moved since the last load.
+
+        The counter also moves for this process's own patches, so each
+        change is followed by one rebuild here too.
+        """
+        if self.generation != read_state(SUGGEST_STATE)[0]:
+            self.load()
+
+    def _watch(self):
+        while True:
+            try:
+                self.refresh()
+            except DatabaseError:
+                logger.warning("Autocomplete index not refreshed", exc_info=True)
+            finally:
+                # Hold no connection between checks, nor across a fork.
+                connection.close()
+            time.sleep(REFRESH_SECONDS)
+
+    def watch(self):
+        """Start this process's watcher thread unless it is already running.
+
+        Threads do not survive a fork, so each worker starts its own.
+        """
+        with self._lock:
+            if self._watcher_pid == os.getpid():
+                return
+            self._watcher_pid = os.getpid()
+        threading.Thread(target=self._watch, name="suggest-index-watcher", daemon=True).start()
+
+    def suggest(self, prefix, limit=DEFAULT_LIMIT):
+        """Return up to ``limit`` distinct title/author matches for ``prefix``."""
+        self.watch()
+        if not self.loaded:
+            return []
+
+        key = normalize(prefix)
+        if len(key) < MIN_PREFIX:
+            return []
+        limit = min(limit, MAX_LIMIT)
+
+        seen = set()
+        results = []
+        with self._lock:
+            i = bisect.bisect_left(self._keys, key)
+            end = min(len(self._keys), i + limit * SCAN_FACTOR)
+            while i < end and len(results) < limit and self._keys[i].startswith(key):
+                _, kind, text, book_id = self._entries[i]
+                if (kind, text) not in seen:
+                    seen.add((kind, text))
+                    results.append({"text": text, "kind": kind, "book_id": book_id})
+                i += 1
+        return results
+
+
+suggest_index = SuggestIndex()
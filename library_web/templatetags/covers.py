@@ -0,0 +1,29 @@
+"""Template tags for responsive book covers."""
+
+from django import template
+from django.utils.html import format_html
+
+from library_web.thumbnails import srcsets
+
+register = template.Library()
+
+
+@register.simple_tag
+def cover_image(book, sizes="300px", css_class="", style=""):
+    """Render ``book``'s cover as a ``<picture>`` with WebP and JPEG srcsets.
+
+    Books without renditions fall back to the original upload.
+    """
+    sets = srcsets(book)
+    img = format_html(
+        '<img src="{}"{} sizes="{}" alt="{}" class="{}" style="{}" loading="lazy" decoding="async">',
+        book.image.url,
+        format_html(' srcset="{}"', sets["image/jpeg"]) if "image/jpeg" in sets else "",
+        sizes, book.title, css_class, style,
+    )
+    if "image/webp" not in sets:
+        return img
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">{}</picture>',
+        sets["image/webp"], sizes, img,
+    )
@@ -0,0 +1,89 @@
+"""Test cases for the admin changelists."""
+# pylint: disable=no-member
+
+from datetime import date, timedelta
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from library_web import admin as library_admin
+from library_web.models import EBooksModel, BorrowRecord
+
+User = get_user_model()
+
+
+class AdminChangelistTest(TestCase):
+    """Test cases for the BorrowRecord and EBooksModel admins."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.superuser = User.objects.create_superuser(
+            username="boss", email="boss@example.com", password="pass"
+        )
+        self.client.force_login(self.superuser)
+        self.url = reverse("admin:library_web_borrowrecord_changelist")
+        self.add_loans(6)
+
+    def add_loans(self, count):
+        """Create ``count`` books, each with one loan; the first two are overdue."""
+        today = date.today()
+        start = EBooksModel.objects.count()
+        for i in range(start, start + count):
+            book = EBooksModel.objects.create(
+                title=f"Admin {'Garden' if i % 2 else 'River'} {i}", author="A",
+                category="Fiction" if i % 3 else "Science", image="books/x.png",
+            )
+            BorrowRecord.objects.create(
+                student_id=f"s{i}", user=self.superuser, book=book, borrow_date=today,
+                return_date=today - timedelta(days=1) if i < 2 else today + timedelta(days=7),
+                actual_return_date=today if i == 5 else None,
+            )
+
+    def changelist(self, url, params=None):
+        """Return ``(response, query count)`` for one changelist request."""
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return response, len(captured)
+
+    def test_record_changelist_queries_do_not_grow_with_rows(self):
+        """Test book titles come from the join, not one query per row."""
+        response, before = self.changelist(self.url)
+        self.assertContains(response, "Admin River 0")
+        self.add_loans(10)
+        _, after = self.changelist(self.url)
+        self.assertEqual(before, after)
+
+    def test_state_and_category_filters(self):
+        """Test the open, overdue and category filters."""
+        response, _ = self.changelist(self.url, {"state": "overdue"})
+        self.assertEqual(response.context["cl"].result_count, 2)
+        response, _ = self.changelist(self.url, {"state": "returned"})
+        self.assertEqual(response.context["cl"].result_count, 1)
+        response, _ = self.changelist(self.url, {"category": "Science"})
+        self.assertEqual(response.context["cl"].result_count, 2)
+
+    def test_search_uses_site_index(self):
+        """Test admin search matches title prefixes through the search backend."""
+        response, _ = self.changelist(self.url, {"q": "gard"})
+        self.assertEqual(response.context["cl"].result_count, 3)
+        books_url = reverse("admin:library_web_ebooksmodel_changelist")
+        response, _ = self.changelist(books_url, {"q": "river"})
+        self.assertEqual(response.context["cl"].result_count, 3)
+
+    def test_estimated_count_for_large_unfiltered_lists(self):
+        """Test the paginator uses the ANALYZE estimate past the threshold."""
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        self.assertEqual(library_admin.estimated_count(BorrowRecord), 6)
+
+        original = library_admin.ESTIMATE_THRESHOLD
+        library_admin.ESTIMATE_THRESHOLD = 1
+        self.addCleanup(setattr, library_admin, "ESTIMATE_THRESHOLD", original)
+        self.add_loans(2)
+        response, _ = self.changelist(self.url)
+        # The stale estimate is shown instead of counting the table again.
+        self.assertEqual(response.context["cl"].result_count, 6)
+        response, _ = self.changelist(self.url, {"state": "open"})
+        self.assertEqual(response.context["cl"].result_count, 7)
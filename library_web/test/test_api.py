@@ -0,0 +1,123 @@
+"""Test cases for the read-only JSON API."""
+# pylint: disable=no-member
+
+import json
+from datetime import date
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from library_web.models import EBooksModel, BorrowRecord
+
+User = get_user_model()
+
+
+def read(response):
+    """Return the decoded JSON body of a plain or streamed response."""
+    body = b"".join(response) if response.streaming else response.content
+    return json.loads(body)
+
+
+class BookApiTest(TestCase):
+    """Test cases for the book endpoints."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.books = [
+            EBooksModel.objects.create(
+                title=f"Api Book {i}", author=f"Author {i}", category="Fiction" if i % 2 else "Science",
+                rating=i % 5, is_borrowed=i == 3, image="books/x.png",
+            )
+            for i in range(7)
+        ]
+        self.url = reverse("api_book_list")
+
+    def test_sparse_fieldset_streams_only_requested_fields(self):
+        """Test ?fields= limits every row to the named fields."""
+        response = self.client.get(self.url, {"fields": "title,author"})
+        self.assertTrue(response.streaming)
+        data = read(response)
+        self.assertEqual(len(data["results"]), 7)
+        self.assertEqual(set(data["results"][0]), {"title", "author"})
+        self.assertIsNone(data["next"])
+
+    def test_keyset_pages_cover_every_book_once(self):
+        """Test following next tokens walks the whole list without overlap."""
+        seen, after = [], None
+        while True:
+            params = {"fields": "id", "limit": 3, "ordering": "rating"}
+            if after:
+                params["after"] = after
+            data = read(self.client.get(self.url, params))
+            seen += [row["id"] for row in data["results"]]
+            after = data["next"]
+            if not after:
+                break
+        self.assertEqual(sorted(seen), sorted(book.id for book in self.books))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_filters(self):
+        """Test category, rating and availability filters."""
+        data = read(self.client.get(self.url, {"category": "Fiction", "available": "true"}))
+        self.assertEqual([row["title"] for row in data["results"]], ["Api Book 1", "Api Book 5"])
+        data = read(self.client.get(self.url, {"min_rating": 4, "fields": "rating"}))
+        self.assertEqual([row["rating"] for row in data["results"]], [4])
+
+    def test_list_query_count(self):
+        """Test a page is one query however many rows it has."""
+        with self.assertNumQueries(1):
+            read(self.client.get(self.url, {"limit": 100}))
+
+    def test_detail(self):
+        """Test the detail endpoint and its 404."""
+        book = self.books[0]
+        data = read(self.client.get(reverse("api_book_detail", args=[book.id])))
+        self.assertEqual(data["book_id"], book.book_id)
+        self.assertTrue(data["image"].endswith("books/x.png"))
+        response = self.client.get(reverse("api_book_detail", args=[999999]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_bad_parameters(self):
+        """Test unknown fields, bad flags and bad cursors are JSON 400s."""
+        for params in ({"fields": "title,password"}, {"available": "maybe"},
+                       {"after": "!!"}, {"ordering": "title"}, {"rating": "x"}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn("error", read(response))
+
+
+class RecordApiTest(TestCase):
+    """Test cases for the borrow record endpoints."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.reader = User.objects.create_user(username="reader", email="r@example.com", password="pass")
+        self.other = User.objects.create_user(username="other", email="o@example.com", password="pass")
+        self.admin = User.objects.create_user(username="admin", email="a@example.com", password="pass")
+        book = EBooksModel.objects.create(title="Loaned", author="A", category="Fiction", image="books/x.png")
+        self.mine = BorrowRecord.objects.create(
+            student_id="s1", user=self.reader, book=book, borrow_date=date.today()
+        )
+        self.theirs = BorrowRecord.objects.create(
+            student_id="s2", user=self.other, book=book, borrow_date=date.today(),
+            actual_return_date=date.today(),
+        )
+
+    def test_requires_login(self):
+        """Test anonymous callers get a JSON 401."""
+        self.assertEqual(self.client.get(reverse("api_record_list")).status_code, 401)
+
+    def test_readers_only_see_their_own_records(self):
+        """Test non-admins are limited to their own loans."""
+        self.client.force_login(self.reader)
+        data = read(self.client.get(reverse("api_record_list")))
+        self.assertEqual([row["id"] for row in data["results"]], [self.mine.id])
+        response = self.client.get(reverse("api_record_detail", args=[self.theirs.id]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_admin_sees_all_and_filters_open(self):
+        """Test admins read every record and can filter on open loans."""
+        self.client.force_login(self.admin)
+        data = read(self.client.get(reverse("api_record_list")))
+        self.assertEqual([row["id"] for row in data["results"]], [self.theirs.id, self.mine.id])
+        data = read(self.client.get(reverse("api_record_list"), {"open": "true", "fields": "late_fee"}))
+        self.assertEqual(data["results"], [{"late_fee": "0.00"}])
@@ -0,0 +1,201 @@
+"""Test cases for the async catalog views and the sync/async serving benchmark."""
+# pylint: disable=no-member
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import async_to_sync
+from django.core.files.storage import FileSystemStorage
+from django.core.handlers.asgi import ASGIHandler
+from django.test import AsyncClient, Client, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from library_web import search
+from library_web.catalog import invalidate_catalog
+from library_web.models import EBooksModel
+
+ASGI_URLCONF = "Library_project.asgi_urls"
+# Benchmark shape: a gthread worker's thread count, the requests in flight
+# against the ASGI worker, and the injected delay per storage call.
+SYNC_THREADS = 4
+ASYNC_CONCURRENCY = 32
+REQUESTS = int(os.environ.get("LIBRARY_SERVING_REQUESTS", "64"))
+STORAGE_LATENCY = float(os.environ.get("LIBRARY_STORAGE_LATENCY_MS", "5")) / 1000
+TIMING = os.environ.get("LIBRARY_BENCHMARK_TIMING") == "1"
+# Thread scheduling makes single runs noisy; only flag a clear loss.
+RATE_TOLERANCE = 0.25
+
+
+class LatencyStorage(FileSystemStorage):
+    """File storage whose URL lookups take as long as a remote call."""
+
+    def __init__(self, latency=0, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+
+    def url(self, name):
+        time.sleep(self.latency)
+        return super().url(name)
+
+
+def add_books(count):
+    """Create ``count`` books and return the first."""
+    books = [
+        EBooksModel.objects.create(
+            title=f"Async Garden {i}", author="A", category="Fiction", image="books/x.png"
+        )
+        for i in range(count)
+    ]
+    return books[0]
+
+
+async def async_get(url):
+    """GET ``url`` with a fresh AsyncClient."""
+    return await AsyncClient().get(url)
+
+
+@override_settings(ROOT_URLCONF=ASGI_URLCONF)
+class AsyncViewTest(TestCase):
+    """Test the async views answer exactly like their sync versions."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.book = add_books(3)
+        self.addCleanup(invalidate_catalog)
+
+    def compare(self, url):
+        """Return the async response after checking it matches the sync one."""
+        under_wsgi = self.client.get(url)
+        with override_settings(ROOT_URLCONF="Library_project.urls"):
+            expected = Client().get(url)
+        response = async_to_sync(async_get)(url)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(response.headers.get("ETag"), expected.headers.get("ETag"))
+        self.assertEqual(under_wsgi.content, expected.content)
+        return response
+
+    def test_pages_match_sync_views(self):
+        """Test home, book and search pages render the same bytes and ETag."""
+        self.assertContains(self.compare(reverse("home")), "Async Garden 0")
+        self.assertContains(self.compare(reverse("viewBook", args=[self.book.pk])), "Async Garden 0")
+        self.assertContains(self.compare(reverse("search_books") + "?q=garden"), "Async Garden 2")
+        self.assertContains(self.compare(reverse("search_books") + "?limit=2"), "Async Garden 1")
+
+    def test_not_found_and_bad_cursor(self):
+        """Test missing books are 404s and bad page tokens 400s."""
+        self.compare(reverse("viewBook", args=[self.book.pk + 100]))
+        response = self.compare(reverse("search_books") + "?after=bogus")
+        self.assertEqual(response.status_code, 400)
+
+    async def test_search_in_a_fresh_process(self):
+        """Test the first search of a new worker detects its backend off the event loop."""
+        detected = search._detected["backend"]
+        search._detected["backend"] = None
+        self.addCleanup(search._detected.__setitem__, "backend", detected)
+        response = await self.async_client.get(reverse("search_books") + "?q=garden")
+        self.assertContains(response, "Async Garden 2")
+
+    async def test_conditional_get_and_methods(self):
+        """Test a matching ETag gets a 304 and other methods a 405."""
+        url = reverse("viewBook", args=[self.book.pk])
+        response = await self.async_client.get(url)
+        again = await self.async_client.get(url, headers={"if-none-match": response["ETag"]})
+        self.assertEqual(again.status_code, 304)
+        response = await self.async_client.put(url)
+        self.assertEqual(response.status_code, 405)
+
+
+def sync_throughput(urls):
+    """Return requests per second for ``urls`` on a pool of SYNC_THREADS threads."""
+    def fetch(url):
+        return Client().get(url).status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(SYNC_THREADS) as pool:
+        statuses = list(pool.map(fetch, urls))
+    return len(urls) / (time.perf_counter() - start), statuses
+
+
+async def asgi_get(handler, url):
+    """Serve GET ``url`` through ``handler`` as an ASGI server would; return the status."""
+    path, _, query = url.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": query.encode(), "headers": [(b"host", b"testserver")],
+        "client": ("127.0.0.1", 0), "server": ("testserver", 80),
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await handler(scope, receive, send)
+    return messages[0]["status"]
+
+
+async def async_throughput(urls):
+    """Return requests per second for ``urls`` with ASYNC_CONCURRENCY in flight."""
+    handler = ASGIHandler()
+    slots = asyncio.Semaphore(ASYNC_CONCURRENCY)
+
+    async def fetch(url):
+        async with slots:
+            return await asgi_get(handler, url)
+
+    start = time.perf_counter()
+    statuses = await asyncio.gather(*(fetch(url) for url in urls))
+    return len(urls) / (time.perf_counter() - start), statuses
+
+
+class ServingBenchmarkTest(TransactionTestCase):
+    """Compare a threaded WSGI worker with the ASGI views on slow storage.
+
+    Every uncached cover URL costs STORAGE_LATENCY, standing in for S3.
+    With ``LIBRARY_BENCHMARK_TIMING=1`` the rates are printed and the async
+    views must keep up with the threaded sync views, within RATE_TOLERANCE.
+    """
+
+    def setUp(self):
+        """Set up test data."""
+        self.book = add_books(12)
+        # Flushing skips the search index, so delete through the ORM.
+        self.addCleanup(EBooksModel.objects.all().delete)
+        storages = {
+            "default": {
+                "BACKEND": f"{__name__}.LatencyStorage",
+                "OPTIONS": {"latency": STORAGE_LATENCY},
+            },
+            "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+        }
+        storage_settings = override_settings(STORAGES=storages)
+        storage_settings.enable()
+        self.addCleanup(storage_settings.disable)
+
+    def test_sync_and_async_throughput(self):
+        """Test both serving modes answer every request; optionally compare them."""
+        pages = [
+            reverse("home"),
+            reverse("viewBook", args=[self.book.pk]),
+            reverse("search_books") + "?q=garden",
+        ]
+        urls = [pages[i % len(pages)] for i in range(REQUESTS)]
+
+        sync_rate, sync_statuses = sync_throughput(urls)
+        # An event loop in a fresh thread, as under an ASGI server: inside
+        # async_to_sync every request's sync work would queue on this thread.
+        with override_settings(ROOT_URLCONF=ASGI_URLCONF), ThreadPoolExecutor(1) as loop_thread:
+            async_rate, async_statuses = loop_thread.submit(
+                asyncio.run, async_throughput(urls)
+            ).result()
+
+        self.assertEqual(set(sync_statuses), {200})
+        self.assertEqual(set(async_statuses), {200})
+        if TIMING:
+            rates = f"sync {sync_rate:.0f} req/s, async {async_rate:.0f} req/s"
+            print(rates)
+            self.assertGreaterEqual(async_rate, sync_rate * (1 - RATE_TOLERANCE), rates)
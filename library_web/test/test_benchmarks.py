@@ -0,0 +1,257 @@
+"""Query-count, latency and page-size regression benchmarks for every view.
+
+Each run seeds a deterministic catalog with borrow history, requests every
+route in ``library_web/urls.py`` through the test client and compares the
+numbers with ``benchmark_baseline.json``:
+
+* query counts may never grow, and must not depend on the catalog size;
+* response sizes may grow by at most ``SIZE_TOLERANCE``;
+* with ``LIBRARY_BENCHMARK_TIMING=1``, median wall time may grow by at
+  most ``TIME_TOLERANCE`` (plus ``TIME_SLACK_MS`` for noise).
+
+The default run seeds 1k books. A full run is::
+
+    LIBRARY_BENCHMARK_SIZES=1000,10000,100000 LIBRARY_BENCHMARK_TIMING=1 \\
+        python -m pytest library_web/test/test_benchmarks.py
+
+and ``LIBRARY_BENCHMARK_UPDATE=1`` rewrites the baseline from the run.
+"""
+# pylint: disable=no-member
+
+import json
+import os
+import statistics
+import time
+from datetime import date, timedelta
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from library_web import urls
+from library_web.catalog import invalidate_catalog
+from library_web.loans import repair_drift
+from library_web.models import BookCopy, EBooksModel, BorrowRecord, LoanSummary
+from library_web.search import get_search_backend
+from library_web.suggest import suggest_index
+
+User = get_user_model()
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "benchmark_baseline.json")
+SIZES = [int(s) for s in os.environ.get("LIBRARY_BENCHMARK_SIZES", "1000").split(",")]
+TIMING = os.environ.get("LIBRARY_BENCHMARK_TIMING") == "1"
+UPDATE = os.environ.get("LIBRARY_BENCHMARK_UPDATE") == "1"
+REPEAT = 5
+SIZE_TOLERANCE = 0.10
+TIME_TOLERANCE = 0.50
+TIME_SLACK_MS = 5.0
+READER_OPEN_LOANS = 5
+CATEGORIES = ["Education", "Fiction", "Science", "NonFriction"]
+WORDS = ["river", "garden", "python", "history", "stars", "ocean", "winter", "engine"]
+
+
+def seed_catalog(size):
+    """Seed ``size`` books, a reader with loan history and the admin user."""
+    EBooksModel.objects.bulk_create(
+        (
+            EBooksModel(
+                book_id=f"BENCH-{i}",
+                title=f"{WORDS[i % 8].title()} {WORDS[i * 7 % 8]} volume {i}",
+                subtitle=f"Part {i % 12}",
+                author=f"Author {i % 300}",
+                publisher="Bench Press",
+                description=" ".join(WORDS[i * k % 8] for k in (1, 3, 5)),
+                category=CATEGORIES[i % 4],
+                image="books/bench.jpeg",
+                rating=i % 6,
+                borrow_count=i % 97,
+                is_borrowed=i % 50 == 0,
+            )
+            for i in range(size)
+        ),
+        batch_size=5000,
+    )
+    reader = User.objects.create_user(username="reader", email="r@example.com", password="pass")
+    member = User.objects.create_user(username="member", email="m@example.com", password="pass")
+    User.objects.create_user(username="admin", email="a@example.com", password="pass", is_staff=True)
+
+    # Every 50th book is out on loan, READER_OPEN_LOANS of them to the reader,
+    # and the reader returned one book for every 25 in the catalog.
+    today = date.today()
+    books = list(EBooksModel.objects.order_by("id").values_list("id", "is_borrowed"))
+    BookCopy.objects.bulk_create(
+        (BookCopy(book_id=book_id, number=1) for book_id, _ in books), batch_size=5000
+    )
+    copies = dict(BookCopy.objects.values_list("book_id", "id"))
+    history = [
+        BorrowRecord(
+            student_id="bench", user=reader, book_id=book_id, tracking_code=f"BENCH-{n}",
+            borrow_date=today - timedelta(days=30), return_date=today - timedelta(days=16),
+            actual_return_date=today - timedelta(days=15), late_fee=8,
+        )
+        for n, (book_id, _) in enumerate(books[1::25])
+    ]
+    open_loans = [
+        BorrowRecord(
+            student_id="bench", user=reader if n < READER_OPEN_LOANS else member,
+            book_id=book_id, copy_id=copies[book_id], tracking_code=f"BENCH-OPEN-{book_id}",
+            borrow_date=today, return_date=today + timedelta(days=14),
+        )
+        for n, book_id in enumerate(book_id for book_id, borrowed in books if borrowed)
+    ]
+    BorrowRecord.objects.bulk_create(history + open_loans, batch_size=5000)
+    # Point the lent copies at their open records and count the free ones,
+    # as borrows would have.
+    repair_drift()
+    reader_open = min(READER_OPEN_LOANS, len(open_loans))
+    LoanSummary.objects.create(
+        user=reader, open_loans=reader_open,
+        total_loans=len(history) + reader_open, fees_charged=8 * len(history),
+    )
+
+    get_search_backend().rebuild()
+    invalidate_catalog()
+    suggest_index.load()
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+
+def benchmark_cases():
+    """Return ``(name, url, username)`` for every route, on mid-catalog objects."""
+    book = EBooksModel.objects.filter(is_borrowed=False).order_by("id")[
+        EBooksModel.objects.count() // 4
+    ]
+    borrowed = EBooksModel.objects.filter(is_borrowed=True).order_by("id").first()
+    record = BorrowRecord.objects.filter(user__username="reader").order_by("id").first()
+    return [
+        ("home", reverse("home"), None),
+        ("register", reverse("register"), None),
+        ("login", reverse("login"), None),
+        ("logout", reverse("logout"), "reader"),
+        ("explore", reverse("explore"), None),
+        ("book_section", reverse("book_section", args=["fiction"]), None),
+        ("addBook", reverse("addBook"), "admin"),
+        ("editBook", reverse("editBook", args=[book.id]), "admin"),
+        ("deleteBook", reverse("deleteBook", args=[book.id]), "admin"),
+        ("borrow_book", reverse("borrow_book", args=[book.id]), "reader"),
+        ("viewBook", reverse("viewBook", args=[book.id]), None),
+        ("return_book", reverse("return_book", args=[borrowed.id]), "admin"),
+        ("search_books", reverse("search_books") + "?q=garden+eng", None),
+        ("search_suggest", reverse("search_suggest") + "?q=gar", None),
+        ("my_loans", reverse("my_loans"), "reader"),
+        ("my_loans_api", reverse("my_loans_api"), "reader"),
+        ("api_book_list", reverse("api_book_list") + "?category=Fiction&available=true", None),
+        ("api_book_detail", reverse("api_book_detail", args=[book.id]), None),
+        ("api_record_list", reverse("api_record_list") + "?open=true", "admin"),
+        ("api_record_detail", reverse("api_record_detail", args=[record.id]), "reader"),
+        ("export", reverse("export", args=["loans"]) + "?format=jsonl&gzip=1", "admin"),
+        ("metrics", reverse("metrics"), "admin"),
+    ]
+
+
+def measure(url, username):
+    """Return query count, median wall time and size for GET ``url``.
+
+    Every request runs in a rolled-back savepoint, so views that change
+    data (logout, return) are measured against the same state each time.
+    """
+    client = Client()
+    if username:
+        client.force_login(User.objects.get(username=username))
+
+    timings = []
+    for run in range(REPEAT + 1):
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = client.get(url)
+                # Streamed bodies run their queries while being consumed.
+                content = b"".join(response) if response.streaming else response.content
+                elapsed = (time.perf_counter() - start) * 1000
+            transaction.set_rollback(True)
+        # The first request warms process caches (snapshot, autocomplete).
+        if run:
+            timings.append(elapsed)
+    return {
+        "status": response.status_code,
+        "queries": len(captured),
+        "ms": round(statistics.median(timings), 2),
+        "bytes": len(content),
+    }
+
+
+def regressions(size, results, baseline):
+    """Return a message for every metric that regressed against ``baseline``."""
+    failures = []
+    for name, now in results.items():
+        before = baseline.get(name)
+        if before is None:
+            failures.append(f"{size}/{name}: no baseline")
+            continue
+        if now["queries"] > before["queries"]:
+            failures.append(f"{size}/{name}: {now['queries']} queries, baseline {before['queries']}")
+        if now["bytes"] > before["bytes"] * (1 + SIZE_TOLERANCE):
+            failures.append(f"{size}/{name}: {now['bytes']} bytes, baseline {before['bytes']}")
+        if TIMING and now["ms"] > before["ms"] * (1 + TIME_TOLERANCE) + TIME_SLACK_MS:
+            failures.append(f"{size}/{name}: {now['ms']} ms, baseline {before['ms']}")
+    return failures
+
+
+class ViewBenchmarkTest(TestCase):
+    """Benchmark every route at each configured catalog size."""
+
+    def setUp(self):
+        """Set up test data."""
+        # Seeded rows are rolled back, but process caches outlive them.
+        self.addCleanup(suggest_index.load)
+        self.addCleanup(invalidate_catalog)
+        # The watcher thread would reload from outside the test transaction.
+        watch = mock.patch.object(suggest_index, "watch")
+        watch.start()
+        self.addCleanup(watch.stop)
+
+    def test_every_route_is_benchmarked(self):
+        """Test new routes cannot skip the benchmark."""
+        names = {p.name for p in get_resolver(urls).url_patterns if getattr(p, "name", None)}
+        with transaction.atomic():
+            seed_catalog(60)
+            cases = {name for name, _, _ in benchmark_cases()}
+            transaction.set_rollback(True)
+        self.assertEqual(names, cases)
+
+    def test_views_against_baseline(self):
+        """Test no view regressed in queries, size or (opt-in) latency."""
+        try:
+            with open(BASELINE_PATH, encoding="utf-8") as handle:
+                baseline = json.load(handle)
+        except FileNotFoundError:
+            baseline = {}
+
+        runs = {}
+        for size in SIZES:
+            with transaction.atomic():
+                seed_catalog(size)
+                runs[str(size)] = {
+                    name: measure(url, username) for name, url, username in benchmark_cases()
+                }
+                transaction.set_rollback(True)
+
+        for results in runs.values():
+            for name, result in results.items():
+                self.assertLess(result["status"], 400, name)
+        # Query counts that grow with the catalog are N+1s or unbounded loops.
+        counts = {size: {n: r["queries"] for n, r in res.items()} for size, res in runs.items()}
+        self.assertEqual(len({json.dumps(c, sort_keys=True) for c in counts.values()}), 1, counts)
+
+        if UPDATE:
+            baseline.update(runs)
+            with open(BASELINE_PATH, "w", encoding="utf-8") as handle:
+                json.dump(baseline, handle, indent=2, sort_keys=True)
+                handle.write("\n")
+            return
+
+        failures = []
+        for size, results in runs.items():
+            failures += regressions(size, results, baseline.get(size, {}))
+        self.assertEqual(failures, [])
@@ -0,0 +1,60 @@
+"""Test cases for cached book card fragments."""
+# pylint: disable=no-member
+
+from datetime import date, timedelta
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.test import TestCase, RequestFactory
+from library_web import loans
+from library_web.models import EBooksModel, BorrowRecord
+
+User = get_user_model()
+
+
+class BookCardCacheTest(TestCase):
+    """Test cases for the per-version card fragment."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.book = EBooksModel.objects.create(
+            title="Cached Title", author="A", category="Fiction", image="books/x.png"
+        )
+        self.superuser = User.objects.create_superuser(
+            username="boss", email="boss@example.com", password="pass"
+        )
+
+    def render_card(self, user=None):
+        """Render one card as ``user`` (anonymous by default)."""
+        request = RequestFactory().get("/")
+        request.user = user or AnonymousUser()
+        return render_to_string("book_card.html", {"book": self.book}, request=request)
+
+    def test_fragment_is_reused_until_version_changes(self):
+        """Test an unsaved edit is not rendered until the row version moves."""
+        self.render_card()
+        self.book.title = "Unsaved Title"
+        self.assertIn("Cached Title", self.render_card())
+
+        self.book.save()
+        html = self.render_card()
+        self.assertIn("Unsaved Title", html)
+        self.assertNotIn("Cached Title", html)
+
+    def test_user_dependent_buttons_are_not_cached(self):
+        """Test admin controls follow the viewer, not whoever filled the cache."""
+        self.assertIn("Edit", self.render_card(self.superuser))
+        self.assertNotIn("Edit", self.render_card())
+
+    def test_borrow_state_is_current(self):
+        """Test borrowing bumps the version and flips the button."""
+        self.assertIn("Borrow", self.render_card())
+        version = self.book.version
+        loans.borrow(self.book, BorrowRecord(
+            student_id="x1", borrow_date=date.today(), return_date=date.today() + timedelta(days=7)
+        ))
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.version, version + 1)
+        self.assertIn("Place Hold", self.render_card())
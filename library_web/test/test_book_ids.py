@@ -0,0 +1,88 @@
+"""Test cases for book id allocation."""
+# pylint: disable=no-member
+
+import threading
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+from library_web.book_ids import (
+    InvalidBookId, allocate_book_ids, decode_book_id, encode_book_id
+)
+from library_web.models import EBooksModel
+from library_web.tests import create_test_image
+
+
+class BookIdEncodingTest(TestCase):
+    """Test cases for the base32 encoding and checksum."""
+
+    def test_round_trip(self):
+        """Test encoded ids decode to the same value."""
+        for value in (1, 31, 32, 37, 12345678, 32 ** 7 + 5):
+            self.assertEqual(decode_book_id(encode_book_id(value)), value)
+
+    def test_decoding_is_forgiving_about_case_and_lookalikes(self):
+        """Test lowercase and O/I/L lookalikes decode like the canonical form."""
+        book_id = encode_book_id(1)
+        self.assertEqual(decode_book_id(book_id.lower()), 1)
+        self.assertEqual(decode_book_id(book_id.replace("0", "O")), 1)
+
+    def test_checksum_rejects_typos(self):
+        """Test a changed digit or a legacy id is rejected."""
+        book_id = encode_book_id(12345678)
+        typo = book_id[:-3] + ("A" if book_id[-3] != "A" else "B") + book_id[-2:]
+        with self.assertRaises(InvalidBookId):
+            decode_book_id(typo)
+        with self.assertRaises(InvalidBookId):
+            decode_book_id("BOOK-1A2B3C")
+
+
+class BookIdAllocationTest(TestCase):
+    """Test cases for the sequence allocator."""
+
+    def test_blocks_are_contiguous_and_never_reused(self):
+        """Test consecutive blocks continue the same sequence."""
+        first = allocate_book_ids(3)
+        second = allocate_book_ids(2)
+        values = [decode_book_id(book_id) for book_id in first + second]
+        self.assertEqual(values, list(range(values[0], values[0] + 5)))
+
+    def test_save_assigns_id(self):
+        """Test a new book gets an allocated id."""
+        book = EBooksModel.objects.create(
+            title="Numbered", author="Author", category="Fiction", image=create_test_image()
+        )
+        decode_book_id(book.book_id)
+
+
+class ConcurrentAllocationTest(TransactionTestCase):
+    """Stress test parallel allocators."""
+
+    workers = 8
+    blocks = 5
+
+    def test_parallel_workers_never_collide(self):
+        """Test blocks reserved by concurrent workers do not overlap."""
+        barrier = threading.Barrier(self.workers)
+        allocated = []
+
+        def worker():
+            barrier.wait()
+            try:
+                for _ in range(self.blocks):
+                    while True:
+                        try:
+                            allocated.extend(allocate_book_ids(10))
+                            break
+                        except OperationalError:
+                            # SQLite reports lock contention instead of waiting.
+                            continue
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(allocated), self.workers * self.blocks * 10)
+        self.assertEqual(len(set(allocated)), len(allocated))
@@ -0,0 +1,170 @@
+"""Test cases for the tiered cache backend and the warm_cache command."""
+# pylint: disable=no-member
+
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from library_web import catalog
+from library_web.cache import SqliteCache, TieredCache, cache_stats, reset_cache_stats
+from library_web.models import CatalogState, EBooksModel
+
+
+def tiered(location, shared="", max_entries=300):
+    """Return a fresh ``TieredCache`` named ``location``."""
+    cache_backend = TieredCache(location, {"OPTIONS": {"MAX_ENTRIES": max_entries, "SHARED": shared}})
+    cache_backend.clear()
+    return cache_backend
+
+
+class TieredCacheTest(TestCase):
+    """Test cases for the local and shared tiers."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.addCleanup(reset_cache_stats)
+
+    def test_local_tier_counts_hits_misses_and_evictions(self):
+        """Test the LRU tier is bounded and its events are counted."""
+        local = tiered("test-lru", max_entries=4)
+        for i in range(4):
+            local.set(f"k{i}", i)
+        local.get("k0")
+        local.set("k4", 4)
+        local.get("missing")
+
+        stats = cache_stats()["test-lru"]
+        self.assertEqual(stats["local_hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertGreater(stats["evictions"], 0)
+        # The recently read key survives the cull.
+        self.assertEqual(local.get("k0"), 0)
+
+    def test_sqlite_tier_is_shared_between_instances(self):
+        """Test a second process sees writes through the SQLite tier."""
+        path = f"sqlite:{os.path.join(self.tmp, 'cache.sqlite3')}"
+        first = tiered("test-sqlite-a", path)
+        second = TieredCache("test-sqlite-b", {"OPTIONS": {"SHARED": path}})
+
+        first.set("greeting", {"hello": "world"})
+        self.assertEqual(second.get("greeting"), {"hello": "world"})
+        self.assertEqual(cache_stats()["test-sqlite-b"]["shared_hits"], 1)
+
+        self.assertTrue(first.add("counter", 1, timeout=None))
+        self.assertFalse(second.add("counter", 5))
+        self.assertEqual(second.incr("counter"), 2)
+        self.assertEqual(first.incr("counter", 3), 5)
+
+        second.delete("greeting")
+        first.local.clear()
+        self.assertIsNone(first.get("greeting"))
+
+    def test_file_tier(self):
+        """Test the file-based shared tier reads through."""
+        shared = f"file:{self.tmp}"
+        tiered("test-file-a", shared).set("key", "value")
+        other = TieredCache("test-file-b", {"OPTIONS": {"SHARED": shared}})
+        self.assertEqual(other.get("key"), "value")
+
+    def test_file_tier_incr_keeps_expiry(self):
+        """Test incrementing a key stored without a timeout keeps it forever."""
+        backend = tiered("test-file-incr", f"file:{self.tmp}")
+        backend.add("counter", 1, timeout=None)
+        self.assertEqual(backend.incr("counter"), 2)
+        backend.local.clear()
+        with mock.patch("time.time", return_value=time.time() + 10 * 365 * 86400):
+            self.assertEqual(backend.get("counter"), 2)
+
+    def test_sqlite_incr_missing_key(self):
+        """Test incr on a missing key raises ValueError like Django's backends."""
+        backend = SqliteCache(os.path.join(self.tmp, "c.sqlite3"), {})
+        with self.assertRaises(ValueError):
+            backend.incr("nope")
+
+    def test_unknown_shared_tier(self):
+        """Test a mistyped LIBRARY_CACHE_SHARED fails loudly."""
+        with self.assertRaises(ValueError):
+            TieredCache("test-bad", {"OPTIONS": {"SHARED": "redis:localhost"}})
+
+
+class WarmCacheCommandTest(TestCase):
+    """Test cases for the warm_cache management command."""
+
+    def setUp(self):
+        """Set up test data."""
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        shared = override_settings(CACHES={"default": {
+            "BACKEND": "library_web.cache.TieredCache",
+            "LOCATION": "test-warm",
+            "OPTIONS": {"SHARED": f"file:{tmp}"},
+        }})
+        shared.enable()
+        self.addCleanup(shared.disable)
+        self.addCleanup(catalog.invalidate_catalog)
+        EBooksModel.objects.create(title="Warm", author="A", category="Fiction", image="books/x.png")
+
+    def test_refuses_process_local_cache(self):
+        """Test warming a cache no worker can read is an error."""
+        with self.settings(CACHES={"default": {"BACKEND": "library_web.cache.TieredCache"}}):
+            with self.assertRaises(CommandError):
+                call_command("warm_cache", stdout=StringIO())
+
+    def test_warm_cache_stores_snapshot(self):
+        """Test the snapshot is stored for the current generation."""
+        out = StringIO()
+        call_command("warm_cache", stdout=out)
+
+        key = catalog.CATALOG_SNAPSHOT_KEY.format(catalog.catalog_generation())
+        self.assertEqual([b.title for b in cache.get(key)["all_books"]], ["Warm"])
+        self.assertIn("1 book cards", out.getvalue())
+
+    def test_other_process_reuses_stored_snapshot(self):
+        """Test a process with no local snapshot reads the cached one."""
+        catalog.get_catalog_snapshot()
+        catalog._snapshot["current"] = (None, None)  # pylint: disable=protected-access
+        # Only the generation is read from the database.
+        with self.assertNumQueries(1):
+            catalog.get_catalog_snapshot()
+
+
+class CatalogGenerationTest(TestCase):
+    """Test cases for the catalog generation shared between processes."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.book = EBooksModel.objects.create(
+            title="Before", author="A", category="Fiction", image="books/x.png"
+        )
+
+    def test_bump_from_another_process_refreshes_snapshot(self):
+        """Test a bump made with another process's cache reaches this one."""
+        self.assertEqual([b.title for b in catalog.get_catalog_snapshot()["all_books"]], ["Before"])
+
+        other_process = tiered("test-other-process")
+        EBooksModel.objects.filter(pk=self.book.pk).update(title="After")
+        with mock.patch.object(catalog, "cache", other_process):
+            catalog.invalidate_catalog()
+
+        self.assertEqual([b.title for b in catalog.get_catalog_snapshot()["all_books"]], ["After"])
+
+    def test_bumps_for_different_books_use_different_rows(self):
+        """Test each change moves the summed generation through its book's slot row."""
+        generation = catalog.catalog_generation()
+        slots = CatalogState.objects.filter(name__startswith=f"{catalog.CATALOG_STATE}:")
+        before = dict(slots.values_list("name", "generation"))
+        catalog.invalidate_catalog(1)
+        catalog.invalidate_catalog(2)
+        after = dict(slots.values_list("name", "generation"))
+        self.assertEqual(
+            {name for name in after if after[name] != before[name]},
+            {f"{catalog.CATALOG_STATE}:1", f"{catalog.CATALOG_STATE}:2"},
+        )
+        self.assertEqual(catalog.catalog_generation(), generation + 2)
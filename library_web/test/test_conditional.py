@@ -0,0 +1,88 @@
+"""Test cases for conditional GETs on catalog pages."""
+# pylint: disable=no-member
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from library_web import loans
+from library_web.models import EBooksModel, BorrowRecord
+
+User = get_user_model()
+
+
+class ConditionalGetTest(TestCase):
+    """Test cases for ETag, Last-Modified and Cache-Control."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.book = EBooksModel.objects.create(
+            title="Etag Book", author="A", category="Fiction", image="books/x.png"
+        )
+        self.user = User.objects.create_user(username="reader", email="r@example.com", password="pass")
+        self.url = reverse("viewBook", args=[self.book.id])
+
+    def test_anonymous_page_validators(self):
+        """Test anonymous pages carry both validators and a public policy."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["ETag"].startswith('W/"'))
+        self.assertIn("Last-Modified", response)
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn("Cookie", response["Vary"])
+
+    def test_if_none_match_returns_304_without_rendering(self):
+        """Test a matching ETag is answered from the state query alone."""
+        etag = self.client.get(self.url)["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+    def test_catalog_etag_is_one_state_lookup(self):
+        """Test a catalog page revalidates from the shared generation row alone."""
+        home = reverse("home")
+        etag = self.client.get(home)["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(home, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since(self):
+        """Test Last-Modified round-trips as If-Modified-Since."""
+        last_modified = self.client.get(self.url)["Last-Modified"]
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_invalidate_etag(self):
+        """Test edits, borrows and deletes all change the ETag."""
+        home = reverse("home")
+        etag = self.client.get(home)["ETag"]
+
+        record = BorrowRecord(student_id="s1", user=self.user)
+        loans.borrow(self.book, record)
+        self.assertEqual(self.client.get(home, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.client.get(home)["ETag"]
+        EBooksModel.objects.create(title="Other", author="B", category="Fiction", image="books/y.png")
+        EBooksModel.objects.filter(title="Other").delete()
+        self.assertEqual(self.client.get(home, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_authenticated_pages_are_private(self):
+        """Test logged-in pages are private and validated per user."""
+        anonymous_etag = self.client.get(self.url)["ETag"]
+        self.client.force_login(self.user)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=anonymous_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("private", response["Cache-Control"])
+        self.assertNotIn("Last-Modified", response)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+    def test_search_etag_depends_on_query(self):
+        """Test different searches get different ETags."""
+        first = self.client.get(reverse("search_books"), {"q": "etag"})["ETag"]
+        second = self.client.get(reverse("search_books"), {"q": "book"})["ETag"]
+        self.assertNotEqual(first, second)
+
+    def test_missing_book_is_404(self):
+        """Test the view still answers 404 for unknown books."""
+        self.assertEqual(self.client.get(reverse("viewBook", args=[999999])).status_code, 404)
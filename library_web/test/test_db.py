@@ -0,0 +1,96 @@
+"""Test cases for the database connection profiles."""
+
+import os
+import runpy
+import sqlite3
+import tempfile
+import threading
+import time
+from unittest import mock
+import django
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import SimpleTestCase
+from library_web.db import apply_sqlite_pragmas, sqlite_pragmas
+
+# How long the simulated borrow/return holds its write transaction.
+WRITE_HOLD = 0.3
+
+
+def read_latency(path, pragmas):
+    """Return how long a catalog read waits while a writer commits.
+
+    A writer thread takes the exclusive lock, as a committing borrow or
+    return does, and holds it for WRITE_HOLD seconds while the main
+    thread reads.
+    """
+    setup = sqlite3.connect(path)
+    apply_sqlite_pragmas(setup, pragmas)
+    setup.execute("CREATE TABLE books (id INTEGER PRIMARY KEY, is_borrowed INTEGER)")
+    setup.executemany("INSERT INTO books (is_borrowed) VALUES (?)", [(0,)] * 100)
+    setup.commit()
+    setup.close()
+
+    # The reader is connected up front, as a persistent connection would be.
+    reader = sqlite3.connect(path, timeout=5)
+    apply_sqlite_pragmas(reader, pragmas)
+    locked = threading.Event()
+
+    def write():
+        writer = sqlite3.connect(path, isolation_level=None)
+        apply_sqlite_pragmas(writer, pragmas)
+        writer.execute("BEGIN EXCLUSIVE")
+        writer.execute("UPDATE books SET is_borrowed = 1 WHERE id = 1")
+        locked.set()
+        time.sleep(WRITE_HOLD)
+        writer.execute("COMMIT")
+        writer.close()
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    locked.wait()
+    start = time.perf_counter()
+    reader.execute("SELECT COUNT(*) FROM books WHERE is_borrowed = 0").fetchone()
+    elapsed = time.perf_counter() - start
+    reader.close()
+    thread.join()
+    return elapsed
+
+
+class SqliteProfileTest(SimpleTestCase):
+    """Test cases for the pragmas applied to new SQLite connections."""
+
+    databases = {"default"}
+
+    def test_pragmas_applied_to_django_connections(self):
+        """Test new connections get the configured pragmas.
+
+        The test database lives in memory, which has no journal or mmap.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute("PRAGMA temp_store")
+            self.assertEqual(cursor.fetchone()[0], 2)  # MEMORY
+
+    def test_writes_do_not_stall_reads_in_wal_mode(self):
+        """Test a held write blocks readers under the rollback journal but not WAL."""
+        with tempfile.TemporaryDirectory() as tmp:
+            wal = read_latency(os.path.join(tmp, "wal.sqlite3"), sqlite_pragmas())
+            journal = read_latency(
+                os.path.join(tmp, "journal.sqlite3"), {**sqlite_pragmas(), "journal_mode": "DELETE"}
+            )
+        self.assertGreater(journal, WRITE_HOLD / 2)
+        self.assertLess(wal, WRITE_HOLD / 2)
+
+
+class PostgresProfileTest(SimpleTestCase):
+    """Test cases for the environment-driven PostgreSQL profile."""
+
+    def test_pool_refused_before_django_5_1(self):
+        """Test LIBRARY_DB_POOL=1 is an error rather than silently ignored."""
+        env = {"LIBRARY_DB_ENGINE": "postgresql", "LIBRARY_DB_POOL": "1"}
+        with mock.patch.dict(os.environ, env), mock.patch.object(django, "VERSION", (4, 2, 27, "final", 0)):
+            with self.assertRaisesMessage(ImproperlyConfigured, "LIBRARY_DB_POOL"):
+                runpy.run_path(os.path.join(settings.BASE_DIR, "Library_project", "settings.py"))
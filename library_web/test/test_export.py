@@ -0,0 +1,94 @@
+"""Test cases for the streaming CSV/JSONL exports."""
+# pylint: disable=no-member
+
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from library_web import export
+from library_web.models import EBooksModel, BorrowRecord
+
+User = get_user_model()
+
+
+class ExportTest(TestCase):
+    """Test cases for the export view and command."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.admin = User.objects.create_user(username="admin", email="a@example.com", password="pass")
+        self.books = [
+            EBooksModel.objects.create(title=f"Export {i}", author="A", category="Fiction",
+                                       image="books/x.png")
+            for i in range(5)
+        ]
+        today = date.today()
+        for i, book in enumerate(self.books):
+            BorrowRecord.objects.create(
+                student_id=f"s{i}", book=book, borrow_date=today - timedelta(days=400 * i)
+            )
+
+    def get(self, dataset, **params):
+        """Return the streamed export body as the admin."""
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse("export", args=[dataset]), params)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response)
+
+    def test_csv_books(self):
+        """Test the books export is a CSV with a header row."""
+        response, body = self.get("books")
+        rows = list(csv.reader(io.StringIO(body.decode())))
+        self.assertEqual(rows[0], list(export.DATASETS["books"][1]))
+        self.assertEqual([row[2] for row in rows[1:]], [book.title for book in self.books])
+        self.assertIn("books-", response["Content-Disposition"])
+
+    def test_gzipped_jsonl_loans_with_since(self):
+        """Test gzip output decompresses to JSON lines filtered by date."""
+        since = (date.today() - timedelta(days=500)).isoformat()
+        response, body = self.get("loans", format="jsonl", gzip="1", since=since)
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        lines = gzip.decompress(body).decode().splitlines()
+        self.assertEqual([json.loads(line)["student_id"] for line in lines], ["s0", "s1"])
+
+    def test_streams_in_chunks(self):
+        """Test the body is one chunked query yielded row by row."""
+        self.client.force_login(self.admin)
+        original = export.EXPORT_CHUNK_SIZE
+        export.EXPORT_CHUNK_SIZE = 2
+        self.addCleanup(setattr, export, "EXPORT_CHUNK_SIZE", original)
+        response = self.client.get(reverse("export", args=["books"]))
+        with self.assertNumQueries(1):
+            self.assertEqual(sum(1 for _ in response), 6)
+
+    def test_admin_only_and_bad_params(self):
+        """Test non-admins are refused and bad parameters are 400s."""
+        reader = User.objects.create_user(username="reader", email="r@example.com", password="pass")
+        self.client.force_login(reader)
+        response = self.client.get(reverse("export", args=["loans"]))
+        self.assertFalse(response.streaming)
+        self.assertIn(b"not authorised", response.content)
+
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get(reverse("export", args=["users"])).status_code, 404)
+        self.assertEqual(
+            self.client.get(reverse("export", args=["loans"]), {"format": "xml"}).status_code, 400
+        )
+        self.assertEqual(
+            self.client.get(reverse("export", args=["loans"]), {"since": "soon"}).status_code, 400
+        )
+
+    def test_command_writes_file(self):
+        """Test manage.py export writes a gzipped file."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "loans.csv.gz")
+            call_command("export", "loans", "--gzip", "-o", path, stderr=io.StringIO())
+            with gzip.open(path, "rt", encoding="utf-8") as handle:
+                self.assertEqual(len(list(csv.reader(handle))), 6)
@@ -0,0 +1,139 @@
+"""Test cases for the import_books management command."""
+# pylint: disable=no-member
+
+import csv
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError
+from django.test import TestCase
+from library_web.models import EBooksModel, ImportState
+from library_web.search import get_search_backend
+
+FIELDS = ["title", "subtitle", "author", "publisher", "description", "category", "rating", "image"]
+
+
+def make_row(i, **overrides):
+    """Return one valid import row."""
+    row = {
+        "title": f"Imported {i}",
+        "subtitle": "Sub",
+        "author": "Importer",
+        "publisher": "Bulk Press",
+        "description": "Loaded in bulk",
+        "category": "Science",
+        "rating": 3,
+        "image": f"cover{i}.jpeg",
+    }
+    row.update(overrides)
+    return row
+
+
+class ImportBooksCommandTest(TestCase):
+    """Test cases for streaming CSV/JSONL imports."""
+
+    def setUp(self):
+        """Set up a scratch directory."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def write_jsonl(self, rows):
+        """Write rows as a JSONL file and return its path."""
+        path = os.path.join(self.tmpdir, "books.jsonl")
+        with open(path, "w", encoding="utf-8") as handle:
+            for row in rows:
+                handle.write((row if isinstance(row, str) else json.dumps(row)) + "\n")
+        return path
+
+    def run_import(self, path, *args):
+        """Run the command and return its stderr."""
+        err = StringIO()
+        call_command("import_books", path, *args, stdout=StringIO(), stderr=err)
+        return err.getvalue()
+
+    def test_jsonl_import_in_batches(self):
+        """Test every valid row is inserted with a unique book id."""
+        path = self.write_jsonl([make_row(i) for i in range(7)])
+        self.run_import(path, "--batch-size", "3", "--image-prefix", "books/")
+        books = EBooksModel.objects.filter(author="Importer")
+        self.assertEqual(books.count(), 7)
+        self.assertEqual(len(set(books.values_list("book_id", flat=True))), 7)
+        self.assertEqual(books.first().image.name, "books/cover0.jpeg")
+
+    def test_csv_import_and_form_validation(self):
+        """Test rows breaking EBooksForm rules are rejected."""
+        path = os.path.join(self.tmpdir, "books.csv")
+        with open(path, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.DictWriter(handle, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerow(make_row(1))
+            writer.writerow(make_row(2, rating=9))
+            writer.writerow(make_row(3, category="Poetry"))
+            writer.writerow(make_row(4, publisher=""))
+        errors = self.run_import(path)
+        self.assertEqual(
+            sorted(EBooksModel.objects.values_list("title", flat=True)),
+            ["Imported 1", "Imported 4"]
+        )
+        self.assertIn("line 3", errors)
+        self.assertIn("line 4", errors)
+
+    def test_invalid_json_line_rejected(self):
+        """Test a malformed JSONL line is reported and skipped."""
+        path = self.write_jsonl([make_row(1), "{not json", make_row(2)])
+        errors = self.run_import(path)
+        self.assertEqual(EBooksModel.objects.count(), 2)
+        self.assertIn("line 2", errors)
+
+    def test_resume_from_checkpoint(self):
+        """Test an existing checkpoint skips the records already imported."""
+        path = self.write_jsonl([make_row(i) for i in range(5)])
+        ImportState.objects.create(name="nightly", source=path, records=3, imported=3)
+
+        self.run_import(path, "--checkpoint", "nightly")
+        self.assertEqual(
+            sorted(EBooksModel.objects.values_list("title", flat=True)),
+            ["Imported 3", "Imported 4"]
+        )
+        self.assertEqual(ImportState.objects.get(name="nightly").records, 5)
+
+    def test_crash_never_repeats_a_committed_batch(self):
+        """Test a rerun after a failed batch imports each row exactly once."""
+        path = self.write_jsonl([make_row(i) for i in range(5)])
+        backend = get_search_backend()
+        index_many = backend.index_many
+        calls = []
+
+        def fail_second_batch(books):
+            calls.append(books)
+            if len(calls) == 2:
+                raise DatabaseError("worker killed")
+            index_many(books)
+
+        with mock.patch.object(type(backend), "index_many", side_effect=fail_second_batch):
+            with self.assertRaises(DatabaseError):
+                self.run_import(path, "--checkpoint", "nightly", "--batch-size", "2")
+        self.assertEqual(ImportState.objects.get(name="nightly").records, 2)
+
+        self.run_import(path, "--checkpoint", "nightly", "--batch-size", "2")
+        self.assertEqual(
+            sorted(EBooksModel.objects.values_list("title", flat=True)),
+            [f"Imported {i}" for i in range(5)]
+        )
+
+    def test_checkpoint_of_another_file_is_refused(self):
+        """Test a checkpoint name cannot resume a different source."""
+        ImportState.objects.create(name="nightly", source="/elsewhere.jsonl", records=3)
+        with self.assertRaises(CommandError):
+            self.run_import(self.write_jsonl([make_row(1)]), "--checkpoint", "nightly")
+
+    def test_imported_books_are_searchable(self):
+        """Test imported rows are added to the search index."""
+        path = self.write_jsonl([make_row(1, title="Quantum Gardens")])
+        self.run_import(path)
+        books, _ = get_search_backend().search("quantum")
+        self.assertEqual([b.title for b in books], ["Quantum Gardens"])
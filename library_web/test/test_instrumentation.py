@@ -0,0 +1,99 @@
+"""Test cases for the request instrumentation middleware."""
+# pylint: disable=no-member
+
+import json
+import os
+import tempfile
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, Client, override_settings
+from django.urls import reverse
+from library_web.instrumentation import RequestMetricsMiddleware, registry
+from library_web.models import EBooksModel
+
+INSTRUMENTED = {
+    "MIDDLEWARE": ["library_web.instrumentation.RequestMetricsMiddleware"] + settings.MIDDLEWARE,
+    "TEMPLATES": [
+        dict(settings.TEMPLATES[0], BACKEND="library_web.instrumentation.TimedDjangoTemplates")
+    ],
+}
+
+
+@override_settings(**INSTRUMENTED)
+class RequestMetricsTest(TestCase):
+    """Test cases for Server-Timing headers, log lines and /metrics."""
+
+    def setUp(self):
+        """Set up test data."""
+        registry.reset()
+        self.addCleanup(registry.reset)
+        self.client = Client()
+        self.book = EBooksModel.objects.create(
+            title="Timed", author="A", category="Fiction", image="books/x.png"
+        )
+
+    def test_server_timing_header(self):
+        """Test a page reports its queries, template time and total."""
+        response = self.client.get(reverse("viewBook", args=[self.book.id]))
+        timing = response["Server-Timing"]
+        self.assertIn('desc="2 queries"', timing)
+        self.assertIn("tpl;dur=", timing)
+        self.assertIn("total;dur=", timing)
+
+    def test_structured_log_line(self):
+        """Test each request logs one JSON line."""
+        with self.assertLogs("library_web.requests", "INFO") as logs:
+            self.client.get(reverse("viewBook", args=[self.book.id]))
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual((line["view"], line["status"], line["queries"]), ("viewBook", 200, 2))
+        self.assertGreater(line["template_ms"], 0)
+
+    def test_queries_on_every_connection_are_counted(self):
+        """Test queries sent to a replica alias are timed with the primary's."""
+        handle, path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        connections.settings["metrics_replica"] = {**connection.settings_dict, "NAME": path}
+        self.addCleanup(connections.settings.pop, "metrics_replica")
+        replica = connections["metrics_replica"]
+        self.addCleanup(connections.__delitem__, "metrics_replica")
+        self.addCleanup(replica.close)
+        # Opened up front, so its connection pragmas are not counted.
+        replica.ensure_connection()
+
+        def view(_request):
+            with replica.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            EBooksModel.objects.count()
+            return HttpResponse()
+
+        response = RequestMetricsMiddleware(view)(RequestFactory().get("/"))
+        self.assertIn('desc="2 queries"', response["Server-Timing"])
+
+    def test_metrics_need_staff_or_token(self):
+        """Test /metrics is refused to anonymous and non-staff visitors."""
+        url = reverse("metrics")
+        self.assertEqual(self.client.get(url).status_code, 403)
+        reader = get_user_model().objects.create_user(
+            username="reader", email="r@example.com", password="pass"
+        )
+        self.client.force_login(reader)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        with self.settings(LIBRARY_METRICS_TOKEN="s3cret"):
+            self.assertEqual(Client().get(url, HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+            self.assertEqual(Client().get(url, HTTP_AUTHORIZATION="Bearer s3cret").status_code, 200)
+
+    def test_metrics_endpoint(self):
+        """Test /metrics exposes cumulative histograms per URL name."""
+        for _ in range(3):
+            self.client.get(reverse("viewBook", args=[self.book.id]))
+        staff = get_user_model().objects.create_user(
+            username="ops", email="o@example.com", password="pass", is_staff=True
+        )
+        self.client.force_login(staff)
+        body = self.client.get(reverse("metrics")).content.decode()
+        self.assertIn('library_request_duration_seconds_bucket{view="viewBook",le="+Inf"} 3', body)
+        self.assertIn('library_request_duration_seconds_count{view="viewBook"} 3', body)
+        self.assertIn('library_request_db_queries_total{view="viewBook"} 6', body)
@@ -0,0 +1,166 @@
+"""Test cases for the background job queue."""
+# pylint: disable=no-member
+
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+from library_web import jobs
+from library_web.models import EBooksModel, Job
+from library_web.tests import create_test_image, use_temporary_media
+from library_web.thumbnails import generate_thumbnails
+
+User = get_user_model()
+
+CALLS = []
+
+
+@jobs.task("test_record")
+def record_call(value):
+    """Remember the value a job ran with."""
+    CALLS.append(value)
+
+
+@jobs.task("test_flaky")
+def always_fail():
+    """Fail every time."""
+    raise RuntimeError("storage unavailable")
+
+
+class JobQueueTest(TestCase):
+    """Test cases for enqueueing, claiming and retrying jobs."""
+
+    def setUp(self):
+        """Set up test data."""
+        CALLS.clear()
+
+    def test_enqueue_is_idempotent(self):
+        """Test a key is only queued and run once."""
+        jobs.enqueue("test_record", "same-key", value=1)
+        jobs.enqueue("test_record", "same-key", value=2)
+        self.assertEqual(jobs.run_pending(), 1)
+        jobs.enqueue("test_record", "same-key", value=3)
+        self.assertEqual(jobs.run_pending(), 0)
+        self.assertEqual(CALLS, [1])
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+    def test_claimed_job_is_not_handed_out_twice(self):
+        """Test a running job is skipped until its lease expires."""
+        jobs.enqueue("test_record", "k", value=1)
+        job = jobs.claim_next()
+        self.assertEqual(job.status, Job.RUNNING)
+        self.assertIsNone(jobs.claim_next())
+
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - jobs.LEASE * 2)
+        self.assertEqual(jobs.claim_next().pk, job.pk)
+
+    def test_job_that_kills_its_worker_gives_up(self):
+        """Test an expired lease on the last attempt fails the job instead of retrying."""
+        jobs.enqueue("test_record", "k", value=1)
+        Job.objects.update(max_attempts=2)
+        for _ in range(2):
+            job = jobs.claim_next()
+            # The worker dies: the job stays running until its lease expires.
+            Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - jobs.LEASE * 2)
+
+        self.assertIsNone(jobs.claim_next())
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertIn("Worker lost", job.last_error)
+        self.assertEqual(CALLS, [])
+
+    def test_failures_back_off_then_give_up(self):
+        """Test a failing job is retried later and marked failed at max_attempts."""
+        jobs.enqueue("test_flaky", "flaky")
+        Job.objects.update(max_attempts=2)
+
+        self.assertFalse(jobs.run_job(jobs.claim_next()))
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.PENDING, 1))
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=jobs.BACKOFF_SECONDS - 5))
+        self.assertIn("storage unavailable", job.last_error)
+        self.assertIsNone(jobs.claim_next())
+
+        Job.objects.update(run_after=timezone.now())
+        self.assertFalse(jobs.run_job(jobs.claim_next()))
+        self.assertEqual(Job.objects.get().status, Job.FAILED)
+        self.assertIsNone(jobs.claim_next())
+
+    def test_released_key_can_be_queued_again(self):
+        """Test a finished file cleanup frees its key for a later identical one."""
+        jobs.enqueue_file_cleanup(["books/gone.png"])
+        jobs.enqueue_file_cleanup(["books/gone.png"])
+        self.assertEqual(jobs.run_pending(), 1)
+        jobs.enqueue_file_cleanup(["books/gone.png"])
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(Job.objects.filter(status=Job.DONE).count(), 2)
+
+    def test_thumbnail_key_follows_book_version(self):
+        """Test a re-upload under a reused name still gets its own job."""
+        book = EBooksModel.objects.create(
+            title="Cover", author="Author", category="Fiction", image="books/cover.png"
+        )
+        jobs.enqueue_thumbnails(book)
+        jobs.enqueue_thumbnails(book)
+        book.save()
+        jobs.enqueue_thumbnails(book)
+        self.assertEqual(Job.objects.filter(task="thumbnails").count(), 2)
+
+    def test_unknown_task_fails(self):
+        """Test a job for an unregistered task records the error."""
+        jobs.enqueue("no_such_task", "unknown")
+        jobs.run_pending()
+        self.assertIn("no_such_task", Job.objects.get().last_error)
+
+    def test_run_worker_burst(self):
+        """Test the command drains the queue and exits."""
+        jobs.enqueue("test_record", "a", value="a")
+        jobs.enqueue("test_record", "b", value="b")
+        call_command("run_worker", "--burst", stdout=StringIO())
+        self.assertEqual(CALLS, ["a", "b"])
+
+
+class FileCleanupJobTest(TestCase):
+    """Test cases for deferred file deletion."""
+
+    def setUp(self):
+        """Set up test data."""
+        use_temporary_media(self)
+        admin = User.objects.create_user(username="admin", email="a@example.com", password="pass")
+        admin.groups.add(Group.objects.create(name="admin"))
+        self.client = Client()
+        self.client.login(username="admin", password="pass")
+        self.book = EBooksModel.objects.create(
+            title="Doomed", author="Author", category="Fiction", image=create_test_image()
+        )
+
+    def test_delete_book_queues_file_removal(self):
+        """Test the cover is removed by the worker, not the request."""
+        name = self.book.image.name
+        self.client.post(reverse("deleteBook", kwargs={"book_id": self.book.id}))
+        self.assertFalse(EBooksModel.objects.filter(pk=self.book.pk).exists())
+        self.assertTrue(default_storage.exists(name))
+
+        jobs.run_pending()
+        self.assertFalse(default_storage.exists(name))
+
+    def test_edit_with_new_cover_removes_old_files(self):
+        """Test replacing the cover renders the new one and deletes the old."""
+        old_name = self.book.image.name
+        old_renditions = [r["name"] for r in generate_thumbnails(self.book)]
+        self.client.post(reverse("editBook", kwargs={"book_id": self.book.id}), {
+            "title": "Doomed", "subtitle": "Sub", "author": "Author", "publisher": "Press",
+            "description": "Desc", "category": "Fiction", "rating": 1, "image": create_test_image(),
+        })
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.thumbnails, [])
+        self.assertEqual(jobs.run_pending(), 2)
+        self.book.refresh_from_db()
+        self.assertNotEqual(self.book.image.name, old_name)
+        self.assertFalse(any(default_storage.exists(n) for n in [old_name, *old_renditions]))
+        self.assertTrue(self.book.thumbnails)
@@ -0,0 +1,455 @@
+"""Test cases for atomic borrow and return operations."""
+# pylint: disable=no-member
+
+import threading
+from datetime import date, timedelta
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from library_web import loans
+from library_web.models import BookCopy, EBooksModel, BorrowRecord, Hold, SweepState
+from library_web.tests import create_test_image
+
+
+class LoanServiceTest(TestCase):
+    """Test cases for the atomic borrow and return operations."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.book = EBooksModel.objects.create(
+            title="Test Book",
+            author="Test Author",
+            category="Education",
+            image=create_test_image()
+        )
+
+    def new_record(self):
+        """Return an unsaved borrow record due in a week."""
+        return BorrowRecord(
+            student_id='x1',
+            borrow_date=date.today(),
+            return_date=date.today() + timedelta(days=7)
+        )
+
+    def test_borrow_then_second_borrow_rejected(self):
+        """Test a borrowed book cannot be claimed again."""
+        loans.borrow(self.book, self.new_record())
+        with self.assertRaises(loans.BookUnavailable):
+            loans.borrow(EBooksModel.objects.get(pk=self.book.pk), self.new_record())
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.borrow_count, 1)
+        self.assertTrue(self.book.is_borrowed)
+
+    def test_only_one_open_record_per_copy(self):
+        """Test the partial unique constraint on open borrow records."""
+        copy = self.book.copies.get()
+        record = self.new_record()
+        record.book, record.copy = self.book, copy
+        record.save()
+        duplicate = self.new_record()
+        duplicate.book, duplicate.copy = self.book, copy
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            duplicate.save()
+
+    def test_return_closes_record_with_fee(self):
+        """Test returning late closes the record and charges the fee."""
+        loans.borrow(self.book, self.new_record())
+        returned_on = date.today() + timedelta(days=10)
+        record = loans.return_book(self.book, returned_on)
+        record.refresh_from_db()
+        self.assertEqual(record.actual_return_date, returned_on)
+        self.assertEqual(record.late_fee, 3 * loans.LATE_FEE_PER_DAY)
+        self.book.refresh_from_db()
+        self.assertFalse(self.book.is_borrowed)
+        with self.assertRaises(loans.NoActiveLoan):
+            loans.return_book(self.book)
+
+    def test_active_loan_follows_borrow_and_return(self):
+        """Test the copy pointer is set on borrow and cleared on return."""
+        record = loans.borrow(self.book, self.new_record())
+        copy = BookCopy.objects.get(book=self.book)
+        self.assertEqual((copy.active_loan_id, record.copy_id), (record.pk, copy.pk))
+
+        loans.return_book(EBooksModel.objects.get(pk=self.book.pk))
+        copy.refresh_from_db()
+        self.assertIsNone(copy.active_loan_id)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 1)
+        self.assertFalse(self.book.is_borrowed)
+
+
+    def test_stale_edit_keeps_loan_counters(self):
+        """Test saving an instance loaded before a borrow does not undo it."""
+        stale = EBooksModel.objects.get(pk=self.book.pk)
+        loans.borrow(self.book, self.new_record())
+        stale.title = "Edited Title"
+        stale.save()
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.title, "Edited Title")
+        self.assertEqual(
+            (self.book.available_copies, self.book.is_borrowed, self.book.borrow_count),
+            (0, True, 1),
+        )
+        # The borrow and the edit each moved the version once.
+        self.assertEqual((self.book.version, stale.version), (3, 3))
+        self.assertFalse(loans.drifted_books().exists())
+
+
+class CopyInventoryTest(TestCase):
+    """Test cases for multi-copy books and their hold queue."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.book = EBooksModel.objects.create(
+            title="Popular Book", author="A", category="Fiction", image="books/x.png",
+            copy_count=2,
+        )
+        self.users = [
+            get_user_model().objects.create_user(
+                username=f"reader{i}", email=f"reader{i}@example.com", password="pw"
+            )
+            for i in range(5)
+        ]
+
+    def request(self, user, days=7):
+        """Return an unsaved borrow record for ``user``."""
+        return BorrowRecord(
+            user=user, student_id=user.username, borrow_date=date.today(),
+            return_date=date.today() + timedelta(days=days)
+        )
+
+    def fresh_book(self):
+        """Return a fresh copy of the book."""
+        return EBooksModel.objects.get(pk=self.book.pk)
+
+    def test_copies_are_lent_until_none_is_left(self):
+        """Test each borrow takes a different copy and updates the counter."""
+        first = loans.borrow(self.fresh_book(), self.request(self.users[0]))
+        second = loans.borrow(self.fresh_book(), self.request(self.users[1]))
+        self.assertNotEqual(first.copy_id, second.copy_id)
+        with self.assertRaises(loans.BookUnavailable):
+            loans.borrow(self.fresh_book(), self.request(self.users[2]))
+        book = self.fresh_book()
+        self.assertEqual((book.available_copies, book.is_borrowed, book.borrow_count), (0, True, 2))
+
+    def test_holds_are_served_in_order_on_return(self):
+        """Test returns hand copies to the queue head with constant work."""
+        for user in self.users[:2]:
+            loans.borrow_or_hold(self.fresh_book(), self.request(user))
+        holds = [loans.borrow_or_hold(self.fresh_book(), self.request(u, 14)) for u in self.users[2:]]
+        self.assertTrue(all(isinstance(hold, Hold) for hold in holds))
+        self.assertEqual([loans.hold_position(h) for h in holds], [1, 2, 3])
+        self.assertEqual(loans.borrow_or_hold(self.fresh_book(), self.request(self.users[2])), holds[0])
+
+        with CaptureQueriesContext(connection) as long_queue:
+            loans.return_book(self.fresh_book(), user=self.users[1])
+        holds[0].refresh_from_db()
+        loan = holds[0].loan
+        self.assertEqual((loan.user, loan.return_date), (self.users[2], date.today() + timedelta(14)))
+        self.assertIsNotNone(holds[0].fulfilled_at)
+        self.assertEqual(loans.hold_position(holds[2]), 2)
+
+        loans.return_book(self.fresh_book(), user=self.users[0])
+        with CaptureQueriesContext(connection) as short_queue:
+            loans.return_book(self.fresh_book(), user=self.users[2])
+        self.assertEqual(len(long_queue), len(short_queue))
+        self.assertEqual(Hold.objects.filter(fulfilled_at__isnull=True).count(), 0)
+
+        book = self.fresh_book()
+        self.assertEqual((book.available_copies, book.borrow_count), (0, 5))
+        self.assertEqual(
+            set(BookCopy.objects.filter(book=book).values_list("active_loan__user", flat=True)),
+            {self.users[3].pk, self.users[4].pk},
+        )
+        self.assertFalse(loans.drifted_copies().exists() or loans.drifted_books().exists())
+
+    def test_borrowers_cannot_skip_the_queue(self):
+        """Test a free copy goes to nobody directly while a hold is waiting."""
+        waiting = Hold.objects.create(
+            book=self.book, user=self.users[0], student_id="reader0", loan_days=7
+        )
+        with self.assertRaises(loans.BookUnavailable):
+            loans.borrow(self.fresh_book(), self.request(self.users[1]))
+        hold = loans.borrow_or_hold(self.fresh_book(), self.request(self.users[1]))
+        self.assertIsInstance(hold, Hold)
+        self.assertEqual([loans.hold_position(h) for h in (waiting, hold)], [1, 2])
+        book = self.fresh_book()
+        self.assertEqual((book.available_copies, book.borrow_count), (2, 0))
+        self.assertFalse(BorrowRecord.objects.exists())
+
+    def test_added_copies_serve_waiting_holds_first(self):
+        """Test new copies go to the queue before the shelf."""
+        for user in self.users[:3]:
+            loans.borrow_or_hold(self.fresh_book(), self.request(user))
+        book = self.fresh_book()
+        loans.add_copies(book, 3)
+        self.assertEqual((book.copy_count, book.available_copies, book.is_borrowed), (5, 2, False))
+        self.assertTrue(Hold.objects.get().loan.copy.number > 2)
+        self.assertFalse(loans.drifted_copies().exists() or loans.drifted_books().exists())
+
+
+class LoanDriftTest(TestCase):
+    """Test cases for finding and repairing availability drift."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.books = [
+            EBooksModel.objects.create(
+                title=f"Drift {i}", author="A", category="Education", image="books/x.png"
+            )
+            for i in range(4)
+        ]
+
+    def new_record(self, **fields):
+        """Return an unsaved borrow record due in a week."""
+        return BorrowRecord(
+            student_id="x1", borrow_date=date.today(),
+            return_date=date.today() + timedelta(days=7), **fields
+        )
+
+    def open_record(self, book, **fields):
+        """Create a borrow record for ``book`` directly, bypassing the loans module."""
+        record = self.new_record(book=book, **fields)
+        record.save()
+        return record
+
+    def test_check_loans_reports_and_repairs_drift(self):
+        """Test every kind of drift is found, then fixed in chunks."""
+        consistent, unflagged, orphaned, stale = self.books
+        loans.borrow(consistent, self.new_record())
+        missing = self.open_record(unflagged, copy=unflagged.copies.get())
+        EBooksModel.objects.filter(pk=orphaned.pk).update(is_borrowed=True, available_copies=0)
+        closed = self.open_record(stale, actual_return_date=date.today())
+        BookCopy.objects.filter(book=stale).update(active_loan=closed)
+        consistent.refresh_from_db()
+
+        out = StringIO()
+        call_command("check_loans", stdout=out)
+        self.assertIn("2 drifted copies", out.getvalue())
+        self.assertIn("2 drifted books", out.getvalue())
+
+        call_command("check_loans", "--repair", "--chunk-size", "1", stdout=out)
+        self.assertIn("Repaired 2 copies and 2 books", out.getvalue())
+        self.assertFalse(loans.drifted_copies().exists() or loans.drifted_books().exists())
+        copies = dict(BookCopy.objects.values_list("book", "active_loan"))
+        self.assertEqual((copies[unflagged.pk], copies[stale.pk]), (missing.pk, None))
+        states = dict(
+            (pk, (available, borrowed)) for pk, available, borrowed in
+            EBooksModel.objects.values_list("pk", "available_copies", "is_borrowed")
+        )
+        self.assertEqual(states[unflagged.pk], (0, True))
+        self.assertEqual(states[orphaned.pk], (1, False))
+        self.assertEqual(states[stale.pk], (1, False))
+        self.assertEqual(EBooksModel.objects.get(pk=consistent.pk).version, consistent.version)
+
+
+class OverdueSweepTest(TestCase):
+    """Test cases for the overdue fee sweep."""
+
+    today = date(2026, 3, 10)
+
+    def setUp(self):
+        """Set up test data."""
+        self.records = {}
+        for days_late in (0, 1, 3, 3, 10, -2):
+            book = EBooksModel.objects.create(
+                title=f"Late {days_late}", author="A", category="Fiction", image="books/x.png"
+            )
+            self.records.setdefault(days_late, []).append(BorrowRecord.objects.create(
+                student_id='x1',
+                book=book,
+                borrow_date=self.today - timedelta(days=20),
+                return_date=self.today - timedelta(days=days_late),
+            ))
+        returned = self.records[10][0]
+        self.closed = BorrowRecord.objects.create(
+            student_id='x2',
+            book=returned.book,
+            borrow_date=self.today - timedelta(days=60),
+            return_date=self.today - timedelta(days=50),
+            actual_return_date=self.today - timedelta(days=49),
+            late_fee=8,
+        )
+
+    def fees(self):
+        """Return the late fee of each open record keyed by days late."""
+        return {
+            days: sorted(int(BorrowRecord.objects.get(pk=r.pk).late_fee) for r in records)
+            for days, records in self.records.items()
+        }
+
+    def test_sweep_prices_overdue_loans_in_chunks(self):
+        """Test only open, overdue loans are priced, across several chunks."""
+        self.assertEqual(loans.sweep_overdue(self.today, chunk_size=2), 4)
+        self.assertEqual(
+            self.fees(), {0: [0], 1: [8], 3: [24, 24], 10: [80], -2: [0]}
+        )
+        self.closed.refresh_from_db()
+        self.assertEqual(self.closed.late_fee, 8)
+        self.assertEqual(loans.outstanding_fees(), 136)
+
+    def test_rerun_same_day_is_noop_and_next_day_accrues(self):
+        """Test the watermark makes a same-day rerun free."""
+        loans.sweep_overdue(self.today)
+        self.assertEqual(loans.sweep_overdue(self.today), 0)
+        self.assertEqual(loans.sweep_overdue(self.today + timedelta(days=1)), 5)
+        self.assertEqual(self.fees()[10], [88])
+
+    def test_interrupted_sweep_resumes(self):
+        """Test a sweep resumes after the last committed chunk."""
+        oldest = self.records[10][0]
+        SweepState.objects.create(
+            name="overdue", as_of=self.today, last_due=oldest.return_date, last_id=oldest.pk
+        )
+        self.assertEqual(loans.sweep_overdue(self.today), 3)
+        self.assertEqual(self.fees()[10], [0])
+        self.assertEqual(self.fees()[1], [8])
+
+    def test_fee_is_capped(self):
+        """Test fees stop at what the late_fee column can hold."""
+        self.assertEqual(
+            loans.late_fee(self.today - timedelta(days=5000), self.today), loans.MAX_LATE_FEE
+        )
+
+
+class ConcurrentBorrowTest(TransactionTestCase):
+    """Stress test parallel borrowers against one book."""
+
+    workers = 8
+
+    def race(self, book):
+        """Have ``workers`` threads borrow ``book`` at once; return the outcomes."""
+        barrier = threading.Barrier(self.workers)
+        outcomes = []
+
+        def attempt(student):
+            barrier.wait()
+            try:
+                while True:
+                    try:
+                        loans.borrow(
+                            EBooksModel.objects.get(pk=book.pk),
+                            BorrowRecord(
+                                student_id=student,
+                                borrow_date=date.today(),
+                                return_date=date.today() + timedelta(days=7)
+                            )
+                        )
+                        outcomes.append('won')
+                        return
+                    except loans.BookUnavailable:
+                        outcomes.append('lost')
+                        return
+                    except OperationalError:
+                        # SQLite reports lock contention instead of waiting.
+                        continue
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=attempt, args=(f'x{i}',))
+            for i in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_parallel_borrowers_single_winner(self):
+        """Test N concurrent borrowers produce exactly one loan."""
+        book = EBooksModel.objects.create(
+            title="Popular Book",
+            author="Test Author",
+            category="Fiction",
+            image=create_test_image()
+        )
+        outcomes = self.race(book)
+
+        self.assertEqual(outcomes.count('won'), 1)
+        self.assertEqual(outcomes.count('lost'), self.workers - 1)
+        book.refresh_from_db()
+        self.assertEqual(book.borrow_count, 1)
+        self.assertEqual(
+            BorrowRecord.objects.filter(book=book, actual_return_date__isnull=True).count(), 1
+        )
+
+    def test_parallel_borrowers_take_each_copy_once(self):
+        """Test concurrent borrowers of a multi-copy book never share a copy."""
+        book = EBooksModel.objects.create(
+            title="Popular Book", author="Test Author", category="Fiction",
+            image="books/x.png", copy_count=3,
+        )
+        outcomes = self.race(book)
+
+        self.assertEqual(outcomes.count('won'), 3)
+        open_loans = BorrowRecord.objects.filter(book=book, actual_return_date__isnull=True)
+        self.assertEqual(len(set(open_loans.values_list("copy", flat=True))), 3)
+        book.refresh_from_db()
+        self.assertEqual((book.available_copies, book.is_borrowed), (0, True))
+        self.assertFalse(loans.drifted_copies().exists() or loans.drifted_books().exists())
+
+    def run_together(self, book, *operations):
+        """Run each ``operation(book)`` in its own thread at once; return the results."""
+        barrier = threading.Barrier(len(operations))
+        outcomes = []
+
+        def attempt(operation):
+            barrier.wait()
+            try:
+                while True:
+                    try:
+                        outcomes.append(operation(EBooksModel.objects.get(pk=book.pk)))
+                        return
+                    except OperationalError:
+                        # SQLite reports lock contention instead of waiting.
+                        continue
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=attempt, args=(op,)) for op in operations]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_return_races_borrow_or_hold(self):
+        """Test a return racing a borrow-or-hold never strands the holder."""
+        owner, reader = (
+            get_user_model().objects.create_user(
+                username=name, email=f"{name}@example.com", password="pw"
+            )
+            for name in ("owner", "reader")
+        )
+
+        def request(user):
+            return BorrowRecord(
+                user=user, student_id=user.username, borrow_date=date.today(),
+                return_date=date.today() + timedelta(days=7),
+            )
+
+        for _ in range(5):
+            book = EBooksModel.objects.create(
+                title="Popular Book", author="Test Author", category="Fiction", image="books/x.png",
+            )
+            loans.borrow(book, request(owner))
+            outcomes = self.run_together(
+                book,
+                lambda b: loans.return_book(b, user=owner),
+                lambda b: loans.borrow_or_hold(b, request(reader)),
+            )
+
+            self.assertEqual(len(outcomes), 2)
+            self.assertFalse(Hold.objects.filter(book=book, fulfilled_at__isnull=True).exists())
+            self.assertEqual(
+                list(BorrowRecord.objects.filter(book=book, actual_return_date__isnull=True)
+                     .values_list("user", flat=True)),
+                [reader.pk],
+            )
+            book.refresh_from_db()
+            self.assertEqual((book.available_copies, book.is_borrowed), (0, True))
+        self.assertFalse(loans.drifted_copies().exists() or loans.drifted_books().exists())
@@ -0,0 +1,96 @@
+"""Test cases for the per-user loan dashboard."""
+# pylint: disable=no-member
+
+from datetime import date, timedelta
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from library_web import loans
+from library_web.models import EBooksModel, BorrowRecord, LoanSummary
+
+User = get_user_model()
+
+
+class MyLoansTest(TestCase):
+    """Test cases for the loans view, API and summary row."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username="reader", email="reader@example.com", password="pass"
+        )
+        self.client = Client()
+        self.client.login(username="reader", password="pass")
+
+    def lend(self, title, returned_on=None):
+        """Borrow a new book as the user, optionally returning it."""
+        book = EBooksModel.objects.create(
+            title=title, author="A", category="Fiction", image="books/x.png"
+        )
+        record = loans.borrow(book, BorrowRecord(
+            student_id="s1",
+            user=self.user,
+            borrow_date=date.today() - timedelta(days=10),
+            return_date=date.today() - timedelta(days=3),
+        ))
+        if returned_on:
+            loans.return_book(book, returned_on)
+        return record
+
+    def test_summary_follows_borrow_and_return(self):
+        """Test the summary row counts loans and fees as they happen."""
+        self.lend("Open")
+        self.lend("Closed", returned_on=date.today())
+        summary = LoanSummary.objects.get(user=self.user)
+        self.assertEqual(
+            (summary.open_loans, summary.total_loans, summary.fees_charged), (1, 2, 24)
+        )
+
+    def test_view_lists_active_and_history(self):
+        """Test the page shows open loans and past loans."""
+        self.lend("Still Reading")
+        self.lend("Finished", returned_on=date.today())
+        response = self.client.get(reverse("my_loans"))
+        self.assertEqual([r.book.title for r in response.context["active"]], ["Still Reading"])
+        self.assertEqual([r.book.title for r in response.context["history"]], ["Finished"])
+        self.assertContains(response, "Still Reading")
+
+    def test_api_pages_history(self):
+        """Test the JSON API pages history newest first."""
+        for i in range(3):
+            self.lend(f"Past {i}", returned_on=date.today())
+        data = self.client.get(reverse("my_loans_api"), {"limit": 2}).json()
+        self.assertEqual([r["book"]["title"] for r in data["history"]], ["Past 2", "Past 1"])
+        self.assertEqual(data["summary"]["total_loans"], 3)
+
+        data = self.client.get(reverse("my_loans_api"), {"after": data["next"]}).json()
+        self.assertEqual([r["book"]["title"] for r in data["history"]], ["Past 0"])
+        self.assertIsNone(data["next"])
+
+    def test_query_count_is_constant(self):
+        """Test the page costs the same number of queries for any history length."""
+        def count_queries():
+            with CaptureQueriesContext(connection) as captured:
+                self.client.get(reverse("my_loans"))
+            return len(captured)
+
+        self.lend("First", returned_on=date.today())
+        self.lend("Open")
+        few = count_queries()
+        for i in range(15):
+            self.lend(f"More {i}", returned_on=date.today())
+            self.lend(f"Open {i}")
+        self.assertEqual(count_queries(), few)
+
+    def test_str_does_not_load_book(self):
+        """Test __str__ on a record without the book loaded runs no query."""
+        record = BorrowRecord.objects.get(pk=self.lend("Quiet").pk)
+        with self.assertNumQueries(0):
+            self.assertIn(f"#{record.book_id}", str(record))
+
+    def test_requires_login(self):
+        """Test anonymous users are sent to the login page."""
+        response = Client().get(reverse("my_loans_api"))
+        self.assertEqual(response.status_code, 302)
@@ -0,0 +1,165 @@
+"""EXPLAIN-based checks that view queries stay on indexes."""
+# pylint: disable=no-member
+
+import os
+import re
+import unittest
+from datetime import date, timedelta
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from library_web import loans
+from library_web.catalog import SECTIONS, invalidate_catalog
+from library_web.models import BookCopy, EBooksModel, BorrowRecord, Hold
+from library_web.pagination import cursor_for
+
+SEED_ROWS = int(os.environ.get("LIBRARY_EXPLAIN_ROWS", "100000"))
+CATEGORIES = ["Education", "Fiction", "Science", "NonFriction"]
+
+
+def sequential_scans(sql):
+    """Return the plan lines of ``sql`` that read a whole table or sort it."""
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql)
+            details = [row[-1] for row in cursor.fetchall()]
+        # Ranking sorts the full-text matches, not the table, so a sort on
+        # top of an FTS lookup is fine.
+        full_text = any("VIRTUAL TABLE" in d for d in details)
+        # A scan in rowid order cut off by LIMIT walks the table's own
+        # b-tree like an index and stops after the page.
+        rowid_page = re.search(r'ORDER BY "\w+"\."id" ASC LIMIT \d+$', sql)
+        return [
+            d for d in details
+            if (re.match(r"SCAN \w+$", d) and not rowid_page)
+            or ("TEMP B-TREE" in d and not full_text)
+        ]
+
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN " + sql)
+        details = [row[0] for row in cursor.fetchall()]
+    return [d for d in details if "Seq Scan" in d]
+
+
+@unittest.skipUnless(
+    connection.vendor in ("sqlite", "postgresql"), "EXPLAIN parsing is vendor specific"
+)
+class ViewQueryPlanTest(TestCase):
+    """Seed a large catalog and EXPLAIN every query the listing views run."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Seed the catalog and loan history, then refresh planner stats."""
+        EBooksModel.objects.bulk_create(
+            (
+                EBooksModel(
+                    book_id=f"SEED-{i}",
+                    title=f"Seed title {i}",
+                    author=f"Author {i % 500}",
+                    publisher="Seed Press",
+                    description="Seeded for query plan tests",
+                    category=CATEGORIES[i % len(CATEGORIES)],
+                    image="books/seed.jpeg",
+                    rating=i % 6,
+                    borrow_count=i % 97,
+                    is_borrowed=i % 10 == 0,
+                )
+                for i in range(SEED_ROWS)
+            ),
+            batch_size=5000,
+        )
+        BookCopy.objects.bulk_create(
+            (BookCopy(book_id=book_id, number=1)
+             for book_id in EBooksModel.objects.values_list("id", flat=True).iterator()),
+            batch_size=5000,
+        )
+        books = BookCopy.objects.filter(book__is_borrowed=True).values_list("book_id", "id")
+        BorrowRecord.objects.bulk_create(
+            (
+                BorrowRecord(
+                    student_id="x1",
+                    book_id=book_id,
+                    copy_id=copy_id,
+                    tracking_code=f"SEED-{book_id}",
+                    borrow_date=date.today(),
+                    return_date=date.today() + timedelta(days=7),
+                )
+                for book_id, copy_id in books.iterator()
+            ),
+            batch_size=5000,
+        )
+        loans.repair_drift()
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = Client()
+        self.middle = EBooksModel.objects.get(book_id=f"SEED-{SEED_ROWS // 2}")
+
+    def assert_indexed(self, captured):
+        """Fail if any captured query plans a sequential scan."""
+        for query in captured:
+            sql = query["sql"]
+            if not sql.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+                continue
+            if "sqlite_master" in sql:
+                # Schema introspection by the search backend, not a view query.
+                continue
+            self.assertEqual(sequential_scans(sql), [], sql)
+
+    def test_listing_pages_use_indexes(self):
+        """Test first and deep pages of every section and of explore use an index."""
+        invalidate_catalog()
+        with CaptureQueriesContext(connection) as captured:
+            # A fresh generation, so the snapshot's first pages are queried.
+            self.client.get(reverse("home"))
+            for section, spec in SECTIONS.items():
+                after = cursor_for(self.middle, spec["ordering"])
+                response = self.client.get(
+                    reverse("book_section", kwargs={"section": section}), {"after": after}
+                )
+                self.assertEqual(response.status_code, 200)
+            self.client.get(reverse("explore"), {"after": cursor_for(self.middle, "id")})
+            self.client.get(reverse("search_books"), {"after": cursor_for(self.middle, "id")})
+        self.assert_indexed(captured)
+
+    def test_detail_and_search_use_indexes(self):
+        """Test book detail and full-text search use an index."""
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(reverse("viewBook", kwargs={"book_id": self.middle.id}))
+            self.client.get(reverse("search_books"), {"q": "seed title 4242"})
+        self.assert_indexed(captured)
+
+    def test_borrow_hold_and_return_use_indexes(self):
+        """Test the borrow, hold and return statements use an index."""
+        book = EBooksModel.objects.filter(is_borrowed=False).first()
+        users = [
+            get_user_model().objects.create_user(
+                username=f"plan{i}", email=f"plan{i}@example.com", password="pw"
+            )
+            for i in range(2)
+        ]
+        with CaptureQueriesContext(connection) as captured:
+            for user in users:
+                loans.borrow_or_hold(
+                    book,
+                    BorrowRecord(
+                        user=user,
+                        student_id="x2",
+                        borrow_date=date.today(),
+                        return_date=date.today() + timedelta(days=7),
+                    ),
+                )
+            loans.return_book(book)
+            loans.return_book(book)
+        self.assertTrue(Hold.objects.get().loan_id)
+        self.assert_indexed(captured)
+
+    def test_overdue_sweep_uses_index(self):
+        """Test the overdue sweep walks the open-loan due date index."""
+        with CaptureQueriesContext(connection) as captured:
+            loans.sweep_overdue(date.today() + timedelta(days=30), chunk_size=500)
+        self.assert_indexed(captured)
@@ -0,0 +1,80 @@
+"""Test cases for read-replica routing."""
+# pylint: disable=no-member
+
+import os
+import sqlite3
+import tempfile
+from django.db import connection, connections
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from library_web.models import EBooksModel
+from library_web.routers import PIN_COOKIE
+
+REPLICA = "replica_test"
+
+
+class ReplicaRoutingTest(TransactionTestCase):
+    """Test catalog reads go to a lagging replica except right after a write."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.book = EBooksModel.objects.create(
+            title="Original Title", author="A", category="Fiction", image="books/x.png"
+        )
+        # Flushing skips the search index, so delete through the ORM.
+        self.addCleanup(EBooksModel.objects.all().delete)
+        handle, self.path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+        connections.settings[REPLICA] = {**connection.settings_dict, "NAME": self.path}
+        self.addCleanup(self.drop_replica)
+        self.replicate()
+        replica_settings = override_settings(LIBRARY_REPLICA_DATABASES=[REPLICA])
+        replica_settings.enable()
+        self.addCleanup(replica_settings.disable)
+
+    def drop_replica(self):
+        """Close and forget the replica connection."""
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+
+    def replicate(self):
+        """Copy the primary (an in-memory test database) into the replica."""
+        connection.ensure_connection()
+        with sqlite3.connect(self.path) as replica:
+            connection.connection.backup(replica)
+
+    def test_anonymous_reads_are_served_by_the_replica(self):
+        """Test a change not yet replicated is invisible to catalog reads."""
+        EBooksModel.objects.filter(pk=self.book.pk).update(title="Renamed Title")
+        url = reverse("viewBook", args=[self.book.pk])
+        self.assertContains(self.client.get(url), "Original Title")
+        self.replicate()
+        self.assertContains(self.client.get(url), "Renamed Title")
+
+    def test_catalog_snapshot_is_built_from_the_primary(self):
+        """Test a new generation's snapshot never holds rows the replica lags on."""
+        self.client.get(reverse("home"))
+        self.book.title = "Renamed Title"
+        self.book.save()
+        response = self.client.get(reverse("home"))
+        self.assertContains(response, "Renamed Title")
+        self.assertNotContains(response, "Original Title")
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        """Test a POST sets the pin cookie and later reads see the primary."""
+        url = reverse("viewBook", args=[self.book.pk])
+        response = self.client.post(url)
+        self.assertIn(PIN_COOKIE, response.cookies)
+        EBooksModel.objects.filter(pk=self.book.pk).update(title="Renamed Title")
+        self.assertContains(self.client.get(url), "Renamed Title")
+
+    def test_routing_is_off_without_replicas(self):
+        """Test reads use the primary and no cookie is set with no replicas."""
+        EBooksModel.objects.filter(pk=self.book.pk).update(title="Renamed Title")
+        url = reverse("viewBook", args=[self.book.pk])
+        with override_settings(LIBRARY_REPLICA_DATABASES=[]):
+            response = self.client.post(url)
+            self.assertNotIn(PIN_COOKIE, response.cookies)
+            self.assertContains(self.client.get(url), "Renamed Title")
@@ -0,0 +1,101 @@
+"""Test cases for cover thumbnails."""
+# pylint: disable=no-member
+
+from io import BytesIO, StringIO
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from library_web.jobs import run_pending
+from library_web.models import EBooksModel
+from library_web.tests import use_temporary_media
+from library_web.thumbnails import generate_thumbnails
+
+User = get_user_model()
+
+
+def create_cover(width=800, height=1200, color="blue"):
+    """Create an uploaded cover larger than every rendition."""
+    file = BytesIO()
+    Image.new("RGB", (width, height), color=color).save(file, "png")
+    return SimpleUploadedFile(name="cover.png", content=file.getvalue(), content_type="image/png")
+
+
+@override_settings(LIBRARY_THUMBNAIL_WIDTHS=(160, 320))
+class ThumbnailTest(TestCase):
+    """Test cases for rendering and serving renditions."""
+
+    def setUp(self):
+        """Set up test data."""
+        # Card fragments are keyed by (pk, version), which the rolled-back
+        # test database hands out again.
+        cache.clear()
+        use_temporary_media(self)
+        self.book = EBooksModel.objects.create(
+            title="Covered", author="Author", category="Fiction", image=create_cover()
+        )
+
+    def test_renditions_are_resized_and_hashed(self):
+        """Test each width is stored in both formats beside the original."""
+        renditions = generate_thumbnails(self.book)
+        self.assertEqual(
+            sorted((r["type"], r["width"]) for r in renditions),
+            [("image/jpeg", 160), ("image/jpeg", 320), ("image/webp", 160), ("image/webp", 320)],
+        )
+        stem = self.book.image.name.rsplit(".", 1)[0]
+        for rendition in renditions:
+            self.assertTrue(rendition["name"].startswith(stem + "."))
+            with default_storage.open(rendition["name"]) as handle, Image.open(handle) as image:
+                self.assertEqual(image.size, (rendition["width"], rendition["width"] * 3 // 2))
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.thumbnails, renditions)
+
+    def test_new_upload_replaces_old_renditions(self):
+        """Test regenerating after a new upload deletes the stale files."""
+        old = generate_thumbnails(self.book)
+        self.book.image = create_cover(color="green")
+        self.book.save()
+        new = generate_thumbnails(self.book)
+        self.assertTrue(set(r["name"] for r in old).isdisjoint(r["name"] for r in new))
+        for rendition in old:
+            self.assertFalse(default_storage.exists(rendition["name"]))
+
+    def test_card_renders_srcset(self):
+        """Test listings offer the renditions through srcset."""
+        generate_thumbnails(self.book)
+        response = Client().get(reverse("explore"))
+        self.assertContains(response, '<source type="image/webp" srcset="')
+        self.assertContains(response, "320w")
+
+    def test_add_book_renders_thumbnails(self):
+        """Test uploading through add_book queues the renditions."""
+        admin_group, _ = Group.objects.get_or_create(name="admin")
+        user = User.objects.create_user(username="admin", email="a@example.com", password="pass")
+        user.groups.add(admin_group)
+        client = Client()
+        client.login(username="admin", password="pass")
+        client.post(reverse("addBook"), {
+            "title": "Uploaded", "subtitle": "Sub", "author": "Author", "publisher": "Press",
+            "description": "New", "category": "Science", "rating": 3, "image": create_cover(),
+        })
+        book = EBooksModel.objects.get(title="Uploaded")
+        self.assertEqual(book.thumbnails, [])
+        self.assertEqual(run_pending(), 1)
+        book.refresh_from_db()
+        self.assertEqual(len(book.thumbnails), 4)
+
+    def test_backfill_command(self):
+        """Test the command renders missing thumbnails and reports failures."""
+        broken = EBooksModel.objects.create(
+            title="Broken", author="Author", category="Fiction", image="books/missing.png"
+        )
+        err = StringIO()
+        call_command("generate_thumbnails", stdout=StringIO(), stderr=err)
+        self.book.refresh_from_db()
+        self.assertEqual(len(self.book.thumbnails), 4)
+        self.assertIn(f"book {broken.pk}", err.getvalue())
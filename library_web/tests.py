@@ -1,16 +1,23 @@
 """Test cases for Library Web application views and models."""
 # pylint: disable=no-member
 
+import shutil
+import tempfile
 from datetime import date, timedelta
 from io import BytesIO
+from unittest import mock
 from PIL import Image
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.urls import reverse
 from django.urls.exceptions import NoReverseMatch
 from django.core.files.uploadedfile import SimpleUploadedFile
-from library_web.models import EBooksModel, BorrowRecord
+from library_web import loans
+from library_web.catalog import SECTIONS, bump_state, get_catalog_snapshot, invalidate_catalog
+from library_web.models import EBooksModel, BorrowRecord, Hold
+from library_web.pagination import cursor_for
+from library_web.suggest import SUGGEST_STATE, SuggestIndex, suggest_index
 from library_web.forms import EBooksForm, RegistrationForm
 
 # Get the custom User model
@@ -31,6 +38,15 @@ def create_test_image():
     )
 
 
+def use_temporary_media(test_case):
+    """Store uploads and renditions in a scratch MEDIA_ROOT for one test."""
+    media_root = tempfile.mkdtemp()
+    test_case.addCleanup(shutil.rmtree, media_root)
+    media = override_settings(MEDIA_ROOT=media_root)
+    media.enable()
+    test_case.addCleanup(media.disable)
+
+
 class EBooksModelTest(TestCase):
     """Test cases for EBooksModel."""
 
@@ -166,6 +182,282 @@ class HomeViewTest(TestCase):
         self.assertEqual(len(response.context['science_books']), 1)
 
 
+class CatalogSnapshotTest(TestCase):
+    """Test cases for the cached home page catalog snapshot."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = Client()
+        self.url = reverse('home')
+        self.books = [
+            EBooksModel.objects.create(
+                title=f"Book {i}",
+                author="Author",
+                category="Fiction",
+                rating=i % 6,
+                borrow_count=i,
+                image=create_test_image()
+            )
+            for i in range(5)
+        ]
+
+    def test_home_view_one_query_per_section_then_cached(self):
+        """Test the snapshot is built with one query per section and reused afterwards."""
+        # Plus the generation lookups of the conditional-GET state and of
+        # the snapshot on each request.
+        with self.assertNumQueries(2 + len(SECTIONS)):
+            self.client.get(self.url)
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+    def test_top_lists_are_bounded_and_sorted(self):
+        """Test the ranking sections only hold the top N books."""
+        with self.settings(LIBRARY_SECTION_LIMITS={'rating': 2, 'borrow': 2}):
+            invalidate_catalog()
+            snapshot = get_catalog_snapshot()
+        self.assertEqual(
+            [b.borrow_count for b in snapshot['book_borrow']], [4, 3]
+        )
+        self.assertEqual([b.rating for b in snapshot['book_rating']], [4, 3])
+        self.assertEqual(len(snapshot['fiction_books']), 5)
+
+    def test_snapshot_invalidated_on_save_and_delete(self):
+        """Test saving or deleting a book refreshes the snapshot."""
+        self.client.get(self.url)
+        book = self.books[0]
+        book.title = "Renamed"
+        book.save()
+        response = self.client.get(self.url)
+        titles = [b.title for b in response.context['fiction_books']]
+        self.assertIn("Renamed", titles)
+
+        book.delete()
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.context['fiction_books']), 4)
+
+
+class KeysetPaginationTest(TestCase):
+    """Test cases for cursor pagination of the listing pages."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = Client()
+        for i in range(7):
+            EBooksModel.objects.create(
+                title=f"Python {i}",
+                author="Author",
+                category="Science",
+                rating=i % 3,
+                borrow_count=i % 2,
+                image=create_test_image()
+            )
+
+    def walk(self, url, limit, **params):
+        """Follow ``after`` tokens until the listing is exhausted."""
+        seen = []
+        after = None
+        while True:
+            query = dict(params, limit=limit)
+            if after:
+                query['after'] = after
+            response = self.client.get(url, query)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(book.id for book in response.context['books'])
+            after = response.context['after']
+            if not after:
+                return seen
+
+    def test_explore_walks_every_book_once(self):
+        """Test explore pages cover the catalog without repeats."""
+        seen = self.walk(reverse('explore'), 3)
+        self.assertEqual(seen, sorted(EBooksModel.objects.values_list('id', flat=True)))
+
+    def test_section_pages_follow_sql_order(self):
+        """Test the rating section matches ORDER BY rating DESC, id DESC."""
+        expected = list(
+            EBooksModel.objects.order_by('-rating', '-id').values_list('id', flat=True)
+        )
+        url = reverse('book_section', kwargs={'section': 'rating'})
+        self.assertEqual(self.walk(url, 2), expected)
+
+    def test_search_results_paginated(self):
+        """Test search results are split into pages."""
+        seen = self.walk(reverse('search_books'), 4, q='Python')
+        self.assertEqual(len(seen), 7)
+
+    def test_deep_page_is_single_query(self):
+        """Test a later page costs one bounded query."""
+        books = list(EBooksModel.objects.order_by('id'))
+        after = cursor_for(books[4], 'id')
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('explore'), {'after': after, 'limit': 2})
+        self.assertEqual([b.id for b in response.context['books']], [books[5].id, books[6].id])
+
+    def test_invalid_cursor_rejected(self):
+        """Test a malformed token returns 400."""
+        response = self.client.get(reverse('explore'), {'after': '!!'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_section_404(self):
+        """Test an unknown section name returns 404."""
+        url = reverse('book_section', kwargs={'section': 'poetry'})
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class FullTextSearchTest(TestCase):
+    """Test cases for the full-text search backends."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = Client()
+        self.url = reverse('search_books')
+        self.title_hit = EBooksModel.objects.create(
+            title="Gardening <Basics>",
+            author="Ann Green",
+            category="Science",
+            description="Soil and seeds",
+            image=create_test_image()
+        )
+        self.body_hit = EBooksModel.objects.create(
+            title="Weekend Projects",
+            author="Bob Stone",
+            category="Science",
+            description="A short chapter on gardening tools",
+            image=create_test_image()
+        )
+
+    def search(self, query, **params):
+        """Run a search through the view and return the result books."""
+        response = self.client.get(self.url, dict(params, q=query))
+        self.assertEqual(response.status_code, 200)
+        return response.context['books']
+
+    def test_searches_all_text_fields(self):
+        """Test author and description are searched, not only title."""
+        self.assertEqual([b.id for b in self.search('Stone')], [self.body_hit.id])
+        self.assertEqual(len(self.search('gardening')), 2)
+
+    def test_title_match_ranked_first(self):
+        """Test a title match outranks a description match."""
+        books = self.search('gardening')
+        self.assertEqual(books[0].id, self.title_hit.id)
+
+    def test_prefix_match_and_highlight(self):
+        """Test prefix queries match and highlights are HTML-escaped."""
+        books = self.search('garden')
+        self.assertEqual(
+            str(books[0].title_highlight), "<mark>Gardening</mark> &lt;Basics&gt;"
+        )
+
+    def test_rank_cursor_pagination(self):
+        """Test ranked results can be paged with after tokens."""
+        response = self.client.get(self.url, {'q': 'gardening', 'limit': 1})
+        first = response.context['books'][0].id
+        response = self.client.get(
+            self.url, {'q': 'gardening', 'limit': 1, 'after': response.context['after']}
+        )
+        self.assertEqual([b.id for b in response.context['books']], [self.body_hit.id])
+        self.assertNotEqual(first, self.body_hit.id)
+        self.assertIsNone(response.context['after'])
+
+    def test_index_follows_save_and_delete(self):
+        """Test the index is updated from model signals."""
+        self.body_hit.title = "Orchids"
+        self.body_hit.save()
+        self.assertEqual([b.id for b in self.search('orchid')], [self.body_hit.id])
+        self.body_hit.delete()
+        self.assertEqual(len(self.search('orchid')), 0)
+
+    @override_settings(LIBRARY_SEARCH_BACKEND='library_web.search.LikeSearchBackend')
+    def test_like_fallback_backend(self):
+        """Test the LIKE fallback finds the same books."""
+        self.assertEqual(len(self.search('gardening')), 2)
+        self.assertEqual(
+            str(self.search('week')[0].title_highlight), "<mark>Weekend</mark> Projects"
+        )
+
+
+class SearchSuggestTest(TestCase):
+    """Test cases for the autocomplete endpoint."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = Client()
+        self.url = reverse('search_suggest')
+        self.book = EBooksModel.objects.create(
+            title="Advanced Python",
+            author="Guido Rossum",
+            category="Education",
+            image=create_test_image()
+        )
+        EBooksModel.objects.create(
+            title="Python Tricks",
+            author="Guido Rossum",
+            category="Education",
+            image=create_test_image()
+        )
+        suggest_index.load()
+        # The watcher thread would reload from outside the test transaction.
+        watch = mock.patch.object(suggest_index, "watch")
+        watch.start()
+        self.addCleanup(watch.stop)
+
+    def suggest(self, query):
+        """Return suggestion texts for a prefix."""
+        response = self.client.get(self.url, {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [(s['kind'], s['text']) for s in response.json()['suggestions']]
+
+    def test_title_and_author_prefixes(self):
+        """Test titles match from any word and authors are de-duplicated."""
+        self.assertEqual(
+            self.suggest('pyth'),
+            [('title', 'Advanced Python'), ('title', 'Python Tricks')]
+        )
+        self.assertEqual(self.suggest('guido'), [('author', 'Guido Rossum')])
+
+    def test_no_database_queries(self):
+        """Test suggestions are served from memory."""
+        with self.assertNumQueries(0):
+            self.client.get(self.url, {'q': 'adv'})
+
+    def test_unloaded_index_is_left_to_the_watcher(self):
+        """Test a request never builds a missing index itself."""
+        index = SuggestIndex()
+        with mock.patch.object(index, "watch") as watch:
+            with self.assertNumQueries(0):
+                self.assertEqual(index.suggest('adv'), [])
+        watch.assert_called_once_with()
+
+    def test_refresh_follows_book_changes_only(self):
+        """Test the watcher's check reloads for edits but not for loans."""
+        with self.assertNumQueries(1):
+            suggest_index.refresh()
+        EBooksModel.objects.filter(pk=self.book.pk).update(title="Rust in Action")
+        loans.borrow(self.book, BorrowRecord(
+            student_id='x1', borrow_date=date.today(), return_date=date.today() + timedelta(days=7)
+        ))
+        suggest_index.refresh()
+        self.assertEqual(self.suggest('rust'), [])
+        # As another process's save would, bump the index's own counter.
+        bump_state(SUGGEST_STATE, self.book.pk)
+        suggest_index.refresh()
+        self.assertEqual(self.suggest('rust'), [('title', 'Rust in Action')])
+
+    def test_short_prefix_returns_nothing(self):
+        """Test one-character prefixes are ignored."""
+        self.assertEqual(self.suggest('p'), [])
+
+    def test_index_follows_save_and_delete(self):
+        """Test the index is patched from model signals."""
+        self.book.title = "Rust in Action"
+        self.book.save()
+        self.assertEqual(self.suggest('rust'), [('title', 'Rust in Action')])
+        self.assertNotIn(('title', 'Advanced Python'), self.suggest('adv'))
+        self.book.delete()
+        self.assertEqual(self.suggest('rust'), [])
+
+
 class RegisterViewTest(TestCase):
     """Test cases for registration view."""
 
@@ -404,6 +696,32 @@ class BorrowBookViewTest(TestCase):
             ).exists()
         )
 
+    def test_borrow_unavailable_book_places_hold(self):
+        """Test borrowing a book with no free copy queues a hold."""
+        other = User.objects.create_user(
+            username='other', email='other@example.com', password='testpass123'
+        )
+        loans.borrow(self.book, BorrowRecord(
+            user=other, student_id='x1', borrow_date=date.today(),
+            return_date=date.today() + timedelta(days=7)
+        ))
+        self.client.login(username='testuser', password='testpass123')
+        self.assertContains(self.client.get(self.url), 'Place Hold')
+
+        data = {
+            'student_id': 'x12345678',
+            'return_date': (date.today() + timedelta(days=7)).strftime('%Y-%m-%d')
+        }
+        response = self.client.post(self.url, data)
+        self.assertTemplateUsed(response, 'hold_message.html')
+        self.assertEqual(response.context['position'], 1)
+        hold = Hold.objects.get(book=self.book)
+        self.assertEqual((hold.user, hold.loan_days), (self.user, 7))
+
+        loans.return_book(EBooksModel.objects.get(pk=self.book.pk))
+        hold.refresh_from_db()
+        self.assertEqual(hold.loan.user, self.user)
+
     def test_borrow_with_invalid_return_date(self):
         """Test borrowing with return date before borrow date."""
         self.client.login(username='testuser', password='testpass123')
@@ -0,0 +1,94 @@
+"""Resized cover renditions for responsive ``<img srcset>`` markup.
+
+Each upload is rendered at ``LIBRARY_THUMBNAIL_WIDTHS`` in WebP and JPEG and
+stored beside the original as ``<stem>.<hash>.<width>w.<ext>``, where the
+hash is taken from the original's bytes, so a re-upload never serves a
+stale rendition from a cache. The list of renditions is kept on the book,
+so templates build ``srcset`` without touching storage.
+"""
+# pylint: disable=no-member
+
+import hashlib
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import F
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from library_web.catalog import invalidate_catalog
+
+DEFAULT_WIDTHS = (160, 320, 640)
+FORMATS = (("webp", "WEBP", "image/webp"), ("jpeg", "JPEG", "image/jpeg"))
+QUALITY = 80
+HASH_LENGTH = 12
+
+
+def thumbnail_widths():
+    """Return the rendition widths, honouring LIBRARY_THUMBNAIL_WIDTHS."""
+    return tuple(sorted(getattr(settings, "LIBRARY_THUMBNAIL_WIDTHS", DEFAULT_WIDTHS)))
+
+
+def _encode(image, width, fmt):
+    """Return ``image`` resized to ``width`` and encoded as ``fmt`` bytes."""
+    height = max(1, round(image.height * width / image.width))
+    resized = image.resize((width, height), Image.Resampling.LANCZOS)
+    if fmt == "JPEG" and resized.mode != "RGB":
+        resized = resized.convert("RGB")
+    out = BytesIO()
+    resized.save(out, fmt, quality=QUALITY, optimize=True)
+    return out.getvalue()
+
+
+def generate_thumbnails(book):
+    """Render and store the renditions of ``book.image``.
+
+    Returns the rendition list and updates the book row; renditions of a
+    previous upload are deleted.
+    """
+    with book.image.open("rb") as handle:
+        original = handle.read()
+    digest = hashlib.sha256(original).hexdigest()[:HASH_LENGTH]
+
+    with Image.open(BytesIO(original)) as source:
+        image = ImageOps.exif_transpose(source)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        widths = [w for w in thumbnail_widths() if w < image.width] or [image.width]
+
+        stem, _ = os.path.splitext(book.image.name)
+        renditions = []
+        for ext, fmt, mime in FORMATS:
+            for width in widths:
+                name = f"{stem}.{digest}.{width}w.{ext}"
+                if not default_storage.exists(name):
+                    name = default_storage.save(name, ContentFile(_encode(image, width, fmt)))
+                renditions.append({"name": name, "width": width, "type": mime})
+
+    delete_thumbnails(book, keep={r["name"] for r in renditions})
+    book.thumbnails = renditions
+    book.version += 1
+    type(book).objects.filter(pk=book.pk).update(
+        thumbnails=renditions, version=F("version") + 1, updated_at=timezone.now()
+    )
+    invalidate_catalog(book.pk)
+    return renditions
+
+
+def delete_thumbnails(book, keep=()):
+    """Delete the stored renditions of ``book`` except those in ``keep``."""
+    for rendition in book.thumbnails or []:
+        if rendition["name"] not in keep:
+            default_storage.delete(rendition["name"])
+
+
+def srcsets(book):
+    """Return ``{mime: "url 160w, url 320w"}`` for the book's renditions."""
+    sets = {}
+    for rendition in book.thumbnails or []:
+        entry = f"{default_storage.url(rendition['name'])} {rendition['width']}w"
+        sets.setdefault(rendition["type"], []).append(entry)
+    return {mime: ", ".join(entries) for mime, entries in sets.items()}
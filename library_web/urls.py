@@ -3,7 +3,7 @@
 from django.urls import path
 from django.conf import settings
 from django.conf.urls.static import static
-from . import views
+from . import api, views
 
 urlpatterns = [
   path('', views.home, name='home'),
@@ -11,6 +11,7 @@ urlpatterns = [
   path('login', views.login_view, name='login'),
   path('logout/', views.logout_view, name='logout'),
   path('explore/', views.explore, name='explore'),
+  path('books/<slug:section>/', views.book_section, name='book_section'),
   path('addBook/', views.add_book, name='addBook'),
   path('editbook/<int:book_id>/', views.edit_book, name='editBook'),
   path('deletebook/<int:book_id>/', views.delete_book, name='deleteBook'),
@@ -18,6 +19,15 @@ urlpatterns = [
   path('viewBook/<int:book_id>', views.view_book, name='viewBook'),
   path("return/<int:book_id>/", views.return_book, name="return_book"),
   path("search/", views.search_books, name="search_books"),
+  path("search/suggest", views.search_suggest, name="search_suggest"),
+  path("loans/", views.my_loans, name="my_loans"),
+  path("api/loans/", views.my_loans_api, name="my_loans_api"),
+  path("api/books/", api.book_list, name="api_book_list"),
+  path("api/books/<int:book_id>/", api.book_detail, name="api_book_detail"),
+  path("api/records/", api.record_list, name="api_record_list"),
+  path("api/records/<int:record_id>/", api.record_detail, name="api_record_detail"),
+  path("export/<slug:dataset>/", views.export_data, name="export"),
+  path("metrics", views.metrics, name="metrics"),
 ]
 
 if settings.DEBUG:
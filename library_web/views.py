@@ -2,7 +2,6 @@
 # pylint: disable=no-member
 
 # Standard library imports
-import os
 from datetime import date
 
 # Third-party imports
@@ -11,41 +10,41 @@ from datetime import date
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout as django_logout
 from django.contrib.auth.decorators import login_required
+from django.http import (
+    Http404, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import redirect, render, get_object_or_404
+from django.urls import reverse
 from django.views.decorators.csrf import csrf_protect
-from django.db.models import FileField
 from django.views.decorators.http import require_http_methods
 
 # Local imports
+from library_web import loans
+from library_web.cache import render_cache_stats
+from library_web.catalog import SECTIONS, get_catalog_snapshot, section_limit, section_page
+from library_web.conditional import book_state, catalog_state, conditional_page
+from library_web.export import DATASETS, FORMATS, export_filename, export_stream, parse_date
 from library_web.forms import EBooksForm, RegistrationForm, BorrowForm
-from library_web.models import EBooksModel, BorrowRecord
+from library_web.instrumentation import metrics_allowed, registry as metrics_registry
+from library_web.jobs import enqueue_file_cleanup, enqueue_thumbnails
+from library_web.models import EBooksModel, Hold
+from library_web.pagination import InvalidCursor, page_limit, paginate
+from library_web.search import get_search_backend
+from library_web.suggest import DEFAULT_LIMIT as SUGGEST_LIMIT, suggest_index
 from .decorators import allowed_users
 
 #Local Varibale
 EXPLORE_TEMPLATE = "explore.html"
+INVALID_CURSOR_MESSAGE = "Invalid page token"
+BOOK_UNAVAILABLE_MESSAGE = "This book is already borrowed."
+LOAN_HISTORY_PAGE_SIZE = 20
 
 @require_http_methods(["GET", "POST"])
+@conditional_page(catalog_state)
 def home(request):
     """Display categorized books, top rated, and most borrowed."""
-    edu_books = EBooksModel.objects.filter(category="Education")
-    fiction_books = EBooksModel.objects.filter(category="Fiction")
-    science_books = EBooksModel.objects.filter(category="Science")
-    non_fiction_books = EBooksModel.objects.filter(category="NonFriction")
-    book_rating = EBooksModel.objects.all().order_by("-rating")
-    book_borrow = EBooksModel.objects.all().order_by("-borrow_count")
-
-    return render(
-        request,
-        "home.html",
-        {
-            "edu_books": edu_books,
-            "fiction_books": fiction_books,
-            "science_books": science_books,
-            "non_fiction_books": non_fiction_books,
-            "book_rating": book_rating,
-            "book_borrow": book_borrow,
-        },
-    )
+    return render(request, "home.html", get_catalog_snapshot())
 
 @require_http_methods(["GET", "POST"])
 @csrf_protect
@@ -95,7 +94,9 @@ def add_book(request):
         form = EBooksForm(request.POST, request.FILES)
         if form.is_valid():
             book = form.save(commit=False)
+            book.copy_count += form.cleaned_data["extra_copies"] or 0
             book.save()
+            enqueue_thumbnails(book)
             return redirect("home")
     else:
         form = EBooksForm()
@@ -106,23 +107,14 @@ def add_book(request):
 @csrf_protect
 @login_required(login_url="login")
 def borrow_book(request, book_id):
-    """Allow a user to borrow a book if not already borrowed."""
+    """Borrow a free copy of a book, or join its hold queue if none is free."""
     book = get_object_or_404(EBooksModel, id=book_id)
     user = request.user
 
-    active_record = BorrowRecord.objects.filter(
-        book=book, actual_return_date__isnull=True
-    ).first()
-
-    if active_record:
-        messages.error(request, "This book is already borrowed.")
-        return redirect("book_detail", book_id=book_id)
-
     if request.method == "POST":
         form = BorrowForm(request.POST)
         if form.is_valid():
             borrow_record = form.save(commit=False)
-            borrow_record.book = book
             borrow_record.user = user
             borrow_record.borrow_date = date.today()
 
@@ -135,11 +127,18 @@ def borrow_book(request, book_id):
                     request, "borrow_book.html", {"form": form, "book": book}
                 )
 
-            borrow_record.save()
-            book.borrow_count += 1
-            book.is_borrowed = True
-            book.save()
+            try:
+                result = loans.borrow_or_hold(book, borrow_record)
+            except loans.BookUnavailable:
+                messages.error(request, BOOK_UNAVAILABLE_MESSAGE)
+                return redirect("viewBook", book_id=book_id)
 
+            if isinstance(result, Hold):
+                return render(
+                    request,
+                    "hold_message.html",
+                    {"hold": result, "position": loans.hold_position(result)},
+                )
             return render(request, "borrow_message.html", {"record": borrow_record})
     else:
         form = BorrowForm(initial={"student_id": user.id})
@@ -152,32 +151,18 @@ def return_book(request, book_id):
     """Process the return of a borrowed book."""
     book = get_object_or_404(EBooksModel, id=book_id)
 
-    if not book.is_borrowed:
+    if book.available_copies >= book.copy_count:
         messages.error(request, "This book is not currently borrowed.")
         return render(request, EXPLORE_TEMPLATE)
 
-    record = BorrowRecord.objects.filter(
-        book=book, actual_return_date__isnull=True
-    ).first()
-
-    if not record:
+    try:
+        record = loans.return_book(
+            book, user=request.user if request.user.is_authenticated else None
+        )
+    except loans.NoActiveLoan:
         messages.error(request, "No active borrow record found for this book.")
         return render(request, EXPLORE_TEMPLATE)
 
-    today = date.today()
-
-    if today > record.return_date:
-        extra_days = (today - record.return_date).days
-        record.late_fee = extra_days * 8
-    else:
-        record.late_fee = 0
-
-    record.actual_return_date = today
-    record.save()
-
-    book.is_borrowed = False
-    book.save()
-
     return render(
         request,
         "return_Book.html",
@@ -185,6 +170,7 @@ def return_book(request, book_id):
     )
 
 @require_http_methods(["GET", "POST"])
+@conditional_page(book_state)
 def view_book(request, book_id):
     """View details of a single book."""
     book = get_object_or_404(EBooksModel, id=book_id)
@@ -197,11 +183,22 @@ def view_book(request, book_id):
 def edit_book(request, book_id):
     """Edit existing book details (Admin only)."""
     book = get_object_or_404(EBooksModel, id=book_id)
+    old_files = [book.image.name] + [r["name"] for r in book.thumbnails]
 
     if request.method == "POST":
         form = EBooksForm(request.POST, request.FILES, instance=book)
         if form.is_valid():
-            form.save()
+            fields = list(EBooksModel.EDITABLE_FIELDS)
+            if "image" in form.changed_data:
+                # The old renditions are deleted below; the job renders new ones.
+                book.thumbnails = []
+                fields.append("thumbnails")
+            form.save(commit=False).save(update_fields=fields)
+            if form.cleaned_data["extra_copies"]:
+                loans.add_copies(book, form.cleaned_data["extra_copies"])
+            if "image" in form.changed_data:
+                enqueue_thumbnails(book)
+                enqueue_file_cleanup(old_files)
             return redirect("home")
     else:
         form = EBooksForm(instance=book)
@@ -216,13 +213,9 @@ def delete_book(request, book_id):
     book = get_object_or_404(EBooksModel, id=book_id)
 
     if request.method == "POST":
-        for field in book._meta.get_fields():
-            if isinstance(field, FileField):
-                file_field = getattr(book, field.name)
-                if file_field and os.path.isfile(file_field.path):
-                    os.remove(file_field.path)
-
+        files = [book.image.name] + [r["name"] for r in book.thumbnails]
         book.delete()
+        enqueue_file_cleanup(files)
         return redirect("home")
 
     return render(request, "deletebook.html", {"book": book})
@@ -231,21 +224,166 @@ def delete_book(request, book_id):
 @csrf_protect
 def explore(request):
     """Explore books page."""
-    return render(request, EXPLORE_TEMPLATE)
+    try:
+        books, after = section_page(
+            "all", request.GET.get("after"), page_limit(request, section_limit("all"))
+        )
+    except InvalidCursor:
+        return HttpResponseBadRequest(INVALID_CURSOR_MESSAGE)
+
+    return render(
+        request,
+        EXPLORE_TEMPLATE,
+        {"books": books, "section": "all", "after": after},
+    )
+
+@require_http_methods(["GET"])
+def book_section(request, section):
+    """Render the next page of book cards for a "load more" link."""
+    if section not in SECTIONS:
+        raise Http404("Unknown section")
+
+    try:
+        books, after = section_page(
+            section, request.GET.get("after"), page_limit(request, section_limit(section))
+        )
+    except InvalidCursor:
+        return HttpResponseBadRequest(INVALID_CURSOR_MESSAGE)
+
+    return render(
+        request,
+        "book_cards.html",
+        {"books": books, "section": section, "after": after},
+    )
 
 @require_http_methods(["GET", "POST"])
 @csrf_protect
+@conditional_page(catalog_state)
 def search_books(request):
-    """Search books by title using keyword AND matching."""
+    """Search books with the full-text backend, best matches first."""
     query = request.GET.get("q", "").strip()
-    books = EBooksModel.objects.all()
+    after = request.GET.get("after")
+    limit = page_limit(request, section_limit("search"))
 
-    if query:
-        for word in query.split():
-            books = books.filter(title__icontains=word)
+    try:
+        if query:
+            books, after = get_search_backend().search(query, after, limit)
+        else:
+            books, after = paginate(EBooksModel.objects.all(), "id", after, limit)
+    except InvalidCursor:
+        return HttpResponseBadRequest(INVALID_CURSOR_MESSAGE)
 
     return render(
         request,
         "search_books.html",
-        {"books": books, "query": query},
+        {"books": books, "query": query, "after": after},
+    )
+
+@require_http_methods(["GET"])
+def search_suggest(request):
+    """Return title and author completions for a typed prefix as JSON."""
+    query = request.GET.get("q", "").strip()
+    suggestions = suggest_index.suggest(query, page_limit(request, SUGGEST_LIMIT))
+    for item in suggestions:
+        item["url"] = reverse("viewBook", args=[item["book_id"]])
+    return JsonResponse({"query": query, "suggestions": suggestions})
+
+
+def _user_loans(request):
+    """Return the summary, open loans and one page of past loans for the user."""
+    loans_qs = request.user.loans.select_related("book").order_by("-id")
+    active = list(loans_qs.filter(actual_return_date__isnull=True))
+    history, after = paginate(
+        loans_qs.filter(actual_return_date__isnull=False),
+        "recent",
+        request.GET.get("after"),
+        page_limit(request, LOAN_HISTORY_PAGE_SIZE),
+    )
+    return loans.loan_summary(request.user), active, history, after
+
+@require_http_methods(["GET"])
+@login_required(login_url="login")
+def my_loans(request):
+    """List the current user's open and past loans."""
+    try:
+        summary, active, history, after = _user_loans(request)
+    except InvalidCursor:
+        return HttpResponseBadRequest(INVALID_CURSOR_MESSAGE)
+
+    accrued = sum(record.late_fee for record in active)
+    return render(
+        request,
+        "my_loans.html",
+        {"summary": summary, "active": active, "history": history,
+         "after": after, "accrued": accrued},
+    )
+
+def _loan_json(record):
+    """Serialize one borrow record for the loans API."""
+    return {
+        "id": record.id,
+        "tracking_code": str(record.tracking_code),
+        "book": {
+            "id": record.book_id,
+            "title": record.book.title,
+            "url": reverse("viewBook", args=[record.book_id]),
+        },
+        "borrow_date": record.borrow_date,
+        "return_date": record.return_date,
+        "returned_on": record.actual_return_date,
+        "late_fee": str(record.late_fee),
+    }
+
+@require_http_methods(["GET"])
+@login_required(login_url="login")
+def my_loans_api(request):
+    """Return the current user's loans as JSON."""
+    try:
+        summary, active, history, after = _user_loans(request)
+    except InvalidCursor:
+        return HttpResponseBadRequest(INVALID_CURSOR_MESSAGE)
+
+    return JsonResponse({
+        "summary": {
+            "open_loans": summary.open_loans,
+            "total_loans": summary.total_loans,
+            "fees_charged": str(summary.fees_charged),
+        },
+        "active": [_loan_json(record) for record in active],
+        "history": [_loan_json(record) for record in history],
+        "next": after,
+    })
+
+@require_http_methods(["GET"])
+@login_required
+@allowed_users(allowed_roles=["admin"])
+def export_data(request, dataset):
+    """Stream the books or loans table as CSV or JSONL, optionally gzipped."""
+    fmt = request.GET.get("format", "csv")
+    if dataset not in DATASETS:
+        raise Http404("Unknown export")
+    if fmt not in FORMATS:
+        return HttpResponseBadRequest("format must be csv or jsonl")
+    try:
+        since = parse_date(request.GET.get("since"))
+        until = parse_date(request.GET.get("until"))
+    except ValueError:
+        return HttpResponseBadRequest("since and until must be YYYY-MM-DD dates")
+
+    compress = request.GET.get("gzip") == "1"
+    response = StreamingHttpResponse(
+        export_stream(dataset, fmt, compress, since, until),
+        content_type="application/gzip" if compress else FORMATS[fmt],
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="{export_filename(dataset, fmt, compress)}"'
     )
+    return response
+
+@require_http_methods(["GET"])
+def metrics(request):
+    """Serve per-view request metrics and cache counters in the Prometheus text format."""
+    if not metrics_allowed(request):
+        return HttpResponseForbidden("Metrics need a staff login or the metrics token")
+    body = metrics_registry.render() + render_cache_stats()
+    return HttpResponse(body, content_type="text/plain; version=0.0.4")